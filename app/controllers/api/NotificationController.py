@@ -1,123 +1,516 @@
 # 🔔 Controller de Notificações - API
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from datetime import datetime, timedelta
+import base64
+import hashlib
 import json
+import os
+
+from app.models.Notification import (
+    FIELD_NAMES, NotificationPriority, NotificationRecord, NotificationStatus, NotificationType,
+    dumps_json, now_ms, to_epoch_ms
+)
+from app.services.id_generator import IdGenerator, timestamp_ms
+from app.services.notification_coalescer import NotificationCoalescer
+from app.services.notification_delivery import NotificationDeliveryPool
+from app.services.notification_events import NotificationEventBus
+from app.services.notification_ingest import iter_json_array, iter_ndjson
+from app.services.notification_preferences import (
+    DEFAULT_CONFIG, DEFER, DELIVER, PreferenceCache, parse_minutes
+)
+from app.services.notification_repository import NotificationRepository
+from app.services.notification_retention import RetentionPolicy, RetentionSweeper, SegmentArchive
+from app.services.notification_rollups import NotificationRollups
+from app.services.notification_scheduler import TimerScheduler
+from app.services.notification_search import NotificationSearchIndex
+from app.services.notification_state import LeaderLock, SQLiteChangeFeed, backend_from_env
+from app.services.notification_store import NotificationStore
+from app.services.notification_versions import ResourceVersions
+from app.services.push_subscriptions import PushFanoutSender, SubscriptionRegistry
 
 notifications_bp = Blueprint('notifications', __name__)
 
-# Simulação de dados (em produção seria banco de dados)
-notifications_db = []
-subscriptions_db = []
+# Tamanho do bloco inserido/enfileirado de uma vez em /notifications/batch
+BATCH_CHUNK_SIZE = 500
+
+# Ações aceitas por /notifications/bulk
+BULK_ACTIONS = ("read", "unread", "archive", "delete")
+
+# Seções de /notifications/stats selecionáveis com ?fields=
+STATS_FIELDS = ("total", "by_type", "by_status", "by_priority", "daily_count")
+
+# Janela máxima (em dias) de /notifications/stats
+MAX_STATS_DAYS = 365
+
+NOTIFICATION_TEMPLATES = {
+    "agendamento_novo": {
+        "name": "Novo Agendamento",
+        "description": "Notificação para novos agendamentos",
+        "variables": ["cliente_nome", "tipo_ensaio", "data_ensaio", "hora_ensaio"],
+        "example": "Novo Agendamento - Maria Silva para Ensaio Gestante em 20/06/2025 às 14:00"
+    },
+    "pagamento_aprovado": {
+        "name": "Pagamento Aprovado",
+        "description": "Notificação para pagamentos aprovados",
+        "variables": ["cliente_nome", "valor", "plano_nome"],
+        "example": "Pagamento Aprovado - R$ 850,00 de Ana Santos para Ensaio Newborn"
+    },
+    "ensaio_lembrete": {
+        "name": "Lembrete de Ensaio",
+        "description": "Lembrete de ensaio próximo",
+        "variables": ["cliente_nome", "tipo_ensaio", "data_ensaio", "hora_ensaio"],
+        "example": "Lembrete: Ensaio Gestante com Maria Silva amanhã às 14:00"
+    },
+    "whatsapp_mensagem": {
+        "name": "Nova Mensagem WhatsApp",
+        "description": "Notificação para novas mensagens",
+        "variables": ["cliente_nome", "preview_mensagem"],
+        "example": "Nova Mensagem de João Silva: Olá, gostaria de agendar..."
+    }
+}
+
+# Título dos pushes de resumo: "5 novas mensagens"
+DIGEST_TITLES = {
+    NotificationType.AGENDAMENTO: "novos agendamentos",
+    NotificationType.PAGAMENTO: "novos pagamentos",
+    NotificationType.ENSAIO: "atualizações de ensaios",
+    NotificationType.SISTEMA: "avisos do sistema",
+    NotificationType.MARKETING: "novidades",
+    NotificationType.WHATSAPP: "novas mensagens"
+}
+
+TEMPLATES_BODY = json.dumps(
+    {"success": True, "templates": NOTIFICATION_TEMPLATES},
+    sort_keys=True, separators=(',', ':')
+).encode('utf-8')
+TEMPLATES_ETAG = hashlib.blake2b(TEMPLATES_BODY, digest_size=8).hexdigest()
+
+# Estado em memória (índices e rollups) persistido no SQLite pelo repositório
+notification_store = NotificationStore()
+notification_rollups = NotificationRollups()
+notification_store.add_listener(notification_rollups)
+notification_events = NotificationEventBus(notification_store)
+notification_store.add_listener(notification_events)
+resource_versions = ResourceVersions()
+notification_store.add_listener(resource_versions)
+notification_search = NotificationSearchIndex(notification_store)
+notification_store.add_listener(notification_search)
+notification_repository = NotificationRepository()
+# IDs ordenáveis por tempo; cada worker reserva um slot próprio ao lado do banco
+id_generator = IdGenerator(slot_prefix=notification_repository.path + '.worker')
+delivery_pool = NotificationDeliveryPool(
+    notification_store, lambda notification: send_push_notification(notification),
+    digest_sender=lambda notifications: send_push_digest(notifications)
+)
+# Rajadas do mesmo tipo para o mesmo usuário viram um único push de resumo.
+# Criado depois do delivery_pool: no atexit as retidas entram na fila antes de ela ser drenada
+digest_windows = TimerScheduler()
+coalescer = NotificationCoalescer(digest_windows, lambda group: flush_digest(group))
+notification_scheduler = TimerScheduler()
+notification_archive = SegmentArchive()
+retention_sweeper = RetentionSweeper(notification_store, RetentionPolicy.from_env(), notification_archive)
+subscription_registry = SubscriptionRegistry()
 configs_db = {}
+preference_cache = PreferenceCache(configs_db)
+
+# Vários workers (NOTIFICATIONS_STATE_BACKEND=sqlite): cada processo replica as
+# mudanças dos demais a partir do change_log e só o líder agenda e faz retenção
+shared_state = backend_from_env() == 'sqlite'
+leader_lock = LeaderLock(notification_repository.path + '.leader') if shared_state else None
+change_feed = None
 
 @notifications_bp.route('/notifications', methods=['GET'])
 def get_notifications():
-    """Busca notificações do usuário"""
+    """Busca notificações do usuário (mais recentes primeiro)
+
+    Aceita `cursor` (retornado em `next_cursor`) para paginação por chave; `page`
+    continua aceito para clientes antigos. `fields=id,title,status` limita os
+    campos e `format=compact` retorna colunas ({campo: [valores]}) em vez de objetos.
+    """
     user_id = request.args.get('user_id', 'admin')
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 20))
+    
+    # Nada mudou para este usuário/consulta: 304 antes de filtrar ou serializar
+    etag = resource_versions.etag(ResourceVersions.NOTIFICATIONS, user_id, query_variant())
+    if not_modified(etag):
+        return not_modified_response(etag)
+    
+    page = max(int(request.args.get('page', 1)), 1)
+    limit = max(int(request.args.get('limit', 20)), 1)
     status = request.args.get('status', 'all')
+    cursor = request.args.get('cursor')
+    compact = request.args.get('format') == 'compact'
     
-    # Filtrar notificações
-    user_notifications = [n for n in notifications_db if n.get('user_id') == user_id]
+    try:
+        fields = parse_fields(request.args.get('fields'), FIELD_NAMES)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 400
     
+    status_filter = None
     if status != 'all':
-        user_notifications = [n for n in user_notifications if n.get('status') == status]
+        try:
+            status_filter = NotificationStatus(status)
+        except ValueError:
+            return jsonify({
+                "success": False,
+                "message": "Status inválido"
+            }), 400
     
-    # Paginação
-    start = (page - 1) * limit
-    end = start + limit
-    paginated = user_notifications[start:end]
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None:
+            return jsonify({
+                "success": False,
+                "message": "Cursor inválido"
+            }), 400
     
-    return jsonify({
+    # Paginação por chave (created_at, id) direto nos índices do store
+    paginated, next_key = notification_store.page_for_user(
+        user_id, status_filter, limit=limit, after=after,
+        offset=0 if after else (page - 1) * limit
+    )
+    
+    envelope = {
         "success": True,
-        "notifications": paginated,
-        "total": len(user_notifications),
+        "total": notification_store.count(user_id, status_filter),
         "page": page,
         "limit": limit,
-        "unread_count": len([n for n in user_notifications if n.get('status') == 'pendente'])
+        "next_cursor": encode_cursor(next_key) if next_key else None,
+        "unread_count": notification_store.count(user_id, NotificationStatus.PENDENTE)
+    }
+    
+    if compact:
+        rows = [notification.project(fields) for notification in paginated]
+        columns = zip(*rows) if rows else ([] for _ in fields)
+        envelope["notifications"] = dict(zip(fields, map(list, columns)))
+        response = json_response(envelope)
+    elif fields is not FIELD_NAMES:
+        envelope["notifications"] = [dict(zip(fields, n.project(fields))) for n in paginated]
+        response = json_response(envelope)
+    else:
+        # Cada registro reaproveita seus bytes JSON em cache; só o envelope é serializado
+        response = json_list_response("notifications", [n.to_json() for n in paginated], envelope)
+    response.set_etag(etag)
+    return response
+
+@notifications_bp.route('/notifications/search', methods=['GET'])
+def search_notifications():
+    """Busca textual em título e mensagem (sem acentos, por prefixo), por relevância"""
+    user_id = request.args.get('user_id', 'admin')
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetro q é obrigatório"
+        }), 400
+    
+    etag = resource_versions.etag(ResourceVersions.NOTIFICATIONS, user_id, query_variant())
+    if not_modified(etag):
+        return not_modified_response(etag)
+    
+    page = max(int(request.args.get('page', 1)), 1)
+    limit = max(int(request.args.get('limit', 20)), 1)
+    status = request.args.get('status', 'all')
+    
+    status_filter = None
+    if status != 'all':
+        try:
+            status_filter = NotificationStatus(status)
+        except ValueError:
+            return jsonify({
+                "success": False,
+                "message": "Status inválido"
+            }), 400
+    
+    results, total = notification_search.search(
+        user_id, query, limit=limit, offset=(page - 1) * limit, status=status_filter
+    )
+    
+    response = json_list_response("notifications", [n.to_json() for n in results], {
+        "success": True,
+        "query": query,
+        "total": total,
+        "page": page,
+        "limit": limit
     })
+    response.set_etag(etag)
+    return response
+
+@notifications_bp.route('/notifications/archive', methods=['GET'])
+def get_archived_notifications():
+    """Busca o histórico de notificações já arquivadas pela retenção"""
+    user_id = request.args.get('user_id', 'admin')
+    limit = int(request.args.get('limit', 50))
+    
+    try:
+        before = to_epoch_ms(request.args.get('before'))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetro before inválido"
+        }), 400
+    
+    notifications = notification_archive.query(user_id, limit=limit, before=before)
+    for notification in notifications:
+        notification.pop("created_ms", None)
+    
+    return jsonify({
+        "success": True,
+        "notifications": notifications,
+        "limit": limit
+    })
+
+@notifications_bp.route('/notifications/stream', methods=['GET'])
+def stream_notifications():
+    """Stream SSE com novas notificações, mudanças de status e contador de não lidas
+
+    Reconexões enviam `Last-Event-ID` (ou `last_event_id` na query) para
+    receber os eventos perdidos a partir do buffer recente do usuário.
+    """
+    user_id = request.args.get('user_id', 'admin')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or None
+    
+    return Response(
+        stream_with_context(notification_events.stream(user_id, last_event_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
 @notifications_bp.route('/notifications', methods=['POST'])
 def create_notification():
     """Cria uma nova notificação"""
     data = request.get_json()
     
-    notification = {
-        "id": f"notif_{len(notifications_db) + 1}",
-        "user_id": data.get('user_id', 'admin'),
-        "title": data.get('title', ''),
-        "message": data.get('message', ''),
-        "type": data.get('type', 'sistema'),
-        "priority": data.get('priority', 'media'),
-        "status": "pendente",
-        "data": data.get('data', {}),
-        "action_url": data.get('action_url', ''),
-        "icon": data.get('icon', '/icons/default.png'),
-        "image_url": data.get('image_url', ''),
-        "scheduled_at": data.get('scheduled_at'),
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
+    try:
+        notification = build_notification(data)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": f"Dados inválidos: {e}"
+        }), 400
     
-    notifications_db.append(notification)
+    notification_store.insert(notification)
     
-    # Se não é agendada, enviar imediatamente
-    if not notification["scheduled_at"]:
-        send_push_notification(notification)
+    # Agendadas vão para o scheduler; as demais para envio imediato (fora da requisição)
+    if notification.scheduled_at:
+        schedule_notification(notification)
+    elif not dispatch_notification(notification):
+        notification_store.remove(notification.id)
+        response = jsonify({
+            "success": False,
+            "message": "Fila de envio cheia, tente novamente em instantes"
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
     
     return jsonify({
         "success": True,
-        "notification": notification,
+        "notification": notification.to_dict(),
         "message": "Notificação criada com sucesso"
     })
 
+@notifications_bp.route('/notifications/batch', methods=['POST'])
+def create_notifications_batch():
+    """Cria notificações em lote a partir de um array JSON ou de um corpo NDJSON
+
+    O corpo é lido em streaming; os itens válidos são inseridos no store e
+    entregues à fila de envio em blocos de BATCH_CHUNK_SIZE.
+    """
+    content_type = request.mimetype or ''
+    if content_type in ('application/x-ndjson', 'application/jsonl', 'application/ndjson'):
+        items = iter_ndjson(request.stream)
+    else:
+        items = iter_json_array(request.stream)
+    
+    results = []
+    chunk = []
+    created = 0
+    
+    for index, (item, error) in enumerate(items):
+        if error is None:
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("cada item deve ser um objeto JSON")
+                notification = build_notification(item)
+            except ValueError as e:
+                error = f"Dados inválidos: {e}"
+        if error is not None:
+            results.append({"index": index, "success": False, "message": error})
+            continue
+        
+        chunk.append((index, notification))
+        if len(chunk) >= BATCH_CHUNK_SIZE:
+            created += ingest_chunk(chunk, results)
+            chunk = []
+    
+    created += ingest_chunk(chunk, results)
+    results.sort(key=lambda result: result["index"])
+    
+    return jsonify({
+        "success": created > 0 or not results,
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    })
+
 @notifications_bp.route('/notifications/<notification_id>/read', methods=['POST'])
 def mark_as_read(notification_id):
     """Marca notificação como lida"""
-    for notification in notifications_db:
-        if notification["id"] == notification_id:
-            notification["status"] = "lida"
-            notification["read_at"] = datetime.now().isoformat()
-            notification["updated_at"] = datetime.now().isoformat()
-            
-            return jsonify({
-                "success": True,
-                "message": "Notificação marcada como lida"
-            })
+    now = now_ms()
+    notification = notification_store.set_status(
+        notification_id, NotificationStatus.LIDA, read_at=now, updated_at=now
+    )
+    
+    if notification is not None:
+        return jsonify({
+            "success": True,
+            "message": "Notificação marcada como lida"
+        })
     
     return jsonify({
         "success": False,
         "message": "Notificação não encontrada"
     }), 404
 
+@notifications_bp.route('/notifications/<notification_id>/schedule', methods=['POST'])
+def reschedule_notification(notification_id):
+    """Reagenda o envio de uma notificação pendente"""
+    data = request.get_json()
+    notification = notification_store.get(notification_id)
+    
+    if notification is None or notification.status != NotificationStatus.PENDENTE:
+        return jsonify({
+            "success": False,
+            "message": "Notificação pendente não encontrada"
+        }), 404
+    
+    try:
+        scheduled_at = to_epoch_ms(data.get('scheduled_at'))
+    except (TypeError, ValueError):
+        scheduled_at = None
+    if scheduled_at is None:
+        return jsonify({
+            "success": False,
+            "message": "scheduled_at inválido"
+        }), 400
+    
+    notification_store.update_fields(notification_id, scheduled_at=scheduled_at, updated_at=now_ms())
+    schedule_notification(notification)
+    
+    return jsonify({
+        "success": True,
+        "notification": notification.to_dict(),
+        "message": "Notificação reagendada com sucesso"
+    })
+
+@notifications_bp.route('/notifications/<notification_id>/schedule', methods=['DELETE'])
+def cancel_scheduled_notification(notification_id):
+    """Cancela uma notificação agendada (ela é descartada sem ser enviada)"""
+    notification = notification_store.get(notification_id)
+    if (notification is None or not notification.scheduled_at
+            or notification.status != NotificationStatus.PENDENTE):
+        return jsonify({
+            "success": False,
+            "message": "Agendamento não encontrado"
+        }), 404
+    
+    notification_scheduler.cancel(notification_id)
+    notification_store.remove(notification_id)
+    
+    return jsonify({
+        "success": True,
+        "message": "Agendamento cancelado"
+    })
+
 @notifications_bp.route('/notifications/mark-all-read', methods=['POST'])
 def mark_all_as_read():
     """Marca todas as notificações como lidas"""
     data = request.get_json()
     user_id = data.get('user_id', 'admin')
     
-    count = 0
-    for notification in notifications_db:
-        if notification["user_id"] == user_id and notification["status"] == "pendente":
-            notification["status"] = "lida"
-            notification["read_at"] = datetime.now().isoformat()
-            notification["updated_at"] = datetime.now().isoformat()
-            count += 1
+    now = now_ms()
+    count = notification_store.set_status_for_user(
+        user_id, NotificationStatus.PENDENTE, NotificationStatus.LIDA,
+        read_at=now, updated_at=now
+    )
     
     return jsonify({
         "success": True,
         "message": f"{count} notificações marcadas como lidas"
     })
 
+@notifications_bp.route('/notifications/bulk', methods=['POST'])
+def bulk_update_notifications():
+    """Marca como lidas/não lidas, arquiva ou remove várias notificações de uma vez
+
+    Os alvos vêm de `ids` (lista) ou de `filter` (type, priority, status,
+    created_before); todas recebem o mesmo timestamp.
+    """
+    data = request.get_json()
+    user_id = data.get('user_id', 'admin')
+    action = data.get('action')
+    
+    if action not in BULK_ACTIONS:
+        return jsonify({
+            "success": False,
+            "message": f"Ação inválida (use {', '.join(BULK_ACTIONS)})"
+        }), 400
+    
+    try:
+        if isinstance(data.get('ids'), list):
+            targets = []
+            for notification_id in data['ids']:
+                notification = notification_store.get(str(notification_id))
+                if notification is not None and notification.user_id == user_id:
+                    targets.append(notification)
+        elif isinstance(data.get('filter'), dict):
+            targets = select_by_filter(user_id, data['filter'])
+        else:
+            raise ValueError("informe ids ou filter")
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "success": False,
+            "message": f"Dados inválidos: {e}"
+        }), 400
+    
+    now = now_ms()
+    if action == "read":
+        affected = notification_store.set_status_many(
+            [n.id for n in targets], NotificationStatus.LIDA, read_at=now, updated_at=now
+        )
+    elif action == "unread":
+        affected = notification_store.set_status_many(
+            [n.id for n in targets if n.status == NotificationStatus.LIDA],
+            NotificationStatus.PENDENTE, read_at=None, updated_at=now
+        )
+    elif action == "archive":
+        affected = retention_sweeper.archive_and_remove(targets)
+    else:
+        affected = notification_store.remove_many([n.id for n in targets])
+    
+    return jsonify({
+        "success": True,
+        "action": action,
+        "matched": len(targets),
+        "affected": affected,
+        "unread_count": notification_store.count(user_id, NotificationStatus.PENDENTE)
+    })
+
 @notifications_bp.route('/notifications/subscribe', methods=['POST'])
 def subscribe_push():
     """Registra subscription para push notifications"""
     data = request.get_json()
     
     subscription = {
-        "id": f"sub_{len(subscriptions_db) + 1}",
+        "id": id_generator.next_id('sub'),
         "user_id": data.get('user_id', 'admin'),
         "endpoint": data.get('endpoint', ''),
         "keys": {
@@ -129,7 +522,9 @@ def subscribe_push():
         "created_at": datetime.now().isoformat()
     }
     
-    subscriptions_db.append(subscription)
+    # Mesmo endpoint (mesmo navegador) reaproveita a subscription existente
+    subscription, _ = subscription_registry.register(subscription)
+    notification_repository.save_subscription(subscription)
     
     return jsonify({
         "success": True,
@@ -142,27 +537,18 @@ def get_notification_config():
     """Busca configurações de notificação do usuário"""
     user_id = request.args.get('user_id', 'admin')
     
-    config = configs_db.get(user_id, {
-        "user_id": user_id,
-        "agendamento_enabled": True,
-        "pagamento_enabled": True,
-        "ensaio_enabled": True,
-        "sistema_enabled": False,
-        "marketing_enabled": True,
-        "whatsapp_enabled": True,
-        "push_enabled": True,
-        "email_enabled": True,
-        "quiet_hours_enabled": True,
-        "quiet_hours_start": "22:00",
-        "quiet_hours_end": "08:00",
-        "sound_enabled": True,
-        "vibration_enabled": True
-    })
+    etag = resource_versions.etag(ResourceVersions.CONFIG, user_id)
+    if not_modified(etag):
+        return not_modified_response(etag)
     
-    return jsonify({
+    config = configs_db.get(user_id) or {"user_id": user_id, **DEFAULT_CONFIG}
+    
+    response = jsonify({
         "success": True,
         "config": config
     })
+    response.set_etag(etag)
+    return response
 
 @notifications_bp.route('/notifications/config', methods=['POST'])
 def update_notification_config():
@@ -170,11 +556,28 @@ def update_notification_config():
     data = request.get_json()
     user_id = data.get('user_id', 'admin')
     
+    # Apenas chaves conhecidas são aceitas
+    changes = {key: data[key] for key in DEFAULT_CONFIG if key in data}
+    try:
+        for key in ("quiet_hours_start", "quiet_hours_end"):
+            if key in changes:
+                parse_minutes(changes[key])
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "message": "Horário de silêncio inválido (use HH:MM)"
+        }), 400
+    
     configs_db[user_id] = {
+        "user_id": user_id,
+        **DEFAULT_CONFIG,
         **configs_db.get(user_id, {}),
-        **data,
+        **changes,
         "updated_at": datetime.now().isoformat()
     }
+    preference_cache.invalidate(user_id)
+    resource_versions.bump(ResourceVersions.CONFIG, user_id)
+    notification_repository.save_config(user_id, configs_db[user_id])
     
     return jsonify({
         "success": True,
@@ -185,118 +588,362 @@ def update_notification_config():
 @notifications_bp.route('/notifications/templates', methods=['GET'])
 def get_notification_templates():
     """Busca templates de notificação disponíveis"""
-    templates = {
-        "agendamento_novo": {
-            "name": "Novo Agendamento",
-            "description": "Notificação para novos agendamentos",
-            "variables": ["cliente_nome", "tipo_ensaio", "data_ensaio", "hora_ensaio"],
-            "example": "Novo Agendamento - Maria Silva para Ensaio Gestante em 20/06/2025 às 14:00"
-        },
-        "pagamento_aprovado": {
-            "name": "Pagamento Aprovado",
-            "description": "Notificação para pagamentos aprovados",
-            "variables": ["cliente_nome", "valor", "plano_nome"],
-            "example": "Pagamento Aprovado - R$ 850,00 de Ana Santos para Ensaio Newborn"
-        },
-        "ensaio_lembrete": {
-            "name": "Lembrete de Ensaio",
-            "description": "Lembrete de ensaio próximo",
-            "variables": ["cliente_nome", "tipo_ensaio", "data_ensaio", "hora_ensaio"],
-            "example": "Lembrete: Ensaio Gestante com Maria Silva amanhã às 14:00"
-        },
-        "whatsapp_mensagem": {
-            "name": "Nova Mensagem WhatsApp",
-            "description": "Notificação para novas mensagens",
-            "variables": ["cliente_nome", "preview_mensagem"],
-            "example": "Nova Mensagem de João Silva: Olá, gostaria de agendar..."
-        }
-    }
+    if not_modified(TEMPLATES_ETAG):
+        return not_modified_response(TEMPLATES_ETAG)
     
-    return jsonify({
-        "success": True,
-        "templates": templates
-    })
+    # Payload estático serializado uma única vez na carga do módulo
+    response = current_app.response_class(TEMPLATES_BODY, mimetype='application/json')
+    response.set_etag(TEMPLATES_ETAG)
+    return response
 
 @notifications_bp.route('/notifications/send-test', methods=['POST'])
 def send_test_notification():
     """Envia notificação de teste"""
     data = request.get_json()
     
-    test_notification = {
-        "id": f"test_{datetime.now().timestamp()}",
-        "user_id": data.get('user_id', 'admin'),
-        "title": "Notificação de Teste",
-        "message": "Esta é uma notificação de teste do sistema ERP Jéssica Santos",
-        "type": "sistema",
-        "priority": "media",
-        "status": "enviada",
-        "icon": "/icons/test-icon.png",
-        "action_url": "/dashboard",
-        "created_at": datetime.now().isoformat()
-    }
+    test_id = id_generator.next_id('test')
+    test_notification = NotificationRecord(
+        id=test_id,
+        user_id=data.get('user_id', 'admin'),
+        title="Notificação de Teste",
+        message="Esta é uma notificação de teste do sistema ERP Jéssica Santos",
+        type=NotificationType.SISTEMA,
+        priority=NotificationPriority.MEDIA,
+        status=NotificationStatus.ENVIADA,
+        icon="/icons/test-icon.png",
+        action_url="/dashboard",
+        created_at=timestamp_ms(test_id)
+    )
     
-    notifications_db.append(test_notification)
+    notification_store.insert(test_notification)
     
     return jsonify({
         "success": True,
-        "notification": test_notification,
+        "notification": test_notification.to_dict(),
         "message": "Notificação de teste enviada"
     })
 
 @notifications_bp.route('/notifications/stats', methods=['GET'])
 def get_notification_stats():
-    """Busca estatísticas de notificações"""
+    """Busca estatísticas de notificações
+
+    Aceita `fields=` com as seções desejadas (STATS_FIELDS) e `format=compact`,
+    que retorna contagens em colunas e a série diária como array denso.
+    """
     user_id = request.args.get('user_id', 'admin')
-    days = int(request.args.get('days', 7))
-    
-    # Filtrar notificações dos últimos X dias
-    cutoff_date = datetime.now() - timedelta(days=days)
-    recent_notifications = [
-        n for n in notifications_db 
-        if (n.get('user_id') == user_id and 
-            datetime.fromisoformat(n['created_at']) > cutoff_date)
-    ]
     
-    stats = {
-        "total": len(recent_notifications),
-        "by_type": {},
-        "by_status": {},
-        "by_priority": {},
-        "daily_count": {}
-    }
+    try:
+        days = parse_days(request.args.get('days', '7'))
+        fields = parse_fields(request.args.get('fields'), STATS_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 400
     
-    # Contar por tipo, status e prioridade
-    for notification in recent_notifications:
-        # Por tipo
-        tipo = notification.get('type', 'sistema')
-        stats["by_type"][tipo] = stats["by_type"].get(tipo, 0) + 1
-        
-        # Por status
-        status = notification.get('status', 'pendente')
-        stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
-        
-        # Por prioridade
-        priority = notification.get('priority', 'media')
-        stats["by_priority"][priority] = stats["by_priority"].get(priority, 0) + 1
-        
-        # Por dia
-        day = datetime.fromisoformat(notification['created_at']).strftime('%Y-%m-%d')
-        stats["daily_count"][day] = stats["daily_count"].get(day, 0) + 1
+    # Soma apenas os buckets diários já agregados pelos rollups
+    stats = notification_rollups.stats(user_id, days)
+    if request.args.get('format') == 'compact':
+        stats = compact_stats(stats, days)
     
-    return jsonify({
+    return json_response({
         "success": True,
-        "stats": stats,
+        "stats": {field: stats[field] for field in fields},
         "period_days": days
     })
 
+def query_variant():
+    """Forma canônica dos parâmetros da consulta, usada na ETag"""
+    return '&'.join(sorted(f"{key}={value}" for key, value in request.args.items(multi=True)))
+
+def not_modified(etag):
+    """True se o cliente já tem a representação identificada pela ETag"""
+    return request.if_none_match.contains_weak(etag)
+
+def not_modified_response(etag):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+def select_by_filter(user_id, filters):
+    """Notificações do usuário que atendem ao filtro do bulk (ValueError se inválido)"""
+    status = NotificationStatus(filters['status']) if filters.get('status') else None
+    notification_type = NotificationType(filters['type']) if filters.get('type') else None
+    priority = NotificationPriority(filters['priority']) if filters.get('priority') else None
+    created_before = to_epoch_ms(filters.get('created_before'))
+    
+    predicate = None
+    if notification_type or priority:
+        predicate = lambda n: ((notification_type is None or n.type == notification_type)
+                               and (priority is None or n.priority == priority))
+    return notification_store.select_for_user(user_id, status, created_before, predicate)
+
+def parse_days(raw):
+    """Janela de `?days=` entre 1 e MAX_STATS_DAYS; ValueError caso contrário"""
+    try:
+        days = int(raw)
+    except ValueError:
+        raise ValueError(f"days deve ser um inteiro: {raw!r}")
+    if not 1 <= days <= MAX_STATS_DAYS:
+        raise ValueError(f"days deve estar entre 1 e {MAX_STATS_DAYS}")
+    return days
+
+def parse_fields(raw, allowed):
+    """Lista de campos de `?fields=` (todos se ausente); ValueError se houver campo desconhecido"""
+    if not raw:
+        return allowed
+    fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown or not fields:
+        raise ValueError(f"Campos inválidos: {', '.join(unknown)}" if unknown else "Nenhum campo informado")
+    return fields
+
+def compact_stats(stats, days):
+    """Estatísticas em colunas: {keys, counts} e série diária densa a partir de `start`"""
+    start = datetime.now().date() - timedelta(days=days - 1)
+    compact = {"total": stats["total"]}
+    for section in ("by_type", "by_status", "by_priority"):
+        compact[section] = {"keys": list(stats[section]), "counts": list(stats[section].values())}
+    daily = stats["daily_count"]
+    compact["daily_count"] = {
+        "start": start.isoformat(),
+        "counts": [daily.get((start + timedelta(days=offset)).isoformat(), 0) for offset in range(days)]
+    }
+    return compact
+
+def json_response(payload):
+    """Resposta JSON serializada com dumps_json (orjson quando instalado)"""
+    return current_app.response_class(dumps_json(payload), mimetype='application/json')
+
+def json_list_response(key, fragments, envelope):
+    """Resposta JSON com a lista `key` montada a partir de fragmentos já serializados"""
+    body = b'{"%s":[%s],%s' % (key.encode('ascii'), b','.join(fragments), dumps_json(envelope)[1:])
+    return current_app.response_class(body, mimetype='application/json')
+
+def encode_cursor(key):
+    """Codifica a chave (created_at, id) do último item em um token opaco"""
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Decodifica um cursor; retorna None se o token for inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, notification_id = json.loads(raw)
+        return (int(created_at), str(notification_id))
+    except (ValueError, TypeError):
+        return None
+
+def build_notification(data):
+    """Cria um NotificationRecord a partir do JSON da API (ValueError se inválido)
+
+    O created_at é o instante embutido no ID, então a ordem (created_at, id)
+    dos índices coincide com a ordem dos próprios IDs.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("o corpo deve ser um objeto JSON")
+    extra = data.get('data') or {}
+    if not isinstance(extra, dict):
+        raise ValueError("data deve ser um objeto JSON")
+    fields = {
+        name: text_field(data, name, default)
+        for name, default in (('user_id', 'admin'), ('title', ''), ('message', ''), ('action_url', ''),
+                              ('icon', '/icons/default.png'), ('image_url', ''))
+    }
+    scheduled_at = to_epoch_ms(data.get('scheduled_at'))
+    
+    notification_id = id_generator.next_id('notif')
+    return NotificationRecord(
+        id=notification_id,
+        type=NotificationType(data.get('type', 'sistema')),
+        priority=NotificationPriority(data.get('priority', 'media')),
+        status=NotificationStatus.PENDENTE,
+        data=extra,
+        scheduled_at=scheduled_at,
+        created_at=timestamp_ms(notification_id),
+        **fields
+    )
+
+def text_field(data, name, default):
+    """Campo de texto do JSON da API (ValueError se não for string)"""
+    value = data.get(name, default)
+    if not isinstance(value, str):
+        raise ValueError(f"{name} deve ser texto")
+    return value
+
+def ingest_chunk(chunk, results):
+    """Insere um bloco do lote e faz uma única entrega à fila; retorna quantos entraram"""
+    if not chunk:
+        return 0
+    
+    notification_store.insert_many([notification for _, notification in chunk])
+    
+    immediate = []
+    for _, notification in chunk:
+        if notification.scheduled_at:
+            schedule_notification(notification)
+        else:
+            immediate.append(notification)
+    
+    rejected = {notification.id for notification in dispatch_many(immediate)}
+    for notification_id in rejected:
+        notification_store.remove(notification_id)
+    
+    for index, notification in chunk:
+        if notification.id in rejected:
+            results.append({
+                "index": index,
+                "success": False,
+                "message": "Fila de envio cheia, tente novamente em instantes"
+            })
+        else:
+            results.append({"index": index, "success": True, "id": notification.id})
+    return len(chunk) - len(rejected)
+
+def schedule_notification(notification):
+    """Agenda o despacho de uma notificação para o seu scheduled_at
+
+    Com vários workers apenas o líder mantém os timers; ele recebe as
+    notificações agendadas nos outros processos pelo change_feed.
+    """
+    if not is_leader():
+        return
+    notification_id = notification.id
+    notification_scheduler.schedule(
+        notification_id, notification.scheduled_at,
+        lambda: dispatch_scheduled(notification_id)
+    )
+
+def dispatch_scheduled(notification_id):
+    """Callback do scheduler: envia a notificação vencida para a fila de entrega"""
+    notification = notification_store.get(notification_id)
+    if not awaiting_delivery(notification):
+        return
+    if not dispatch_notification(notification):
+        # Fila cheia: tenta novamente em 1 segundo
+        notification_scheduler.schedule(
+            notification_id, now_ms() + 1000,
+            lambda: dispatch_scheduled(notification_id)
+        )
+
+def awaiting_delivery(notification):
+    """Pendente e nunca enviada (pendente também significa "não lida" após o bulk unread)"""
+    return (notification is not None and notification.status == NotificationStatus.PENDENTE
+            and notification.sent_at is None)
+
+def dispatch_notification(notification):
+    """Aplica as preferências do usuário antes de entregar
+
+    Retorna False apenas quando a fila de entrega está cheia.
+    """
+    return not dispatch_many([notification])
+
+def dispatch_many(notifications):
+    """Decide entregar, adiar (horário de silêncio) ou descartar cada notificação
+
+    As entregáveis vão para a fila em uma única entrada; retorna as que não
+    couberam. Descartadas (tipo ou canal desativado) ficam apenas no app.
+    Adiadas passam a ter o fim do horário de silêncio como scheduled_at, que é
+    persistido e reagendado pelo líder (inclusive após um restart).
+    """
+    deliverable = []
+    for notification in notifications:
+        action, release_at = preference_cache.policy(notification.user_id).decide(
+            notification.type, notification.priority
+        )
+        if action == DELIVER:
+            if not coalescer.offer(notification):
+                deliverable.append(notification)
+        elif action == DEFER:
+            notification_store.update_fields(notification.id, scheduled_at=release_at, updated_at=now_ms())
+            schedule_notification(notification)
+    
+    if delivery_pool.submit_many(deliverable):
+        return []
+    return deliverable
+
+def deactivate_subscription(endpoint):
+    """Desativa um endpoint que o serviço de push informou como inexistente"""
+    subscription = subscription_registry.deactivate(endpoint)
+    if subscription is not None:
+        notification_repository.save_subscription(subscription)
+
+push_sender = PushFanoutSender(
+    on_gone=deactivate_subscription,
+    vapid_private_key=os.environ.get('VAPID_PRIVATE_KEY'),
+    vapid_claims={"sub": "mailto:jessica@jessicasantos.com"}
+)
+
+def build_push_payload(notification):
+    """Monta o payload JSON entregue ao service worker"""
+    return json.dumps({
+        "title": notification.title,
+        "body": notification.message,
+        "icon": notification.icon,
+        "image": notification.image_url,
+        "data": {
+            "id": notification.id,
+            "url": notification.action_url,
+            "type": notification.type.value,
+            "priority": notification.priority.value
+        }
+    }).encode('utf-8')
+
+def flush_digest(group):
+    """Fim da janela do coalescer: entrega as retidas que ainda estão pendentes"""
+    live = [
+        n for n in group
+        if notification_store.get(n.id) is n and awaiting_delivery(n)
+    ]
+    if not live:
+        return
+    submitted = delivery_pool.submit(live[0]) if len(live) == 1 else delivery_pool.submit_digest(live)
+    if not submitted:
+        # Fila cheia: tenta novamente em 1 segundo
+        digest_windows.schedule(
+            f"digest-retry:{live[0].id}", now_ms() + 1000, lambda: flush_digest(live)
+        )
+
+def build_digest_payload(notifications):
+    """Payload de um push que resume várias notificações do mesmo tipo"""
+    latest = notifications[-1]
+    return json.dumps({
+        "title": f"{len(notifications)} {DIGEST_TITLES[latest.type]}",
+        "body": "; ".join(n.title for n in reversed(notifications[-3:])),
+        "icon": latest.icon,
+        "tag": f"digest-{latest.type.value}",
+        "data": {
+            "ids": [n.id for n in notifications],
+            "count": len(notifications),
+            "url": latest.action_url,
+            "type": latest.type.value,
+            "priority": latest.priority.value,
+            "digest": True
+        }
+    }).encode('utf-8')
+
+def send_push_digest(notifications):
+    """Envia um único push de resumo para o grupo (mesmo usuário e tipo)"""
+    subscriptions = subscription_registry.active_for_user(notifications[0].user_id)
+    if not subscriptions:
+        return True
+    
+    results = push_sender.send(subscriptions, build_digest_payload(notifications))
+    return results["success"] > 0 or results["failed"] == 0
+
 def send_push_notification(notification):
-    """Função auxiliar para enviar push notification"""
-    # Em produção, aqui seria implementado o envio real
-    # usando bibliotecas como pywebpush
-    print(f"Enviando push notification: {notification['title']}")
-    notification["status"] = "enviada"
-    notification["sent_at"] = datetime.now().isoformat()
-    return True
+    """Função auxiliar para enviar push notification
+
+    Executada pelas threads do delivery_pool; o pool atualiza o status para
+    `enviada`/`falhada` conforme o retorno. Sem subscriptions ativas a
+    notificação fica apenas no app e é considerada entregue.
+    """
+    subscriptions = subscription_registry.active_for_user(notification.user_id)
+    if not subscriptions:
+        return True
+    
+    results = push_sender.send(subscriptions, build_push_payload(notification))
+    return results["success"] > 0 or results["failed"] == 0
 
 # Dados de exemplo para demonstração
 def init_sample_data():
@@ -341,8 +988,83 @@ def init_sample_data():
         }
     ]
     
-    notifications_db.extend(sample_notifications)
+    notification_store.insert_many(
+        [NotificationRecord.from_dict(notification) for notification in sample_notifications]
+    )
+
+def is_leader():
+    """Processo único ou líder entre os workers"""
+    return leader_lock is None or leader_lock.is_leader
+
+def start_leader_tasks():
+    """Reagenda as pendentes (agendadas ou adiadas) e inicia a retenção (apenas no líder)"""
+    for user_id in notification_store.user_ids():
+        for notification in notification_store.list_for_user(user_id, NotificationStatus.PENDENTE):
+            if notification.scheduled_at and awaiting_delivery(notification):
+                schedule_notification(notification)
+    
+    retention_sweeper.start()
+
+# Mudanças aplicadas a partir de outros workers
+
+def apply_remote_notification(notification_id, notification):
+    if not is_leader():
+        return
+    if not awaiting_delivery(notification):
+        notification_scheduler.cancel(notification_id)
+    elif (notification.scheduled_at
+            and notification_scheduler.due_at(notification_id) != notification.scheduled_at):
+        schedule_notification(notification)
+
+def apply_remote_delete(notification_id, notification):
+    notification_scheduler.cancel(notification_id)
+
+def apply_remote_subscription(subscription_id, subscription):
+    subscription_registry.apply(subscription)
+
+def apply_remote_config(user_id, config):
+    configs_db[user_id] = config
+    preference_cache.invalidate(user_id)
+    resource_versions.bump(ResourceVersions.CONFIG, user_id)
+
+def load_state():
+    """Carrega o estado persistido; na primeira execução usa os dados de exemplo"""
+    global change_feed
+    
+    # Mudanças feitas por outros workers durante a carga são reaplicadas depois
+    last_seq = notification_repository.last_change_seq() if shared_state else 0
+    notification_store.insert_many(list(notification_repository.load_notifications()))
+    subscription_registry.load(notification_repository.load_subscriptions())
+    configs_db.update(notification_repository.load_configs())
+    
+    # A partir daqui toda mutação do store é gravada pelo repositório
+    notification_store.add_listener(notification_repository)
+    
+    if shared_state:
+        notification_repository.change_origin = id_generator.next_id('worker')
+        notification_store.origin = notification_repository.change_origin
+        leader_lock.try_acquire()
+    
+    if not len(notification_store) and is_leader():
+        init_sample_data()
+    
+    if is_leader():
+        start_leader_tasks()
+    
+    if shared_state:
+        change_feed = SQLiteChangeFeed(
+            notification_repository, notification_store,
+            handlers={
+                "notification": apply_remote_notification,
+                "notification_delete": apply_remote_delete,
+                "subscription": apply_remote_subscription,
+                "config": apply_remote_config
+            },
+            leader_lock=leader_lock,
+            on_leader=start_leader_tasks
+        )
+        change_feed.start(last_seq)
 
-# Inicializar dados de exemplo
-init_sample_data()
+# Inicializar estado
+load_state()
 
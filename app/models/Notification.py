@@ -1,7 +1,15 @@
 # 🔔 Sistema de Notificações Push - Backend Models
 
+import json
+import time
 from datetime import datetime
 from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional: sem ela usa o json da biblioteca padrão
+    orjson = None
 
 class NotificationType(Enum):
     AGENDAMENTO = "agendamento"
@@ -42,6 +50,184 @@ class Notification:
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
 
+def now_ms() -> int:
+    """Timestamp atual em milissegundos desde a epoch"""
+    return time.time_ns() // 1_000_000
+
+def to_epoch_ms(value: Union[None, int, float, str, datetime]) -> Optional[int]:
+    """Converte isoformat/datetime/número em milissegundos desde a epoch
+
+    Qualquer outro tipo, ou um instante fora do intervalo representável,
+    gera ValueError.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            # Confere se o instante pode ser exibido depois (from_epoch_ms)
+            datetime.fromtimestamp(value / 1000)
+            return int(value)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"timestamp fora do intervalo: {value!r}")
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        raise ValueError(f"data inválida: {value!r}")
+    return int(value.timestamp() * 1000)
+
+def dumps_json(value: Any) -> bytes:
+    """Serializa em JSON compacto UTF-8 (orjson quando instalado)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except orjson.JSONEncodeError:
+            # orjson recusa o que o json aceita (inteiros acima de 64 bits, chaves não-texto)
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def from_epoch_ms(value: Optional[int]) -> Optional[str]:
+    """Converte milissegundos desde a epoch em isoformat (horário local)"""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1000).isoformat()
+
+class NotificationRecord:
+    """Registro compacto de notificação usado pelo store em memória
+
+    Usa __slots__, enums para tipo/prioridade/status e timestamps inteiros em
+    milissegundos; a conversão para JSON acontece apenas na resposta (to_dict).
+    Os bytes JSON ficam em cache (to_json) marcados com a versão do registro,
+    que o store incrementa a cada mutação. `revision` e `origin` (processo que
+    fez a última mudança) ordenam as mudanças entre workers (ver notification_state).
+    """
+
+    __slots__ = (
+        "id", "user_id", "title", "message", "type", "priority", "status",
+        "data", "action_url", "icon", "image_url",
+        "scheduled_at", "sent_at", "read_at", "created_at", "updated_at",
+        "revision", "origin", "_json", "_version"
+    )
+
+    def __init__(self, id: str, user_id: str, title: str = "", message: str = "",
+                 type: NotificationType = NotificationType.SISTEMA,
+                 priority: NotificationPriority = NotificationPriority.MEDIA,
+                 status: NotificationStatus = NotificationStatus.PENDENTE,
+                 data: Optional[Dict] = None, action_url: str = "", icon: str = "",
+                 image_url: str = "", scheduled_at: Optional[int] = None,
+                 sent_at: Optional[int] = None, read_at: Optional[int] = None,
+                 created_at: Optional[int] = None, updated_at: Optional[int] = None,
+                 revision: int = 0, origin: str = ""):
+        self.id = id
+        self.user_id = user_id
+        self.title = title
+        self.message = message
+        self.type = type
+        self.priority = priority
+        self.status = status
+        # Dicionário vazio não é alocado por registro
+        self.data = data or None
+        self.action_url = action_url
+        self.icon = icon
+        self.image_url = image_url
+        self.scheduled_at = scheduled_at
+        self.sent_at = sent_at
+        self.read_at = read_at
+        self.created_at = created_at if created_at is not None else now_ms()
+        self.updated_at = updated_at if updated_at is not None else self.created_at
+        self.revision = revision
+        self.origin = origin
+        self._json: Optional[Tuple[int, bytes]] = None
+        self._version = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NotificationRecord":
+        """Cria um registro a partir do formato JSON da API (ValueError se inválido)"""
+        return cls(
+            id=data["id"],
+            user_id=data.get("user_id", "admin"),
+            title=data.get("title", ""),
+            message=data.get("message", ""),
+            type=NotificationType(data.get("type") or "sistema"),
+            priority=NotificationPriority(data.get("priority") or "media"),
+            status=NotificationStatus(data.get("status") or "pendente"),
+            data=data.get("data"),
+            action_url=data.get("action_url", ""),
+            icon=data.get("icon", ""),
+            image_url=data.get("image_url", ""),
+            scheduled_at=to_epoch_ms(data.get("scheduled_at")),
+            sent_at=to_epoch_ms(data.get("sent_at")),
+            read_at=to_epoch_ms(data.get("read_at")),
+            created_at=to_epoch_ms(data.get("created_at")),
+            updated_at=to_epoch_ms(data.get("updated_at"))
+        )
+
+    def to_dict(self) -> Dict:
+        """Converte o registro para o formato JSON da API"""
+        result = {
+            "id": self.id,
+            "user_id": self.user_id,
+            "title": self.title,
+            "message": self.message,
+            "type": self.type.value,
+            "priority": self.priority.value,
+            "status": self.status.value,
+            "data": self.data or {},
+            "action_url": self.action_url,
+            "icon": self.icon,
+            "image_url": self.image_url,
+            "scheduled_at": from_epoch_ms(self.scheduled_at),
+            "created_at": from_epoch_ms(self.created_at),
+            "updated_at": from_epoch_ms(self.updated_at)
+        }
+        if self.sent_at is not None:
+            result["sent_at"] = from_epoch_ms(self.sent_at)
+        if self.read_at is not None:
+            result["read_at"] = from_epoch_ms(self.read_at)
+        return result
+
+    def project(self, fields: List[str]) -> List:
+        """Valores dos campos pedidos, na ordem de `fields` (ver FIELD_NAMES)"""
+        return [_FIELD_GETTERS[field](self) for field in fields]
+
+    def to_json(self) -> bytes:
+        """to_dict() serializado, calculado uma vez por versão do registro
+
+        Roda fora do lock do store: se o registro mudar durante a serialização,
+        o resultado fica marcado com a versão antiga e não é reaproveitado.
+        """
+        cached = self._json
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        version = self._version
+        encoded = dumps_json(self.to_dict())
+        self._json = (version, encoded)
+        return encoded
+
+    def invalidate(self) -> None:
+        """Marca o JSON em cache como obsoleto (chamado pelo store a cada mutação)"""
+        self._version += 1
+
+# Campos da API na ordem de to_dict(), para projeção (?fields=)
+_FIELD_GETTERS: Dict[str, Callable[[NotificationRecord], Any]] = {
+    "id": lambda n: n.id,
+    "user_id": lambda n: n.user_id,
+    "title": lambda n: n.title,
+    "message": lambda n: n.message,
+    "type": lambda n: n.type.value,
+    "priority": lambda n: n.priority.value,
+    "status": lambda n: n.status.value,
+    "data": lambda n: n.data or {},
+    "action_url": lambda n: n.action_url,
+    "icon": lambda n: n.icon,
+    "image_url": lambda n: n.image_url,
+    "scheduled_at": lambda n: from_epoch_ms(n.scheduled_at),
+    "created_at": lambda n: from_epoch_ms(n.created_at),
+    "updated_at": lambda n: from_epoch_ms(n.updated_at),
+    "sent_at": lambda n: from_epoch_ms(n.sent_at),
+    "read_at": lambda n: from_epoch_ms(n.read_at)
+}
+FIELD_NAMES = tuple(_FIELD_GETTERS)
+
 class NotificationTemplate:
     def __init__(self):
         self.id = None
@@ -1,14 +1,213 @@
 # 📧 Serviço de Email Marketing
 
+import atexit
 import json
+import re
 import requests
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Dict, Optional, Union
 import smtplib
+from string import Formatter
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
+from email.header import Header
+from email.utils import formataddr, formatdate, make_msgid, parsedate_to_datetime
+from email import encoders, quoprimime
+
+class TokenBucket:
+    """Limitador de taxa: `rate` envios por segundo com rajadas de até `capacity`"""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Bloqueia até haver um token disponível"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class PooledSMTPConnection:
+    """Sessão SMTP autenticada e quantas mensagens ela já enviou"""
+    
+    __slots__ = ("smtp", "sent", "last_used")
+    
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+class SMTPConnectionPool:
+    """Pool de sessões SMTP reutilizadas entre mensagens
+    
+    Cada sessão paga conexão, STARTTLS e login uma única vez e envia até
+    `max_messages_per_connection` mensagens (limite comum dos servidores).
+    Recusa de destinatário mantém a sessão (RSET); queda da conexão ou código
+    4xx do servidor descarta a sessão e a mensagem é reenviada em uma nova.
+    No máximo `max_connections` sessões ficam em uso ao mesmo tempo (`resize`).
+    """
+    
+    # Respostas que indicam sessão esgotada/encerrada pelo servidor
+    RECONNECT_CODES = (421, 451, 452, 454)
+    
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = True, max_connections: int = 4, max_messages_per_connection: int = 200,
+                 idle_timeout: float = 60.0, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        
+        self.max_connections = max_connections
+        self._idle: List[PooledSMTPConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.Condition()
+        self._in_use = 0
+        self.connections_opened = 0
+        atexit.register(self.close)
+    
+    def send(self, msg: MIMEMultipart) -> bool:
+        """Envia a mensagem por uma sessão do pool (reconecta uma vez se preciso)"""
+        return self._send(lambda smtp: smtp.send_message(msg))
+    
+    def send_raw(self, from_addr: str, to_addrs: List[str],
+                 data: Union[bytes, Callable[[bool], bytes]]) -> bool:
+        """Envia uma mensagem já serializada
+        
+        `data` pode ser uma função que recebe se o servidor anuncia 8BITMIME e
+        devolve os bytes adequados (ex.: CampaignMessage.build); bytes prontos
+        são enviados como estão.
+        """
+        def operation(smtp: smtplib.SMTP) -> None:
+            smtp.ehlo_or_helo_if_needed()
+            eight_bit = smtp.has_extn("8bitmime")
+            options = ("BODY=8BITMIME",) if eight_bit else ()
+            payload = data(eight_bit) if callable(data) else data
+            smtp.sendmail(from_addr, to_addrs, payload, mail_options=options)
+        return self._send(operation)
+    
+    def resize(self, max_connections: int) -> None:
+        """Altera quantas sessões podem estar em uso ao mesmo tempo"""
+        with self._slots:
+            self.max_connections = max_connections
+            self._slots.notify_all()
+    
+    def _send(self, operation: Callable[[smtplib.SMTP], None]) -> bool:
+        with self._slot():
+            connection = self._acquire()
+            for attempt in range(2):
+                try:
+                    operation(connection.smtp)
+                    connection.sent += 1
+                    self._release(connection)
+                    return True
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Problema do destinatário, não da sessão
+                    print(f"Destinatário recusado: {e.recipients}")
+                    self._reset(connection)
+                    return False
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code not in self.RECONNECT_CODES or attempt:
+                        print(f"Erro SMTP {e.smtp_code}: {e.smtp_error}")
+                        self._reset(connection)
+                        return False
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    if attempt:
+                        self._discard(connection)
+                        raise
+                # Sessão encerrada ou no limite do servidor: descarta e tenta em outra
+                self._discard(connection)
+                connection = self._connect()
+        return False
+    
+    @contextmanager
+    def _slot(self):
+        with self._slots:
+            while self._in_use >= self.max_connections:
+                self._slots.wait()
+            self._in_use += 1
+        try:
+            yield
+        finally:
+            with self._slots:
+                self._in_use -= 1
+                self._slots.notify()
+    
+    def close(self) -> None:
+        """Encerra todas as sessões ociosas"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+    
+    def _acquire(self) -> PooledSMTPConnection:
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                connection = self._idle.pop()
+                if now - connection.last_used < self.idle_timeout:
+                    return connection
+                self._discard(connection)
+        return self._connect()
+    
+    def _release(self, connection: PooledSMTPConnection) -> None:
+        if connection.sent >= self.max_messages_per_connection:
+            self._discard(connection)
+            return
+        connection.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(connection)
+    
+    def _reset(self, connection: PooledSMTPConnection) -> None:
+        try:
+            connection.smtp.rset()
+        except (smtplib.SMTPException, OSError):
+            self._discard(connection)
+            return
+        self._release(connection)
+    
+    def _connect(self) -> PooledSMTPConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connections_opened += 1
+        return PooledSMTPConnection(smtp)
+    
+    @staticmethod
+    def _discard(connection: PooledSMTPConnection) -> None:
+        try:
+            connection.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.smtp.close()
+
+# Limite de personalizations (destinatários) por requisição da API v3 do SendGrid
+SENDGRID_MAX_PERSONALIZATIONS = 1000
 
 class EmailService:
     def __init__(self):
@@ -20,8 +219,30 @@ class EmailService:
         
         # Configurações de APIs externas
         self.sendgrid_api_key = "SG.your_sendgrid_api_key"
+        self.sendgrid_url = "https://api.sendgrid.com/v3/mail/send"
+        self.sendgrid_max_retries = 3
         self.mailchimp_api_key = "your_mailchimp_api_key"
         
+        # Envios em massa: paralelismo e limite por segundo por provedor
+        # (SMTP: mensagens; SendGrid: chamadas da API, cada uma com até 1000 destinatários)
+        self.bulk_concurrency = 4
+        self.rate_limiters = {
+            "smtp": TokenBucket(rate=20),
+            "sendgrid": TokenBucket(rate=100)
+        }
+        
+        # Sessões SMTP reaproveitadas entre envios (handshake + login uma vez por sessão)
+        self.smtp_pool = SMTPConnectionPool(
+            self.smtp_server, self.smtp_port, self.smtp_username, self.smtp_password,
+            max_connections=self.bulk_concurrency
+        )
+        
+        # Sessão HTTP keep-alive para as APIs (uma conexão TLS reaproveitada)
+        self.http = requests.Session()
+        self._capacity = 0
+        self._capacity_lock = threading.Lock()
+        self._ensure_capacity(self.bulk_concurrency)
+        
     def send_email_smtp(self, to_email: str, subject: str, html_content: str, text_content: str = "") -> bool:
         """Envia email via SMTP"""
         try:
@@ -38,14 +259,8 @@ class EmailService:
             part2 = MIMEText(html_content, 'html')
             msg.attach(part2)
             
-            # Conectar e enviar
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_username, self.smtp_password)
-            server.send_message(msg)
-            server.quit()
-            
-            return True
+            # Enviar por uma sessão já autenticada do pool
+            return self.smtp_pool.send(msg)
         except Exception as e:
             print(f"Erro ao enviar email: {e}")
             return False
@@ -53,12 +268,6 @@ class EmailService:
     def send_email_sendgrid(self, to_email: str, subject: str, html_content: str) -> bool:
         """Envia email via SendGrid API"""
         try:
-            url = "https://api.sendgrid.com/v3/mail/send"
-            headers = {
-                "Authorization": f"Bearer {self.sendgrid_api_key}",
-                "Content-Type": "application/json"
-            }
-            
             data = {
                 "personalizations": [{
                     "to": [{"email": to_email}],
@@ -71,32 +280,432 @@ class EmailService:
                 }]
             }
             
-            response = requests.post(url, headers=headers, json=data)
+            response = self.http.post(self.sendgrid_url, headers=self._sendgrid_headers(), json=data)
             return response.status_code == 202
         except Exception as e:
             print(f"Erro SendGrid: {e}")
             return False
     
-    def send_bulk_email(self, recipients: List[str], subject: str, html_content: str) -> Dict:
-        """Envia email em massa"""
+    def send_bulk_sendgrid(self, recipients: List[str], subject: str, html_content: str,
+                           substitutions: Optional[Dict[str, Dict[str, str]]] = None,
+                           concurrency: Optional[int] = None,
+                           on_progress: Optional[Callable[[int, int, Dict], None]] = None) -> Dict:
+        """Envia em lotes de até SENDGRID_MAX_PERSONALIZATIONS destinatários por chamada
+        
+        `substitutions` mapeia email -> {tag: valor}; cada tag presente no assunto
+        ou no HTML (ex.: "-nome-") é trocada pelo valor daquele destinatário.
+        Até `concurrency` lotes são enviados ao mesmo tempo. Lotes com 429/5xx são
+        reenviados com backoff; em um 400, os destinatários apontados pelo
+        SendGrid contam como falha e o restante é reenviado.
+        """
         results = {
             "success": 0,
             "failed": 0,
             "errors": []
         }
+        substitutions = substitutions or {}
+        total = len(recipients)
+        batches = [recipients[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+                   for start in range(0, total, SENDGRID_MAX_PERSONALIZATIONS)]
+        lock = threading.Lock()
+        progress = [0]
         
-        for email in recipients:
-            if self.send_email_smtp(email, subject, html_content):
-                results["success"] += 1
-            else:
-                results["failed"] += 1
-                results["errors"].append(email)
+        def deliver(batch: List[str]) -> List[str]:
+            failed = self._send_sendgrid_batch(batch, subject, html_content, substitutions)
+            with lock:
+                results["success"] += len(batch) - len(failed)
+                results["failed"] += len(failed)
+                progress[0] += len(batch)
+                if on_progress:
+                    on_progress(progress[0], total, results)
+            return failed
+        
+        concurrency = concurrency or self.bulk_concurrency
+        self._ensure_capacity(concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for failed in executor.map(deliver, batches):
+                results["errors"].extend(failed)
         
         return results
+    
+    def _send_sendgrid_batch(self, batch: List[str], subject: str, html_content: str,
+                             substitutions: Dict[str, Dict[str, str]]) -> List[str]:
+        """Envia um lote (com reenvios) e devolve os destinatários que falharam"""
+        limiter = self.rate_limiters["sendgrid"]
+        failed = []
+        for attempt in range(self.sendgrid_max_retries):
+            limiter.acquire()
+            try:
+                response = self.http.post(
+                    self.sendgrid_url, headers=self._sendgrid_headers(),
+                    json=self._sendgrid_batch(batch, subject, html_content, substitutions),
+                    timeout=30
+                )
+            except requests.RequestException as e:
+                print(f"Erro SendGrid: {e}")
+                time.sleep(2 ** attempt)
+                continue
+            
+            if response.status_code == 202:
+                return failed
+            if response.status_code == 400:
+                rejected = _sendgrid_rejected_indexes(response)
+                if not rejected:
+                    break
+                # Destinatários inválidos saem do lote; os demais são reenviados
+                failed.extend(batch[index] for index in sorted(rejected))
+                batch = [email for index, email in enumerate(batch) if index not in rejected]
+                if not batch:
+                    return failed
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                time.sleep(_retry_after(response, attempt))
+                continue
+            print(f"Erro SendGrid {response.status_code}: {response.text[:200]}")
+            break
+        
+        return failed + batch
+    
+    def _sendgrid_headers(self) -> Dict:
+        return {
+            "Authorization": f"Bearer {self.sendgrid_api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def _sendgrid_batch(self, batch: List[str], subject: str, html_content: str,
+                        substitutions: Dict[str, Dict[str, str]]) -> Dict:
+        personalizations = []
+        for email in batch:
+            personalization = {"to": [{"email": email}]}
+            if email in substitutions:
+                personalization["substitutions"] = substitutions[email]
+            personalizations.append(personalization)
+        return {
+            "personalizations": personalizations,
+            "subject": subject,
+            "from": {"email": self.smtp_username, "name": "Jéssica Santos"},
+            "content": [{
+                "type": "text/html",
+                "value": html_content
+            }]
+        }
+    
+    def send_bulk_email(self, recipients: List[str], subject: str, html_content: str,
+                        provider: str = "smtp", concurrency: Optional[int] = None,
+                        on_progress: Optional[Callable[[int, int, Dict], None]] = None) -> Dict:
+        """Envia email em massa
+        
+        Os envios rodam em paralelo (`concurrency` threads) respeitando o limite
+        de taxa do provedor ("smtp" ou "sendgrid"); `on_progress(enviados, total,
+        resultados)` é chamado a cada mensagem concluída.
+        """
+        if provider == "sendgrid":
+            # Um destinatário por personalization, vários por chamada da API
+            return self.send_bulk_sendgrid(recipients, subject, html_content,
+                                           concurrency=concurrency, on_progress=on_progress)
+        
+        return self._run_bulk(
+            recipients, lambda email: self.send_email_smtp(email, subject, html_content),
+            self.rate_limiters[provider], concurrency, on_progress
+        )
+    
+    def send_campaign(self, recipients: List[Dict], subject: str, html_content: str,
+                      text_content: str = "", shared: Optional[Dict] = None,
+                      concurrency: Optional[int] = None,
+                      on_progress: Optional[Callable[[int, int, Dict], None]] = None) -> Dict:
+        """Envia uma campanha personalizada por SMTP
+        
+        `recipients` é uma lista de {"email", "variables"}; assunto e HTML são
+        templates ({nome}). A mensagem é montada uma vez (CampaignMessage) e cada
+        destinatário recebe apenas os cabeçalhos e trechos personalizados.
+        """
+        message = CampaignMessage(self.smtp_username, subject, html_content, text_content, shared)
+        
+        def deliver(recipient: Dict) -> bool:
+            try:
+                email, variables = recipient["email"], recipient.get("variables", {})
+                message.validate(email, variables)
+                return self.smtp_pool.send_raw(
+                    self.smtp_username, [email],
+                    lambda eight_bit: message.build(email, variables, eight_bit)
+                )
+            except Exception as e:
+                print(f"Erro ao enviar email: {e}")
+                return False
+        
+        results = self._run_bulk(recipients, deliver, self.rate_limiters["smtp"], concurrency, on_progress)
+        results["errors"] = [recipient["email"] for recipient in results["errors"]]
+        return results
+    
+    def _run_bulk(self, items: List, send: Callable[..., bool], limiter: "TokenBucket",
+                  concurrency: Optional[int], on_progress: Optional[Callable[[int, int, Dict], None]]) -> Dict:
+        """Executa `send(item)` em paralelo respeitando o limitador; erros na ordem de `items`"""
+        results = {
+            "success": 0,
+            "failed": 0,
+            "errors": []
+        }
+        total = len(items)
+        lock = threading.Lock()
+        failed_indexes = []
+        
+        def deliver(index: int, item) -> None:
+            limiter.acquire()
+            sent = send(item)
+            with lock:
+                if sent:
+                    results["success"] += 1
+                else:
+                    results["failed"] += 1
+                    failed_indexes.append(index)
+                done = results["success"] + results["failed"]
+                if on_progress:
+                    on_progress(done, total, results)
+        
+        concurrency = concurrency or self.bulk_concurrency
+        self._ensure_capacity(concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(deliver, index, item) for index, item in enumerate(items)]:
+                future.result()
+        
+        results["errors"] = [items[index] for index in sorted(failed_indexes)]
+        return results
+    
+    def _ensure_capacity(self, concurrency: int) -> None:
+        """Amplia os pools SMTP e HTTP para `concurrency` envios simultâneos
+        
+        Sem isso, threads além do tamanho do pool só ficariam esperando uma
+        sessão livre. Os pools só crescem: envios em andamento não são afetados.
+        """
+        with self._capacity_lock:
+            if concurrency <= self._capacity:
+                return
+            self._capacity = concurrency
+            self.smtp_pool.resize(concurrency)
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+            self.http.mount("https://", adapter)
+            self.http.mount("http://", adapter)
+
+def _retry_after(response, attempt: int) -> float:
+    """Segundos até o próximo envio: Retry-After (segundos ou data HTTP) ou backoff exponencial"""
+    value = (response.headers.get("Retry-After") or "").strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 2 ** attempt
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+def _sendgrid_rejected_indexes(response) -> set:
+    """Índices das personalizations apontadas nos erros de um 400 do SendGrid"""
+    try:
+        errors = response.json().get("errors", [])
+    except ValueError:
+        return set()
+    indexes = set()
+    for error in errors:
+        match = re.match(r"personalizations\.(\d+)", error.get("field") or "")
+        if match:
+            indexes.add(int(match.group(1)))
+    return indexes
+
+class CompiledTemplate:
+    """Template pré-processado em segmentos literais e posições de variáveis
+    
+    O texto é analisado uma única vez; renderizar é preencher as posições das
+    variáveis numa cópia da lista de segmentos e fazer um único join. A saída
+    é a mesma de `text.format(**variables)`, inclusive campos como {cliente.nome}
+    e {itens[0]} e format_spec com variáveis ({valor:>{largura}}).
+    """
+    
+    __slots__ = ("parts", "slots", "fields")
+    
+    def __init__(self, parts: List[Optional[str]], slots: List[tuple]):
+        self.parts = parts
+        # (posição em parts, variável, format_spec, conversão, campo completo ou None);
+        # format_spec é um CompiledTemplate quando contém variáveis
+        self.slots = slots
+        self.fields = set()
+        for slot in slots:
+            self.fields.add(slot[1])
+            if isinstance(slot[2], CompiledTemplate):
+                self.fields |= slot[2].fields
+    
+    @classmethod
+    def compile(cls, text: str) -> "CompiledTemplate":
+        parts: List[Optional[str]] = []
+        slots = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if literal:
+                parts.append(literal)
+            if field is not None:
+                name = re.match(r"[^.\[]*", field).group()
+                spec = cls.compile(spec) if "{" in (spec or "") else spec or ""
+                slots.append((len(parts), name, spec, conversion, field if field != name else None))
+                parts.append(None)
+        return cls(parts, slots)
+    
+    def render(self, variables: Dict) -> str:
+        parts = self.parts.copy()
+        for index, name, spec, conversion, field in self.slots:
+            parts[index] = _format_value(_lookup(variables, name, field), spec, conversion, variables)
+        return "".join(parts)
+    
+    def partial(self, variables: Dict) -> "CompiledTemplate":
+        """Novo template com as variáveis informadas já aplicadas (literais unidos)"""
+        parts: List[Optional[str]] = []
+        slots = []
+        for index, part in enumerate(self.parts):
+            if part is None:
+                slot = next(slot for slot in self.slots if slot[0] == index)
+                _, name, spec, conversion, field = slot
+                spec_fields = spec.fields if isinstance(spec, CompiledTemplate) else ()
+                if name not in variables or any(other not in variables for other in spec_fields):
+                    slots.append((len(parts),) + slot[1:])
+                    parts.append(None)
+                    continue
+                part = _format_value(_lookup(variables, name, field), spec, conversion, variables)
+            if parts and parts[-1] is not None:
+                parts[-1] += part
+            else:
+                parts.append(part)
+        return CompiledTemplate(parts, slots)
+
+def _lookup(variables: Dict, name: str, field: Optional[str]):
+    if field is None:
+        return variables[name]
+    # Atributos e índices ({cliente.nome}, {itens[0]}) como no str.format
+    return Formatter().get_field(field, (), variables)[0]
+
+def _format_value(value, spec, conversion: Optional[str], variables: Dict) -> str:
+    if conversion == "r":
+        value = repr(value)
+    elif conversion == "s":
+        value = str(value)
+    elif conversion == "a":
+        value = ascii(value)
+    if isinstance(spec, CompiledTemplate):
+        spec = spec.render(variables)
+    if not spec and type(value) is str:
+        return value
+    return format(value, spec)
+
+class CampaignMessage:
+    """Mensagem MIME de campanha montada uma vez e personalizada em bytes
+    
+    Cabeçalhos comuns e os trechos literais das partes texto e HTML (já com as
+    variáveis compartilhadas aplicadas) são codificados uma única vez; por
+    destinatário só são gerados To, Subject, Date, Message-ID e as variáveis
+    individuais, unidos com um join. O corpo vai em UTF-8 8bit com CRLF, o que
+    permite emendar os segmentos sem recodificar a mensagem. Se o servidor não
+    anuncia 8BITMIME ou uma linha passa de 998 octetos (RFC 5322), a parte
+    é enviada em quoted-printable.
+    """
+    
+    def __init__(self, from_addr: str, subject: str, html_content: str, text_content: str = "",
+                 shared: Optional[Dict] = None):
+        shared = shared or {}
+        self.domain = from_addr.rsplit("@", 1)[-1]
+        self.subject = CompiledTemplate.compile(subject).partial(shared)
+        text = CompiledTemplate.compile(_crlf(text_content)).partial(shared)
+        html = CompiledTemplate.compile(_crlf(html_content)).partial(shared)
+        self.fields = self.subject.fields | text.fields | html.fields
+        
+        boundary = f"=_{uuid.uuid4().hex}"
+        self.head = (
+            f"From: {formataddr(('Jéssica Santos', from_addr), charset='utf-8')}\r\n"
+            "MIME-Version: 1.0\r\n"
+            f'Content-Type: multipart/alternative; boundary="{boundary}"\r\n'
+        ).encode("ascii")
+        
+        # (subtipo, segmentos em bytes com None nas posições das variáveis, slots)
+        self.sections = []
+        if text_content:
+            self._append("plain", text)
+        self._append("html", html)
+        self.delimiter = f"\r\n--{boundary}\r\n".encode("ascii")
+        self.closing = f"\r\n--{boundary}--\r\n".encode("ascii")
+    
+    def _append(self, subtype: str, template: CompiledTemplate) -> None:
+        parts = [part.encode("utf-8") if part is not None else None for part in template.parts]
+        self.sections.append((subtype, parts, template.slots))
+    
+    def validate(self, to_email: str, variables: Dict) -> str:
+        """Confere variáveis e cabeçalhos do destinatário; retorna o assunto renderizado"""
+        missing = self.fields - variables.keys()
+        if missing:
+            raise ValueError(f"Variáveis ausentes para {to_email}: {', '.join(sorted(missing))}")
+        subject = self.subject.render(variables)
+        _check_header("To", to_email)
+        _check_header("Subject", subject)
+        return subject
+    
+    def build(self, to_email: str, variables: Dict, eight_bit: bool = True) -> bytes:
+        """Bytes da mensagem completa para um destinatário
+        
+        Com `eight_bit` falso (servidor sem 8BITMIME) as partes vão em quoted-printable.
+        """
+        subject = self.validate(to_email, variables)
+        
+        chunks = [self.head, (
+            f"To: {to_email}\r\n"
+            f"Subject: {_encode_header(subject)}\r\n"
+            f"Date: {formatdate(localtime=True)}\r\n"
+            f"Message-ID: {make_msgid(domain=self.domain)}\r\n"
+        ).encode("utf-8")]
+        for subtype, parts, slots in self.sections:
+            parts = parts.copy()
+            for index, name, spec, conversion, field in slots:
+                value = _format_value(_lookup(variables, name, field), spec, conversion, variables)
+                parts[index] = _crlf(value).encode("utf-8")
+            body = b"".join(parts)
+            chunks.append(self.delimiter)
+            if eight_bit and _fits_line_limit(body):
+                chunks.append(_part_headers(subtype, "8bit"))
+                chunks.append(body)
+            else:
+                chunks.append(_part_headers(subtype, "quoted-printable"))
+                chunks.append(quoprimime.body_encode(body.decode("latin-1"), eol="\r\n").encode("ascii"))
+        chunks.append(self.closing)
+        return b"".join(chunks)
+
+def _crlf(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\n", "\r\n")
+
+def _fits_line_limit(body: bytes) -> bool:
+    """Nenhuma linha passa de 998 octetos (sem contar o CRLF)"""
+    if len(body) <= 998:
+        return True
+    return max(map(len, body.split(b"\r\n"))) <= 998
+
+def _part_headers(subtype: str, encoding: str) -> bytes:
+    return (
+        f'Content-Type: text/{subtype}; charset="utf-8"\r\n'
+        f"Content-Transfer-Encoding: {encoding}\r\n\r\n"
+    ).encode("ascii")
+
+def _check_header(name: str, value: str) -> None:
+    # Uma quebra de linha no valor abriria cabeçalhos extras (ex.: Bcc) na mensagem
+    if "\r" in value or "\n" in value:
+        raise ValueError(f"Quebra de linha no cabeçalho {name}: {value!r}")
+
+def _encode_header(value: str) -> str:
+    # Valores longos também são codificados, para o Header quebrar a linha
+    if value.isascii() and len(value) <= 900:
+        return value
+    return Header(value, "utf-8").encode(linesep="\r\n")
 
 class EmailTemplateService:
     """Serviço para gerenciar templates de email"""
     
+    # Valores usados quando a variável não é informada
+    DEFAULT_VARIABLES = {
+        "unsubscribe_url": "https://jessicasantos.com/unsubscribe"
+    }
+    
     def __init__(self):
         self.templates = {
             "boas_vindas": {
@@ -294,6 +903,9 @@ class EmailTemplateService:
                             "dica_fotografia", "unsubscribe_url"]
             }
         }
+        
+        # Subject e HTML compilados uma única vez
+        self.compiled = {name: self._compile(name, template) for name, template in self.templates.items()}
     
     def get_template(self, template_name: str) -> Dict:
         """Retorna um template específico"""
@@ -305,17 +917,67 @@ class EmailTemplateService:
         if not template:
             raise ValueError(f"Template '{template_name}' não encontrado")
         
+        subject, html = self.compiled[template_name]
+        variables = self._resolve(template_name, variables)
+        
         rendered = template.copy()
+        rendered["subject"] = subject.render(variables)
+        rendered["html"] = html.render(variables)
         
-        # Substituir variáveis no subject e HTML
-        rendered["subject"] = template["subject"].format(**variables)
-        rendered["html"] = template["html"].format(**variables)
+        return rendered
+    
+    def render_batch(self, template_name: str, recipients: List[Dict],
+                     shared: Optional[Dict] = None) -> List[Dict]:
+        """Renderiza o template para vários destinatários
+        
+        As variáveis de `shared` (iguais para todos, ex.: desconto) são aplicadas
+        uma única vez; para cada destinatário restam só as posições das
+        variáveis individuais. Retorna [{"subject", "html"}] na ordem de `recipients`.
+        """
+        if template_name not in self.compiled:
+            raise ValueError(f"Template '{template_name}' não encontrado")
         
+        template = self.templates[template_name]
+        base = {**self.DEFAULT_VARIABLES, **template.get("defaults", {}), **(shared or {})}
+        subject, html = self.compiled[template_name]
+        subject, html = subject.partial(base), html.partial(base)
+        # Variáveis que cada destinatário ainda precisa informar
+        required = sorted(subject.fields | html.fields)
+        
+        rendered = []
+        for variables in recipients:
+            missing = [name for name in required if name not in variables]
+            if missing:
+                raise ValueError(f"Variáveis ausentes no template '{template_name}': {', '.join(missing)}")
+            rendered.append({
+                "subject": subject.render(variables),
+                "html": html.render(variables)
+            })
         return rendered
     
     def get_available_templates(self) -> List[str]:
         """Retorna lista de templates disponíveis"""
         return list(self.templates.keys())
+    
+    def _compile(self, template_name: str, template: Dict) -> tuple:
+        subject = CompiledTemplate.compile(template["subject"])
+        html = CompiledTemplate.compile(template["html"])
+        undeclared = (subject.fields | html.fields) - set(template["variables"])
+        if undeclared:
+            raise ValueError(f"Template '{template_name}' usa variáveis não declaradas: {sorted(undeclared)}")
+        return subject, html
+    
+    def _resolve(self, template_name: str, variables: Dict) -> Dict:
+        """Aplica os valores padrão e valida que nenhuma variável ficou faltando"""
+        template = self.templates[template_name]
+        defaults = template.get("defaults", {})
+        missing = [
+            name for name in template["variables"]
+            if name not in variables and name not in defaults and name not in self.DEFAULT_VARIABLES
+        ]
+        if missing:
+            raise ValueError(f"Variáveis ausentes no template '{template_name}': {', '.join(missing)}")
+        return {**self.DEFAULT_VARIABLES, **defaults, **variables}
 
 class EmailAutomationService:
     """Serviço para automações de email"""
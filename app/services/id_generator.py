@@ -0,0 +1,111 @@
+# 🆔 Gerador de IDs Ordenáveis por Tempo
+
+import os
+import tempfile
+import threading
+import time
+from typing import IO, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, o worker id vem do pid
+    fcntl = None
+
+# Época própria (2024-01-01T00:00:00Z) para caber 42 bits de milissegundos até 2163
+EPOCH_MS = 1704067200000
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Base32 de Crockford: a ordem lexicográfica das strings é a ordem numérica
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ENCODED_LENGTH = 13
+
+# Arquivos de slot mantidos abertos: o flock vale enquanto o processo viver
+_claimed_slots: List[IO] = []
+
+def claim_worker_id(prefix: str) -> int:
+    """Reserva o menor worker id livre com flock em `<prefix>-<n>.lock`
+
+    O lock é liberado pelo sistema quando o processo termina, então o slot de
+    um worker encerrado volta a ficar livre sem nenhuma limpeza.
+    """
+    if fcntl is None:
+        return os.getpid() & MAX_WORKER
+    for worker_id in range(MAX_WORKER + 1):
+        slot = open(f"{prefix}-{worker_id:04d}.lock", 'a+')
+        try:
+            fcntl.flock(slot.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            slot.close()
+            continue
+        _claimed_slots.append(slot)
+        return worker_id
+    raise RuntimeError(f"Todos os {MAX_WORKER + 1} worker ids estão em uso ({prefix})")
+
+class IdGenerator:
+    """IDs no estilo Snowflake: 42 bits de tempo (ms), 10 de worker e 12 de sequência
+
+    Os IDs são monotônicos dentro do processo (mesmo se o relógio voltar),
+    únicos entre workers com `worker_id` diferentes e, codificados em base32 de
+    largura fixa, ordenáveis por tempo como strings.
+
+    Sem `worker_id` (nem NOTIFICATIONS_WORKER_ID) cada processo reserva um slot
+    livre em `slot_prefix` no primeiro ID gerado; um processo filho (fork de
+    um master com preload) reserva o seu próprio.
+    """
+
+    def __init__(self, worker_id: Optional[int] = None, slot_prefix: Optional[str] = None):
+        if worker_id is None and os.environ.get('NOTIFICATIONS_WORKER_ID'):
+            worker_id = int(os.environ['NOTIFICATIONS_WORKER_ID'])
+        self.worker_id = worker_id & MAX_WORKER if worker_id is not None else None
+        self.slot_prefix = slot_prefix or os.path.join(tempfile.gettempdir(), 'notifications-worker')
+        self._fixed = worker_id is not None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_int(self) -> int:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                if not self._fixed:
+                    self.worker_id = claim_worker_id(self.slot_prefix)
+            now = time.time_ns() // 1_000_000 - EPOCH_MS
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                # Mesmo milissegundo (ou relógio atrasado): avança a sequência e,
+                # se ela estourar, "empresta" o próximo milissegundo
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self, prefix: str = "") -> str:
+        """Novo ID com prefixo opcional, ex.: notif_01HZX3K9B2C0A"""
+        return f"{prefix}_{encode(self.next_int())}" if prefix else encode(self.next_int())
+
+def encode(value: int) -> str:
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+def decode(encoded: str) -> int:
+    value = 0
+    for char in encoded:
+        value = (value << 5) | ALPHABET.index(char)
+    return value
+
+def timestamp_ms(generated_id: str) -> Optional[int]:
+    """Epoch ms embutido em um ID gerado (None para IDs em outro formato)"""
+    encoded = generated_id.rsplit("_", 1)[-1]
+    if len(encoded) != ENCODED_LENGTH or any(char not in ALPHABET for char in encoded):
+        return None
+    return (decode(encoded) >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
@@ -0,0 +1,80 @@
+# 🧺 Agrupamento de Notificações em Rajadas (resumo/digest)
+
+import atexit
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models.Notification import NotificationPriority, NotificationRecord, NotificationType, now_ms
+
+GroupKey = Tuple[str, NotificationType]
+
+class NotificationCoalescer:
+    """Junta notificações do mesmo usuário e tipo dentro de uma janela
+
+    A primeira notificação de uma rajada é entregue na hora e abre a janela;
+    as seguintes ficam retidas e, ao fim da janela, saem juntas em `on_flush`
+    (um único push de resumo). Enquanto a rajada continuar, cada janela gera no
+    máximo um resumo. Prioridade URGENTE nunca é retida. No desligamento as
+    rajadas retidas saem imediatamente (`shutdown`) em vez de se perderem.
+    """
+
+    def __init__(self, scheduler, on_flush: Callable[[List[NotificationRecord]], None],
+                 window_ms: Optional[int] = None):
+        self.scheduler = scheduler
+        self.on_flush = on_flush
+        self.window_ms = window_ms if window_ms is not None else int(
+            os.environ.get('NOTIFICATIONS_COALESCE_WINDOW_MS', 30000)
+        )
+        self._lock = threading.Lock()
+        # Janelas abertas: (usuário, tipo) -> notificações retidas
+        self._groups: Dict[GroupKey, List[NotificationRecord]] = {}
+        self._accepting = True
+        atexit.register(self.shutdown)
+
+    def offer(self, notification: NotificationRecord) -> bool:
+        """True se a notificação foi retida para o resumo; False para entregar agora"""
+        if self.window_ms <= 0 or notification.priority == NotificationPriority.URGENTE:
+            return False
+        key = (notification.user_id, notification.type)
+        with self._lock:
+            if not self._accepting:
+                return False
+            group = self._groups.get(key)
+            if group is None:
+                self._open(key)
+                return False
+            group.append(notification)
+            return True
+
+    def pending(self) -> int:
+        """Quantidade de notificações retidas aguardando o fim da janela"""
+        with self._lock:
+            return sum(len(group) for group in self._groups.values())
+
+    def shutdown(self) -> None:
+        """Para de reter e entrega agora todas as rajadas com notificações retidas"""
+        with self._lock:
+            self._accepting = False
+            groups = self._groups
+            self._groups = {}
+        for key, group in groups.items():
+            self.scheduler.cancel(_timer_key(key))
+            if group:
+                self.on_flush(group)
+
+    def _open(self, key: GroupKey) -> None:
+        self._groups[key] = []
+        self.scheduler.schedule(_timer_key(key), now_ms() + self.window_ms, lambda: self._close(key))
+
+    def _close(self, key: GroupKey) -> None:
+        with self._lock:
+            group = self._groups.pop(key, None)
+            if group:
+                # Rajada em andamento: a próxima janela começa já
+                self._open(key)
+        if group:
+            self.on_flush(group)
+
+def _timer_key(key: GroupKey) -> str:
+    return f"digest:{key[0]}:{key[1].value}"
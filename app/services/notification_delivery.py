@@ -0,0 +1,141 @@
+# 🚚 Entrega Assíncrona de Notificações Push
+
+import atexit
+import os
+import queue
+import threading
+from typing import Callable, List, Optional
+
+from app.models.Notification import NotificationRecord, NotificationStatus, now_ms
+
+_STOP = object()
+
+class DigestItem:
+    """Grupo de notificações entregue como um único push (resumo)"""
+
+    __slots__ = ("notifications",)
+
+    def __init__(self, notifications: List[NotificationRecord]):
+        self.notifications = notifications
+
+class NotificationDeliveryPool:
+    """Fila limitada de entregas atendida por um pool de threads
+
+    `submit` nunca bloqueia: com a fila cheia retorna False e o chamador aplica
+    backpressure (HTTP 503). Ao concluir cada entrega o status da notificação
+    passa de `pendente` para `enviada` ou `falhada` no store; se ela foi lida
+    durante o envio o status é mantido e só o `sent_at` é registrado. Resumos
+    (`submit_digest`) usam `digest_sender` e atualizam todas as do grupo.
+    """
+
+    def __init__(self, store, sender: Callable[[NotificationRecord], bool],
+                 workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 digest_sender: Optional[Callable[[List[NotificationRecord]], bool]] = None):
+        self.store = store
+        self.sender = sender
+        self.digest_sender = digest_sender
+        self.workers = workers or int(os.environ.get('NOTIFICATIONS_DELIVERY_WORKERS', 4))
+        self.max_queue = max_queue or int(os.environ.get('NOTIFICATIONS_DELIVERY_QUEUE', 1000))
+
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        self._accepting = True
+        self._threads: List[threading.Thread] = []
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f"notification-delivery-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        atexit.register(self.shutdown)
+
+    def submit(self, notification: NotificationRecord) -> bool:
+        """Enfileira uma entrega; False se a fila estiver cheia ou em desligamento"""
+        if not self._accepting:
+            return False
+        try:
+            self._queue.put_nowait(notification)
+            return True
+        except queue.Full:
+            return False
+
+    def submit_many(self, notifications: List[NotificationRecord]) -> bool:
+        """Enfileira um lote inteiro como uma única entrada da fila"""
+        if not notifications:
+            return True
+        if not self._accepting:
+            return False
+        try:
+            self._queue.put_nowait(list(notifications))
+            return True
+        except queue.Full:
+            return False
+
+    def submit_digest(self, notifications: List[NotificationRecord]) -> bool:
+        """Enfileira um grupo para ser entregue como um único push"""
+        if not self._accepting:
+            return False
+        try:
+            self._queue.put_nowait(DigestItem(list(notifications)))
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self) -> int:
+        """Quantidade aproximada de entregas aguardando na fila"""
+        return self._queue.qsize()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Para de aceitar entregas e aguarda a fila esvaziar"""
+        if not self._accepting:
+            return
+        self._accepting = False
+        for _ in self._threads:
+            # Os sentinelas entram depois de tudo que já está na fila
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if isinstance(item, DigestItem):
+                self._deliver_digest(item.notifications)
+                continue
+            for notification in item if isinstance(item, list) else (item,):
+                self._deliver(notification)
+
+    def _deliver(self, notification: NotificationRecord) -> None:
+        try:
+            delivered = self.sender(notification)
+        except Exception as e:
+            print(f"Erro ao entregar notificação {notification.id}: {e}")
+            delivered = False
+        self._mark([notification.id], delivered)
+
+    def _deliver_digest(self, notifications: List[NotificationRecord]) -> None:
+        try:
+            delivered = self.digest_sender(notifications)
+        except Exception as e:
+            print(f"Erro ao entregar resumo de {len(notifications)} notificações: {e}")
+            delivered = False
+        self._mark([notification.id for notification in notifications], delivered)
+
+    def _mark(self, notification_ids: List[str], delivered: bool) -> None:
+        now = now_ms()
+        if not delivered:
+            self.store.set_status_many(
+                notification_ids, NotificationStatus.FALHADA,
+                from_status=NotificationStatus.PENDENTE, updated_at=now
+            )
+            return
+        self.store.set_status_many(
+            notification_ids, NotificationStatus.ENVIADA,
+            from_status=NotificationStatus.PENDENTE, sent_at=now, updated_at=now
+        )
+        # Lidas enquanto o push estava em andamento: o status fica, o envio é registrado
+        for notification_id in notification_ids:
+            notification = self.store.get(notification_id)
+            if notification is not None and notification.sent_at is None:
+                self.store.update_fields(notification_id, sent_at=now)
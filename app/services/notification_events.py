@@ -0,0 +1,152 @@
+# 📡 Eventos de Notificação para Server-Sent Events
+
+import threading
+import uuid
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.models.Notification import NotificationRecord, NotificationStatus, dumps_json
+
+class UserChannel:
+    """Ring buffer de eventos recentes de um usuário e suas conexões em espera"""
+
+    __slots__ = ("events", "last_id", "cond")
+
+    def __init__(self, buffer_size: int, lock: threading.Lock):
+        self.events: Deque[Tuple[int, bytes]] = deque(maxlen=buffer_size)
+        self.last_id = 0
+        self.cond = threading.Condition(lock)
+
+class NotificationEventBus:
+    """Publica eventos do store (novas notificações, mudanças de status e
+    variações do contador de não lidas) para as conexões SSE de cada usuário
+
+    Cada evento é formatado uma única vez e compartilhado por todas as conexões
+    do usuário. Só há buffer para usuários que já abriram um stream, o que
+    mantém o custo zero para os demais. Os ids dos eventos são `<época>-<n>`:
+    a época identifica este processo, já que os contadores recomeçam a cada
+    restart e não valem em outro worker.
+    """
+
+    def __init__(self, store, buffer_size: int = 256):
+        self.store = store
+        self.buffer_size = buffer_size
+        self.epoch = uuid.uuid4().hex[:12]
+        self._epoch_bytes = self.epoch.encode("ascii")
+        self._lock = threading.Lock()
+        self._channels: Dict[str, UserChannel] = {}
+
+    # Eventos do NotificationStore
+
+    def on_insert(self, notification: NotificationRecord) -> None:
+        channel = self._channels.get(notification.user_id)
+        if channel is None:
+            return
+        events = [("notification", notification.to_json())]
+        if notification.status == NotificationStatus.PENDENTE:
+            events.append(self._unread_event(notification.user_id, 1))
+        self._publish(channel, events)
+
+    def on_status_change(self, notification: NotificationRecord, old_status: NotificationStatus) -> None:
+        channel = self._channels.get(notification.user_id)
+        if channel is None or old_status == notification.status:
+            return
+        events = [("status", {
+            "id": notification.id,
+            "status": notification.status.value,
+            "old_status": old_status.value
+        })]
+        if old_status == NotificationStatus.PENDENTE:
+            events.append(self._unread_event(notification.user_id, -1))
+        elif notification.status == NotificationStatus.PENDENTE:
+            events.append(self._unread_event(notification.user_id, 1))
+        self._publish(channel, events)
+
+    def on_remove(self, notification: NotificationRecord) -> None:
+        channel = self._channels.get(notification.user_id)
+        if channel is None:
+            return
+        events = [("removed", {"id": notification.id})]
+        if notification.status == NotificationStatus.PENDENTE:
+            events.append(self._unread_event(notification.user_id, -1))
+        self._publish(channel, events)
+
+    # Consumo pelas conexões SSE
+
+    def stream(self, user_id: str, last_event_id: Optional[str] = None,
+               heartbeat: float = 15.0) -> Iterator[bytes]:
+        """Gera o corpo text/event-stream de um usuário
+
+        Com `last_event_id` reenvia o que estiver no ring buffer depois dele. Se
+        o buffer já descartou eventos ou o id não é deste processo (outra época,
+        ou à frente do contador), envia `reset` para o cliente recarregar. O
+        mesmo vale para um stream aberto que ficou mais de `buffer_size` eventos
+        atrás entre duas leituras.
+        """
+        channel = self._channel(user_id)
+        # O cursor é fixado antes do primeiro yield: nada publicado depois se perde
+        sequence = self._sequence(last_event_id) if last_event_id is not None else None
+        with self._lock:
+            oldest = channel.events[0][0] if channel.events else channel.last_id + 1
+            needs_reset = last_event_id is not None and (
+                sequence is None or sequence > channel.last_id or sequence < oldest - 1
+            )
+            cursor = sequence if last_event_id is not None and not needs_reset else channel.last_id
+        yield b"retry: 3000\n\n"
+        if needs_reset:
+            yield self._reset_event(user_id, cursor)
+
+        while True:
+            with self._lock:
+                if channel.last_id <= cursor:
+                    channel.cond.wait(heartbeat)
+                # O ring buffer descartou eventos que esta conexão ainda não leu
+                overrun = bool(channel.events) and channel.events[0][0] > cursor + 1
+                pending = [] if overrun else [data for event_id, data in channel.events if event_id > cursor]
+                cursor = channel.last_id
+            if overrun:
+                yield self._reset_event(user_id, cursor)
+            elif pending:
+                yield b"".join(pending)
+            else:
+                # Comentário SSE mantém proxies e o navegador com a conexão viva
+                yield b": ping\n\n"
+
+    def _reset_event(self, user_id: str, event_id: int) -> bytes:
+        return _format(self._epoch_bytes, event_id, "reset", {
+            "unread_count": self.store.count(user_id, NotificationStatus.PENDENTE)
+        })
+
+    def _sequence(self, event_id: str) -> Optional[int]:
+        """Contador de um id `<época>-<n>` desta época; None para ids de outro processo"""
+        epoch, _, sequence = event_id.rpartition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def _channel(self, user_id: str) -> UserChannel:
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                channel = self._channels[user_id] = UserChannel(self.buffer_size, self._lock)
+            return channel
+
+    def _unread_event(self, user_id: str, delta: int) -> Tuple[str, Dict]:
+        return ("unread_count", {
+            "delta": delta,
+            "unread_count": self.store.count(user_id, NotificationStatus.PENDENTE)
+        })
+
+    def _publish(self, channel: UserChannel, events: List[Tuple[str, Union[Dict, bytes]]]) -> None:
+        with self._lock:
+            for event, payload in events:
+                channel.last_id += 1
+                channel.events.append(
+                    (channel.last_id, _format(self._epoch_bytes, channel.last_id, event, payload))
+                )
+            channel.cond.notify_all()
+
+def _format(epoch: bytes, event_id: int, event: str, payload: Union[Dict, bytes]) -> bytes:
+    # Notificações chegam já serializadas (cache do registro)
+    data = payload if isinstance(payload, bytes) else dumps_json(payload)
+    return b"id: %s-%d\nevent: %s\ndata: %s\n\n" % (epoch, event_id, event.encode("ascii"), data)
@@ -0,0 +1,104 @@
+# 📥 Leitura Incremental de Lotes de Notificações
+
+import codecs
+import json
+import re
+from typing import IO, Any, Iterator, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+Item = Tuple[Optional[Any], Optional[str]]
+
+# Restos que ainda podem virar JSON válido com mais dados. No erro de \uXXXX a
+# posição fica logo após a barra, e um surrogate alto ainda espera o par.
+_LITERAL_PREFIXES = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+_NUMBER_TAIL = re.compile(r"(?:\.\d*)?(?:[eE][-+]?\d*)?")
+_ESCAPE_TAIL = re.compile(r'\\?u[0-9a-fA-F]{0,4}(?:\\(?:u[0-9a-fA-F]{0,3})?)?')
+
+def iter_ndjson(stream: IO[bytes]) -> Iterator[Item]:
+    """Lê um corpo NDJSON linha a linha, produzindo (objeto, erro)"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as e:
+            yield None, f"JSON inválido: {e}"
+
+def iter_json_array(stream: IO[bytes], chunk_size: int = CHUNK_SIZE) -> Iterator[Item]:
+    """Lê um array JSON em blocos, produzindo cada elemento assim que é completado
+
+    Apenas o elemento em andamento fica em memória. Um erro de sintaxe encerra
+    a leitura, já que não há como ressincronizar dentro de um array; o erro é
+    reportado assim que aparece, sem ler o resto do corpo.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    expecting_value = True
+    items = 0
+    eof = False
+
+    while not eof:
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        try:
+            buffer += utf8.decode(chunk, final=eof)
+        except UnicodeDecodeError as e:
+            yield None, f"Codificação inválida: {e}"
+            return
+
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position >= len(buffer):
+                break
+            char = buffer[position]
+
+            if not started:
+                if char != "[":
+                    yield None, "O corpo deve ser um array JSON ou NDJSON"
+                    return
+                started = True
+                position += 1
+            elif char == "]" and (not expecting_value or items == 0):
+                return
+            elif not expecting_value:
+                if char != ",":
+                    yield None, f"Separador inesperado: {char!r}"
+                    return
+                expecting_value = True
+                position += 1
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    if eof or not _incomplete(buffer, e):
+                        yield None, f"JSON inválido: {e}"
+                        return
+                    # Elemento incompleto: aguarda o próximo bloco
+                    break
+                if not eof and (end == len(buffer) or buffer[end] in ".eE"):
+                    # Número cortado no fim do bloco (12|34, 1.|5, 1e|3): aguarda o resto
+                    break
+                yield value, None
+                items += 1
+                position = end
+                expecting_value = False
+
+        buffer = buffer[position:]
+
+    yield None, "Array JSON não terminado" if started else "Corpo vazio"
+
+def _incomplete(buffer: str, error: json.JSONDecodeError) -> bool:
+    """O erro vem só do fim do buffer (mais dados podem completar o elemento)?"""
+    rest = buffer[error.pos:]
+    if not rest or error.msg.startswith("Unterminated string"):
+        return True
+    if any(literal.startswith(rest) for literal in _LITERAL_PREFIXES):
+        return True
+    # Número (-2.|5, 1e|+3) ou escape (\u00|e9) cortados no fim do bloco
+    return bool(_NUMBER_TAIL.fullmatch(rest) or _ESCAPE_TAIL.fullmatch(rest))
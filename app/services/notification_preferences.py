@@ -0,0 +1,118 @@
+# 🎛️ Preferências de Notificação Compiladas
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.models.Notification import NotificationPriority, NotificationType
+
+DEFAULT_CONFIG = {
+    "agendamento_enabled": True,
+    "pagamento_enabled": True,
+    "ensaio_enabled": True,
+    "sistema_enabled": False,
+    "marketing_enabled": True,
+    "whatsapp_enabled": True,
+    "push_enabled": True,
+    "email_enabled": True,
+    "quiet_hours_enabled": True,
+    "quiet_hours_start": "22:00",
+    "quiet_hours_end": "08:00",
+    "sound_enabled": True,
+    "vibration_enabled": True
+}
+
+TYPE_BITS = {notification_type: 1 << index for index, notification_type in enumerate(NotificationType)}
+CHANNEL_BITS = {"push": 1, "email": 2}
+
+DELIVER = "deliver"
+DEFER = "defer"
+DROP = "drop"
+
+def parse_minutes(value: str) -> int:
+    """Converte 'HH:MM' em minutos desde a meia-noite (ValueError se inválido)"""
+    hours, minutes = str(value).split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Horário inválido: {value}")
+    return hours * 60 + minutes
+
+class NotificationPolicy(NamedTuple):
+    """Configuração de um usuário compilada em máscaras de bits e minutos"""
+
+    type_mask: int
+    channel_mask: int
+    quiet_enabled: bool
+    quiet_start: int
+    quiet_end: int
+
+    @classmethod
+    def compile(cls, config: Dict) -> "NotificationPolicy":
+        merged = {**DEFAULT_CONFIG, **config}
+        type_mask = 0
+        for notification_type, bit in TYPE_BITS.items():
+            if merged.get(f"{notification_type.value}_enabled"):
+                type_mask |= bit
+        channel_mask = 0
+        for channel, bit in CHANNEL_BITS.items():
+            if merged.get(f"{channel}_enabled"):
+                channel_mask |= bit
+        try:
+            quiet_start = parse_minutes(merged["quiet_hours_start"])
+            quiet_end = parse_minutes(merged["quiet_hours_end"])
+        except ValueError:
+            # Configs gravadas antes da validação: volta ao horário padrão
+            quiet_start = parse_minutes(DEFAULT_CONFIG["quiet_hours_start"])
+            quiet_end = parse_minutes(DEFAULT_CONFIG["quiet_hours_end"])
+        return cls(
+            type_mask=type_mask,
+            channel_mask=channel_mask,
+            quiet_enabled=bool(merged["quiet_hours_enabled"]) and quiet_start != quiet_end,
+            quiet_start=quiet_start,
+            quiet_end=quiet_end
+        )
+
+    def decide(self, notification_type: NotificationType, priority: NotificationPriority,
+               channel: str = "push", now: Optional[datetime] = None) -> Tuple[str, Optional[int]]:
+        """Decide em O(1): (DELIVER, None), (DEFER, epoch ms de liberação) ou (DROP, None)"""
+        if not (self.type_mask & TYPE_BITS[notification_type]) or not (self.channel_mask & CHANNEL_BITS[channel]):
+            return DROP, None
+        if not self.quiet_enabled or priority == NotificationPriority.URGENTE:
+            return DELIVER, None
+
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        if self.quiet_start < self.quiet_end:
+            quiet = self.quiet_start <= minute < self.quiet_end
+        else:
+            # Janela atravessa a meia-noite (ex.: 22:00 -> 08:00)
+            quiet = minute >= self.quiet_start or minute < self.quiet_end
+        if not quiet:
+            return DELIVER, None
+
+        release = now.replace(hour=self.quiet_end // 60, minute=self.quiet_end % 60, second=0, microsecond=0)
+        if release <= now:
+            release += timedelta(days=1)
+        return DEFER, int(release.timestamp() * 1000)
+
+class PreferenceCache:
+    """Cache de políticas compiladas por usuário, invalidado quando a config muda"""
+
+    def __init__(self, configs: Dict[str, Dict]):
+        self.configs = configs
+        self._policies: Dict[str, NotificationPolicy] = {}
+        self._lock = threading.Lock()
+
+    def policy(self, user_id: str) -> NotificationPolicy:
+        policy = self._policies.get(user_id)
+        if policy is None:
+            with self._lock:
+                policy = self._policies.get(user_id)
+                if policy is None:
+                    policy = NotificationPolicy.compile(self.configs.get(user_id, {}))
+                    self._policies[user_id] = policy
+        return policy
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._policies.pop(user_id, None)
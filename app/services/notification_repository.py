@@ -0,0 +1,407 @@
+# 💾 Repositório SQLite de Notificações
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.models.Notification import (
+    NotificationPriority, NotificationRecord, NotificationStatus, NotificationType
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    type TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT,
+    action_url TEXT,
+    icon TEXT,
+    image_url TEXT,
+    scheduled_at INTEGER,
+    sent_at INTEGER,
+    read_at INTEGER,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    origin TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_status_created
+    ON notifications (user_id, status, created_at, id);
+CREATE TABLE IF NOT EXISTS push_subscriptions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_push_subscriptions_user
+    ON push_subscriptions (user_id);
+CREATE TABLE IF NOT EXISTS notification_configs (
+    user_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT
+);
+"""
+
+# Colunas adicionadas depois da primeira versão do schema (bancos existentes)
+MIGRATIONS = (
+    ("notifications", "revision", "ALTER TABLE notifications ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"),
+    ("notifications", "origin", "ALTER TABLE notifications ADD COLUMN origin TEXT NOT NULL DEFAULT ''"),
+)
+
+# A linha gravada só é substituída por uma de (revision, origin) maior ou igual:
+# com vários workers, o SQLite fica com a mesma versão que os stores escolhem
+UPSERT_NOTIFICATION = """
+INSERT INTO notifications (
+    id, user_id, title, message, type, priority, status, data, action_url, icon,
+    image_url, scheduled_at, sent_at, read_at, created_at, updated_at, revision, origin
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    user_id = excluded.user_id, title = excluded.title, message = excluded.message,
+    type = excluded.type, priority = excluded.priority, status = excluded.status,
+    data = excluded.data, action_url = excluded.action_url, icon = excluded.icon,
+    image_url = excluded.image_url, scheduled_at = excluded.scheduled_at,
+    sent_at = excluded.sent_at, read_at = excluded.read_at, created_at = excluded.created_at,
+    updated_at = excluded.updated_at, revision = excluded.revision, origin = excluded.origin
+WHERE excluded.revision > notifications.revision
+    OR (excluded.revision = notifications.revision AND excluded.origin >= notifications.origin)
+"""
+DELETE_NOTIFICATION = "DELETE FROM notifications WHERE id = ?"
+SELECT_NOTIFICATIONS = """
+SELECT id, user_id, title, message, type, priority, status, data, action_url, icon,
+       image_url, scheduled_at, sent_at, read_at, created_at, updated_at, revision, origin
+FROM notifications ORDER BY created_at, id
+"""
+UPSERT_SUBSCRIPTION = "INSERT OR REPLACE INTO push_subscriptions (id, user_id, payload) VALUES (?, ?, ?)"
+SELECT_SUBSCRIPTIONS = "SELECT payload FROM push_subscriptions ORDER BY rowid"
+UPSERT_CONFIG = "INSERT OR REPLACE INTO notification_configs (user_id, payload) VALUES (?, ?)"
+SELECT_CONFIGS = "SELECT user_id, payload FROM notification_configs"
+INSERT_CHANGE = "INSERT INTO change_log (origin, kind, key, payload) VALUES (?, ?, ?, ?)"
+SELECT_CHANGES = """
+SELECT seq, kind, key, payload FROM change_log
+WHERE seq > ? AND origin != ? ORDER BY seq LIMIT ?
+"""
+PRUNE_CHANGES = "DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?"
+
+# Quantas entradas do change_log são mantidas para os outros processos
+CHANGE_LOG_RETAIN = 50000
+
+# Erros causados por um registro específico (tipo não suportado, inteiro grande
+# demais, NOT NULL...): o registro é descartado em vez de travar o buffer
+ROW_ERRORS = (sqlite3.InterfaceError, sqlite3.ProgrammingError, sqlite3.IntegrityError,
+              OverflowError, TypeError, ValueError)
+
+class NotificationRepository:
+    """Persistência das notificações em SQLite (WAL) com buffer de escrita (write-behind)
+
+    Inserções e mudanças de status chegam como eventos do store e ficam em um
+    buffer coalescido por id; uma thread grava o buffer inteiro em uma única
+    transação a cada `flush_interval` segundos ou quando `max_batch` é atingido.
+    Com synchronous=NORMAL em WAL, apenas checkpoints fazem fsync.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 0.05, max_batch: int = 1000):
+        self.path = path or os.environ.get('NOTIFICATIONS_DB_PATH', 'notifications.sqlite3')
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        # Quando definido, cada flush também registra as mudanças no change_log
+        # para os demais processos (ver notification_state)
+        self.change_origin: Optional[str] = None
+        self._flushes = 0
+        self._local = threading.local()
+
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, cached_statements=64
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn_lock = threading.Lock()
+
+        # Buffer coalescido: a última versão de cada registro vence
+        self._buffer_lock = threading.Lock()
+        self._pending_upserts: Dict[str, NotificationRecord] = {}
+        self._pending_deletes: Dict[str, None] = {}
+        self._pending_subscriptions: Dict[str, Dict] = {}
+        self._pending_configs: Dict[str, Dict] = {}
+
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="notification-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _migrate(self) -> None:
+        for table, column, statement in MIGRATIONS:
+            columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._conn.execute(statement)
+
+    # Eventos do NotificationStore
+
+    def on_insert(self, notification: NotificationRecord) -> None:
+        self._enqueue_upsert(notification)
+
+    def on_status_change(self, notification: NotificationRecord, old_status: NotificationStatus) -> None:
+        self._enqueue_upsert(notification)
+
+    def on_remove(self, notification: NotificationRecord) -> None:
+        if self._is_suppressed():
+            return
+        with self._buffer_lock:
+            self._pending_upserts.pop(notification.id, None)
+            self._pending_deletes[notification.id] = None
+            self._maybe_wakeup()
+
+    # Subscriptions e configurações
+
+    def save_subscription(self, subscription: Dict) -> None:
+        """Agenda a gravação de uma subscription de push"""
+        if self._is_suppressed():
+            return
+        with self._buffer_lock:
+            self._pending_subscriptions[subscription["id"]] = subscription
+            self._maybe_wakeup()
+
+    def save_config(self, user_id: str, config: Dict) -> None:
+        """Agenda a gravação da configuração de notificações de um usuário"""
+        if self._is_suppressed():
+            return
+        with self._buffer_lock:
+            self._pending_configs[user_id] = config
+            self._maybe_wakeup()
+
+    # Leitura (usada na inicialização)
+
+    def load_notifications(self) -> Iterator[NotificationRecord]:
+        """Carrega todas as notificações persistidas, em ordem de criação"""
+        with self._conn_lock:
+            rows = self._conn.execute(SELECT_NOTIFICATIONS).fetchall()
+        for row in rows:
+            yield _record_from_row(row)
+
+    def load_subscriptions(self) -> List[Dict]:
+        with self._conn_lock:
+            rows = self._conn.execute(SELECT_SUBSCRIPTIONS).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def load_configs(self) -> Dict[str, Dict]:
+        with self._conn_lock:
+            rows = self._conn.execute(SELECT_CONFIGS).fetchall()
+        return {user_id: json.loads(payload) for user_id, payload in rows}
+
+    def last_change_seq(self) -> int:
+        """Maior sequência do change_log (0 se vazio)"""
+        with self._conn_lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+    def read_changes(self, connection: sqlite3.Connection, after: int, limit: int = 1000) -> List[Tuple]:
+        """Mudanças gravadas por outros processos depois da sequência `after`"""
+        return connection.execute(SELECT_CHANGES, (after, self.change_origin or "", limit)).fetchall()
+
+    @staticmethod
+    def decode_notification(payload: str) -> NotificationRecord:
+        """Reconstrói um registro a partir do payload do change_log"""
+        return _record_from_row(json.loads(payload))
+
+    @contextmanager
+    def suppressed(self):
+        """Ignora eventos nesta thread (mudanças vindas de outro processo já estão gravadas)"""
+        self._local.suppress = True
+        try:
+            yield
+        finally:
+            self._local.suppress = False
+
+    def is_empty(self) -> bool:
+        with self._conn_lock:
+            return self._conn.execute("SELECT 1 FROM notifications LIMIT 1").fetchone() is None
+
+    # Escrita em lote
+
+    def flush(self) -> int:
+        """Grava o buffer pendente em uma única transação; retorna o nº de operações
+
+        Se algum registro não puder ser gravado, a transação é refeita registro a
+        registro e apenas os inválidos são descartados (e logados).
+        """
+        with self._buffer_lock:
+            upserts = self._pending_upserts
+            deletes = self._pending_deletes
+            subscriptions = self._pending_subscriptions
+            configs = self._pending_configs
+            self._pending_upserts = {}
+            self._pending_deletes = {}
+            self._pending_subscriptions = {}
+            self._pending_configs = {}
+
+        total = len(upserts) + len(deletes) + len(subscriptions) + len(configs)
+        if not total:
+            return 0
+
+        with self._conn_lock:
+            try:
+                try:
+                    self._write(upserts, deletes, subscriptions, configs)
+                except ROW_ERRORS as e:
+                    print(f"Registro inválido no lote, gravando um a um: {e}")
+                    upserts, subscriptions, configs = self._write_each(upserts, deletes, subscriptions, configs)
+            except sqlite3.Error as e:
+                print(f"Erro ao gravar notificações: {e}")
+                self._requeue(upserts, deletes, subscriptions, configs)
+                return 0
+        return len(upserts) + len(deletes) + len(subscriptions) + len(configs)
+
+    def _write(self, upserts, deletes, subscriptions, configs) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            if deletes:
+                self._conn.executemany(DELETE_NOTIFICATION, [(i,) for i in deletes])
+            if upserts:
+                self._conn.executemany(UPSERT_NOTIFICATION, [_row_from_record(r) for r in upserts.values()])
+            if subscriptions:
+                self._conn.executemany(UPSERT_SUBSCRIPTION, [
+                    (s["id"], s["user_id"], json.dumps(s)) for s in subscriptions.values()
+                ])
+            if configs:
+                self._conn.executemany(UPSERT_CONFIG, [
+                    (user_id, json.dumps(config)) for user_id, config in configs.items()
+                ])
+            if self.change_origin:
+                self._record_changes(upserts, deletes, subscriptions, configs)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _write_each(self, upserts, deletes, subscriptions, configs) -> Tuple[Dict, Dict, Dict]:
+        """Grava registro a registro; retorna (upserts, subscriptions, configs) gravados"""
+        self._conn.execute("BEGIN")
+        try:
+            if deletes:
+                self._conn.executemany(DELETE_NOTIFICATION, [(i,) for i in deletes])
+            upserts = {
+                i: r for i, r in upserts.items()
+                if self._write_one(UPSERT_NOTIFICATION, lambda: _row_from_record(r), f"notificação {i}")
+            }
+            subscriptions = {
+                i: s for i, s in subscriptions.items()
+                if self._write_one(UPSERT_SUBSCRIPTION, lambda: (s["id"], s["user_id"], json.dumps(s)),
+                                   f"subscription {i}")
+            }
+            configs = {
+                u: c for u, c in configs.items()
+                if self._write_one(UPSERT_CONFIG, lambda: (u, json.dumps(c)), f"configuração de {u}")
+            }
+            if self.change_origin:
+                self._record_changes(upserts, deletes, subscriptions, configs)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return upserts, subscriptions, configs
+
+    def _write_one(self, statement: str, params, label: str) -> bool:
+        # Um comando que falha não altera nada, então não precisa de savepoint
+        try:
+            self._conn.execute(statement, params())
+            return True
+        except ROW_ERRORS as e:
+            print(f"Descartando {label}: {e}")
+            return False
+
+    def close(self) -> None:
+        """Para a thread de escrita e grava o que estiver pendente"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join(timeout=5)
+        self.flush()
+        with self._conn_lock:
+            self._conn.close()
+
+    def _record_changes(self, upserts, deletes, subscriptions, configs) -> None:
+        origin = self.change_origin
+        changes = [(origin, "notification_delete", i, None) for i in deletes]
+        changes.extend(
+            (origin, "notification", r.id, json.dumps(_row_from_record(r))) for r in upserts.values()
+        )
+        changes.extend((origin, "subscription", i, json.dumps(s)) for i, s in subscriptions.items())
+        changes.extend((origin, "config", u, json.dumps(c)) for u, c in configs.items())
+        self._conn.executemany(INSERT_CHANGE, changes)
+        self._flushes += 1
+        if self._flushes % 100 == 0:
+            self._conn.execute(PRUNE_CHANGES, (CHANGE_LOG_RETAIN,))
+
+    def _is_suppressed(self) -> bool:
+        return getattr(self._local, "suppress", False)
+
+    def _enqueue_upsert(self, notification: NotificationRecord) -> None:
+        if self._is_suppressed():
+            return
+        with self._buffer_lock:
+            self._pending_deletes.pop(notification.id, None)
+            self._pending_upserts[notification.id] = notification
+            self._maybe_wakeup()
+
+    def _maybe_wakeup(self) -> None:
+        if len(self._pending_upserts) + len(self._pending_deletes) >= self.max_batch:
+            self._wakeup.set()
+
+    def _requeue(self, upserts, deletes, subscriptions, configs) -> None:
+        with self._buffer_lock:
+            for notification_id, notification in upserts.items():
+                if notification_id not in self._pending_deletes:
+                    self._pending_upserts.setdefault(notification_id, notification)
+            for notification_id in deletes:
+                if notification_id not in self._pending_upserts:
+                    self._pending_deletes[notification_id] = None
+            for subscription_id, subscription in subscriptions.items():
+                self._pending_subscriptions.setdefault(subscription_id, subscription)
+            for user_id, config in configs.items():
+                self._pending_configs.setdefault(user_id, config)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+def _row_from_record(record: NotificationRecord) -> tuple:
+    return (
+        record.id, record.user_id, record.title, record.message,
+        record.type.value, record.priority.value, record.status.value,
+        json.dumps(record.data) if record.data else None,
+        record.action_url, record.icon, record.image_url,
+        record.scheduled_at, record.sent_at, record.read_at,
+        record.created_at, record.updated_at, record.revision, record.origin
+    )
+
+def _record_from_row(row: tuple) -> NotificationRecord:
+    return NotificationRecord(
+        id=row[0], user_id=row[1], title=row[2], message=row[3],
+        type=NotificationType(row[4]),
+        priority=NotificationPriority(row[5]),
+        status=NotificationStatus(row[6]),
+        data=json.loads(row[7]) if row[7] else None,
+        action_url=row[8] or "", icon=row[9] or "", image_url=row[10] or "",
+        scheduled_at=row[11], sent_at=row[12], read_at=row[13],
+        created_at=row[14], updated_at=row[15],
+        # Entradas antigas do change_log não têm revisão
+        revision=row[16] if len(row) > 16 else 0, origin=row[17] if len(row) > 17 else ""
+    )
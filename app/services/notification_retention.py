@@ -0,0 +1,283 @@
+# 🗄️ Retenção, Expiração e Arquivamento de Notificações
+
+import atexit
+import gzip
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, um único processo deve arquivar
+    fcntl = None
+
+from app.models.Notification import (
+    NotificationRecord, NotificationStatus, NotificationType, now_ms
+)
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# (tipo, status) -> dias desde a última atualização; None funciona como curinga.
+# A regra mais específica vence: (tipo, status) > (tipo, None) > (None, status) > (None, None)
+# Por padrão só expiram notificações lidas ou que falharam; pendentes (inclusive
+# agendadas) e enviadas ficam até a usuária agir sobre elas.
+DEFAULT_RETENTION_DAYS = {
+    (NotificationType.SISTEMA, NotificationStatus.LIDA): 30,
+    (NotificationType.MARKETING, NotificationStatus.LIDA): 30,
+    (None, NotificationStatus.LIDA): 90,
+    (None, NotificationStatus.FALHADA): 30
+}
+
+def parse_retention_rules(text: str) -> Dict[Tuple, Optional[int]]:
+    """Lê regras no formato "tipo:status=dias" separadas por vírgula (ValueError se inválido)
+
+    "*" é curinga e "never" desliga a expiração, ex.:
+    "marketing:lida=15,*:enviada=180,pagamento:*=never".
+    """
+    rules: Dict[Tuple, Optional[int]] = {}
+    for rule in filter(None, (part.strip() for part in text.split(","))):
+        key, separator, days = rule.partition("=")
+        notification_type, colon, status = key.strip().partition(":")
+        if not separator or not colon:
+            raise ValueError(f"regra de retenção inválida: {rule!r} (use tipo:status=dias)")
+        days = days.strip()
+        if days == "never":
+            ttl = None
+        elif days.isdigit() and int(days) > 0:
+            ttl = int(days)
+        else:
+            raise ValueError(f"dias inválidos na regra {rule!r}")
+        rules[(
+            None if notification_type.strip() == "*" else NotificationType(notification_type.strip()),
+            None if status.strip() == "*" else NotificationStatus(status.strip())
+        )] = ttl
+    return rules
+
+class RetentionPolicy:
+    """TTL por tipo e status, pré-calculado para consulta em O(1)"""
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """Padrões com as regras de NOTIFICATIONS_RETENTION_DAYS aplicadas por cima"""
+        return cls({
+            **DEFAULT_RETENTION_DAYS,
+            **parse_retention_rules(os.environ.get('NOTIFICATIONS_RETENTION_DAYS', ''))
+        })
+
+    def __init__(self, rules: Optional[Dict[Tuple, Optional[int]]] = None):
+        rules = DEFAULT_RETENTION_DAYS if rules is None else rules
+        self._ttl_ms: Dict[Tuple[NotificationType, NotificationStatus], Optional[int]] = {}
+        for notification_type in NotificationType:
+            for status in NotificationStatus:
+                days = None
+                for key in ((notification_type, status), (notification_type, None), (None, status), (None, None)):
+                    if key in rules:
+                        days = rules[key]
+                        break
+                self._ttl_ms[(notification_type, status)] = days * DAY_MS if days is not None else None
+
+    def expires_at(self, notification: NotificationRecord) -> Optional[int]:
+        """Instante (epoch ms) em que a notificação expira; None se nunca expira"""
+        ttl = self._ttl_ms[(notification.type, notification.status)]
+        if ttl is None:
+            return None
+        return notification.updated_at + ttl
+
+    def is_expired(self, notification: NotificationRecord, now: int) -> bool:
+        expires_at = self.expires_at(notification)
+        return expires_at is not None and expires_at <= now
+
+class SegmentArchive:
+    """Arquivo frio em segmentos gzip NDJSON somente-anexação
+
+    Cada `append` grava um membro gzip no segmento atual (gzip aceita membros
+    concatenados); ao passar de `max_segment_bytes` um novo segmento é aberto.
+    Um manifesto guarda os usuários e o intervalo de datas de cada segmento
+    para que as consultas só descompactem os segmentos relevantes. Vários
+    processos podem anexar: cada `append` relê o manifesto sob um flock.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_segment_bytes: int = 8 * 1024 * 1024):
+        self.directory = directory or os.environ.get('NOTIFICATIONS_ARCHIVE_DIR', 'notifications_archive')
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._manifest_path = os.path.join(self.directory, 'manifest.json')
+        self._lock_path = os.path.join(self.directory, 'manifest.lock')
+        self._manifest: Dict[str, Dict] = {}
+        self._manifest_mtime = None
+        self._reload_manifest()
+
+    def append(self, notifications: List[NotificationRecord]) -> int:
+        """Anexa notificações ao segmento atual; retorna quantas foram gravadas"""
+        if not notifications:
+            return 0
+        lines = [
+            json.dumps({**n.to_dict(), "created_ms": n.created_at}, ensure_ascii=False, separators=(',', ':'))
+            for n in notifications
+        ]
+        member = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+
+        with self._lock, self._exclusive():
+            # Outro worker pode ter anexado desde a última leitura
+            self._reload_manifest(force=True)
+            segment = self._current_segment(len(member))
+            with open(os.path.join(self.directory, segment), 'ab') as segment_file:
+                segment_file.write(member)
+                segment_file.flush()
+                os.fsync(segment_file.fileno())
+
+            entry = self._manifest.setdefault(segment, {
+                "users": [], "count": 0, "bytes": 0, "min_created": None, "max_created": None
+            })
+            users = set(entry["users"])
+            users.update(n.user_id for n in notifications)
+            created = [n.created_at for n in notifications]
+            entry["users"] = sorted(users)
+            entry["count"] += len(notifications)
+            entry["bytes"] += len(member)
+            entry["min_created"] = min(filter(None, [entry["min_created"], min(created)]))
+            entry["max_created"] = max(filter(None, [entry["max_created"], max(created)]))
+            self._write_manifest()
+        return len(notifications)
+
+    def query(self, user_id: str, limit: int = 50, before: Optional[int] = None) -> List[Dict]:
+        """Histórico arquivado de um usuário, mais recentes primeiro"""
+        with self._lock:
+            self._reload_manifest()
+            segments = [
+                (name, entry) for name, entry in sorted(self._manifest.items(), reverse=True)
+                if user_id in entry["users"] and (before is None or entry["min_created"] < before)
+            ]
+
+        found: List[Dict] = []
+        for name, entry in segments:
+            with gzip.open(os.path.join(self.directory, name), 'rt', encoding='utf-8') as segment_file:
+                for line in segment_file:
+                    item = json.loads(line)
+                    if item["user_id"] == user_id and (before is None or item["created_ms"] < before):
+                        found.append(item)
+            # Segmentos são anexados em ordem; um segmento inteiro mais antigo que
+            # o limite já coletado não pode trazer itens mais recentes
+            if len(found) >= limit:
+                found.sort(key=lambda item: item["created_ms"], reverse=True)
+                found = found[:limit]
+                older = [e for n, e in segments if n < name]
+                if all(e["max_created"] < found[-1]["created_ms"] for e in older):
+                    break
+        found.sort(key=lambda item: item["created_ms"], reverse=True)
+        return found[:limit]
+
+    def _current_segment(self, incoming: int) -> str:
+        if self._manifest:
+            last = max(self._manifest)
+            if self._manifest[last]["bytes"] + incoming <= self.max_segment_bytes:
+                return last
+            number = int(last.split('-')[1].split('.')[0]) + 1
+        else:
+            number = 1
+        return f"segment-{number:06d}.ndjson.gz"
+
+    @contextmanager
+    def _exclusive(self):
+        """Lock de arquivo entre processos em torno da escrita de segmento e manifesto"""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, 'a+') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reload_manifest(self, force: bool = False) -> None:
+        # Outros workers anexam (retenção no líder, bulk archive em qualquer um): relê se mudou
+        try:
+            mtime = os.stat(self._manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if force or mtime != self._manifest_mtime:
+            with open(self._manifest_path, encoding='utf-8') as manifest_file:
+                self._manifest = json.load(manifest_file)
+            self._manifest_mtime = mtime
+
+    def _write_manifest(self) -> None:
+        temporary = self._manifest_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as manifest_file:
+            json.dump(self._manifest, manifest_file)
+        os.replace(temporary, self._manifest_path)
+        self._manifest_mtime = os.stat(self._manifest_path).st_mtime_ns
+
+class RetentionSweeper:
+    """Varredura incremental que arquiva e remove notificações expiradas
+
+    A cada `interval` segundos examina no máximo `step_size` notificações,
+    segurando o lock do store só durante cada bloco, e continua do ponto em
+    que parou (usuário e chave) no passo seguinte.
+    """
+
+    def __init__(self, store, policy: RetentionPolicy, archive: SegmentArchive,
+                 step_size: int = 200, interval: float = 1.0):
+        self.store = store
+        self.policy = policy
+        self.archive = archive
+        self.step_size = step_size
+        self.interval = interval
+        self._users: List[str] = []
+        self._user_index = 0
+        self._after = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="notification-retention", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def step(self, now: Optional[int] = None) -> int:
+        """Executa um passo da varredura; retorna quantas notificações foram arquivadas"""
+        now = now or now_ms()
+        if self._user_index >= len(self._users):
+            # Início de uma nova passada
+            self._users = self.store.user_ids()
+            self._user_index = 0
+            self._after = None
+            if not self._users:
+                return 0
+
+        budget = self.step_size
+        expired: List[NotificationRecord] = []
+        while budget > 0 and self._user_index < len(self._users):
+            block, next_key = self.store.scan_user(self._users[self._user_index], self._after, budget)
+            budget -= max(len(block), 1)
+            expired.extend(n for n in block if self.policy.is_expired(n, now))
+            if next_key is None:
+                self._user_index += 1
+                self._after = None
+            else:
+                self._after = next_key
+
+        return self.archive_and_remove(expired)
+
+    def archive_and_remove(self, notifications: List[NotificationRecord]) -> int:
+        """Grava as notificações no arquivo frio e as remove do store"""
+        if not notifications:
+            return 0
+        self.archive.append(notifications)
+        for notification in notifications:
+            self.store.remove(notification.id)
+        return len(notifications)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.step()
+            except Exception as e:
+                print(f"Erro na varredura de retenção: {e}")
@@ -0,0 +1,116 @@
+# 📊 Rollups Incrementais de Notificações
+
+import threading
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+
+class DayBucket:
+    """Contadores pré-agregados de um usuário em um dia"""
+
+    __slots__ = ("count", "by_type", "by_status", "by_priority")
+
+    def __init__(self):
+        self.count = 0
+        self.by_type: Dict = {}
+        self.by_status: Dict = {}
+        self.by_priority: Dict = {}
+
+class NotificationRollups:
+    """Mantém contadores por usuário e por dia, atualizados a cada evento do store
+
+    Uma consulta de N dias soma no máximo N buckets, independente do total de
+    notificações armazenadas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Dict[str, DayBucket]] = {}
+
+    def on_insert(self, notification: NotificationRecord) -> None:
+        with self._lock:
+            bucket = self._bucket(notification, create=True)
+            bucket.count += 1
+            _incr(bucket.by_type, notification.type, 1)
+            _incr(bucket.by_status, notification.status, 1)
+            _incr(bucket.by_priority, notification.priority, 1)
+
+    def on_status_change(self, notification: NotificationRecord, old_status: NotificationStatus) -> None:
+        with self._lock:
+            bucket = self._bucket(notification)
+            if bucket is None:
+                return
+            _incr(bucket.by_status, old_status, -1)
+            _incr(bucket.by_status, notification.status, 1)
+
+    def on_remove(self, notification: NotificationRecord) -> None:
+        with self._lock:
+            bucket = self._bucket(notification)
+            if bucket is None:
+                return
+            bucket.count -= 1
+            _incr(bucket.by_type, notification.type, -1)
+            _incr(bucket.by_status, notification.status, -1)
+            _incr(bucket.by_priority, notification.priority, -1)
+            if bucket.count <= 0:
+                user_buckets = self._buckets[notification.user_id]
+                del user_buckets[_day_key(notification)]
+
+    def stats(self, user_id: str, days: int, today: Optional[date] = None) -> Dict:
+        """Soma os buckets dos últimos `days` dias (incluindo hoje)"""
+        today = today or date.today()
+        first_day = (today - timedelta(days=max(days, 1) - 1)).isoformat()
+        stats = {
+            "total": 0,
+            "by_type": {},
+            "by_status": {},
+            "by_priority": {},
+            "daily_count": {}
+        }
+
+        with self._lock:
+            user_buckets = self._buckets.get(user_id, {})
+            if days < len(user_buckets):
+                day_keys = [(today - timedelta(days=offset)).isoformat() for offset in range(days)]
+            else:
+                day_keys = [day for day in user_buckets if day >= first_day]
+
+            for day in sorted(day_keys):
+                bucket = user_buckets.get(day)
+                if bucket is None or bucket.count <= 0:
+                    continue
+                stats["total"] += bucket.count
+                stats["daily_count"][day] = bucket.count
+                _merge(stats["by_type"], bucket.by_type)
+                _merge(stats["by_status"], bucket.by_status)
+                _merge(stats["by_priority"], bucket.by_priority)
+
+        return stats
+
+    def _bucket(self, notification: NotificationRecord, create: bool = False) -> Optional[DayBucket]:
+        user_buckets = self._buckets.get(notification.user_id)
+        if user_buckets is None:
+            if not create:
+                return None
+            user_buckets = self._buckets.setdefault(notification.user_id, {})
+        day = _day_key(notification)
+        bucket = user_buckets.get(day)
+        if bucket is None and create:
+            bucket = user_buckets[day] = DayBucket()
+        return bucket
+
+def _day_key(notification: NotificationRecord) -> str:
+    return date.fromtimestamp(notification.created_at / 1000).isoformat()
+
+def _incr(counter: Dict, key, delta: int) -> None:
+    value = counter.get(key, 0) + delta
+    if value > 0:
+        counter[key] = value
+    else:
+        counter.pop(key, None)
+
+def _merge(target: Dict[str, int], source: Dict) -> None:
+    # Chaves dos buckets são enums; a saída usa o valor textual
+    for key, value in source.items():
+        target[key.value] = target.get(key.value, 0) + value
@@ -0,0 +1,95 @@
+# ⏰ Agendador de Notificações
+
+import atexit
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, List, Optional
+
+from app.models.Notification import now_ms
+
+class TimerScheduler:
+    """Agenda callbacks por chave em um min-heap com cancelamento preguiçoso
+
+    Inserir, reagendar e cancelar custam O(log n); entradas canceladas ficam no
+    heap marcadas como removidas e são descartadas ao chegar ao topo (ou numa
+    compactação quando passam de metade do heap). Uma única thread dorme até o
+    próximo vencimento e executa o callback fora do lock.
+    """
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="notification-scheduler", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def schedule(self, key: str, due_ms: int, callback: Callable[[], None]) -> None:
+        """Agenda (ou reagenda) o callback da chave para o instante `due_ms`"""
+        with self._cond:
+            self._cancel_locked(key)
+            entry = [due_ms, next(self._counter), key, callback]
+            self._entries[key] = entry
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                self._cond.notify()
+
+    def cancel(self, key: str) -> bool:
+        """Cancela o agendamento da chave; False se não havia nenhum"""
+        with self._cond:
+            return self._cancel_locked(key)
+
+    def due_at(self, key: str) -> Optional[int]:
+        """Instante agendado para a chave, se houver"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def _cancel_locked(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[3] = None
+        self._cancelled += 1
+        if self._cancelled > len(self._heap) // 2:
+            self._heap = [item for item in self._heap if item[3] is not None]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                callback = None
+                while self._running:
+                    while self._heap and self._heap[0][3] is None:
+                        heapq.heappop(self._heap)
+                        self._cancelled -= 1
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - now_ms()
+                    if delay > 0:
+                        self._cond.wait(delay / 1000)
+                        continue
+                    entry = heapq.heappop(self._heap)
+                    del self._entries[entry[2]]
+                    callback = entry[3]
+                    break
+                if not self._running:
+                    return
+            try:
+                callback()
+            except Exception as e:
+                print(f"Erro ao executar agendamento: {e}")
@@ -0,0 +1,175 @@
+# 🔎 Índice de Busca Textual das Notificações
+
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Peso de um termo por campo: título vale mais que a mensagem
+TITLE_WEIGHT = 2
+MESSAGE_WEIGHT = 1
+
+def fold(text: str) -> str:
+    """Minúsculas sem acentos (ex.: Sessão Família -> sessao familia); None vira vazio"""
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(fold(text))
+
+def _weighted_terms(notification: NotificationRecord) -> Dict[str, int]:
+    terms: Dict[str, int] = {}
+    for term in tokenize(notification.message):
+        terms[term] = MESSAGE_WEIGHT
+    for term in tokenize(notification.title):
+        terms[term] = terms.get(term, 0) | TITLE_WEIGHT
+    return terms
+
+def _score_word(word: str, matching: List[Tuple[str, Dict[str, int]]],
+                scores: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """Pontua os documentos que contêm algum termo começando com `word`
+
+    Termo exato vale o dobro de um termo que só começa com a palavra. Com
+    `scores` (palavras anteriores) só os candidatos restantes são mantidos,
+    percorrendo o lado menor: os candidatos ou as listas de postings.
+    """
+    matches: Dict[str, int] = {}
+    if scores is not None and len(scores) * len(matching) < sum(len(posting) for _, posting in matching):
+        for notification_id, previous in scores.items():
+            best = 0
+            for term, posting in matching:
+                weight = posting.get(notification_id)
+                if weight:
+                    best = max(best, weight * (2 if term == word else 1))
+            if best:
+                matches[notification_id] = previous + best
+        return matches
+
+    for term, posting in matching:
+        boost = 2 if term == word else 1
+        if not matches and scores is None:
+            matches = {notification_id: weight * boost for notification_id, weight in posting.items()}
+            continue
+        for notification_id, weight in posting.items():
+            score = weight * boost
+            if score > matches.get(notification_id, 0):
+                matches[notification_id] = score
+    if scores is not None:
+        matches = {
+            notification_id: score + scores[notification_id]
+            for notification_id, score in matches.items() if notification_id in scores
+        }
+    return matches
+
+class NotificationSearchIndex:
+    """Índice invertido por usuário sobre título e mensagem, mantido pelos eventos do store
+
+    Cada termo aponta para {id: peso}; os termos de cada usuário ficam também em
+    uma lista ordenada, então um prefixo vira um intervalo encontrado por
+    bisseção. A busca faz AND entre as palavras da consulta, todas tratadas
+    como prefixo, e ordena por relevância e depois pelas mais recentes.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._documents: Dict[str, Dict[str, int]] = {}
+        self._created: Dict[str, int] = {}
+
+    # Eventos do NotificationStore
+
+    def on_insert(self, notification: NotificationRecord) -> None:
+        with self._lock:
+            self._index(notification, _weighted_terms(notification))
+
+    def on_status_change(self, notification: NotificationRecord, old_status: NotificationStatus) -> None:
+        # Título e mensagem só mudam em réplicas de outros workers; reindexa se for o caso
+        terms = _weighted_terms(notification)
+        with self._lock:
+            if self._documents.get(notification.id) != terms:
+                self._unindex(notification)
+                self._index(notification, terms)
+
+    def on_remove(self, notification: NotificationRecord) -> None:
+        with self._lock:
+            self._unindex(notification)
+
+    # Consulta
+
+    def search(self, user_id: str, query: str, limit: int = 20, offset: int = 0,
+               status: Optional[NotificationStatus] = None) -> Tuple[List[NotificationRecord], int]:
+        """Retorna (página de resultados, total de resultados)"""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return [], 0
+
+        with self._lock:
+            postings = self._postings.get(user_id, {})
+            terms = self._terms.get(user_id, [])
+            candidates = []
+            for word in words:
+                start = bisect_left(terms, word)
+                end = bisect_left(terms, word + "\uffff", start)
+                matching = [(term, postings[term]) for term in terms[start:end]]
+                candidates.append((sum(len(posting) for _, posting in matching), word, matching))
+
+            # A palavra mais seletiva primeiro encolhe os candidatos cedo
+            scores: Optional[Dict[str, int]] = None
+            for _, word, matching in sorted(candidates):
+                scores = _score_word(word, matching, scores)
+                if not scores:
+                    return [], 0
+            created = self._created
+
+            if status is not None:
+                get = self.store.get
+                scores = {
+                    notification_id: score for notification_id, score in scores.items()
+                    if getattr(get(notification_id), "status", None) == status
+                }
+            # Só a página pedida é ordenada: relevância e, no empate, as mais recentes
+            top = heapq.nlargest(offset + limit, scores, key=lambda i: (scores[i], created[i]))
+
+        page = (self.store.get(notification_id) for notification_id in top[offset:])
+        return [notification for notification in page if notification is not None], len(scores)
+
+    def _index(self, notification: NotificationRecord, terms: Dict[str, int]) -> None:
+        postings = self._postings.setdefault(notification.user_id, {})
+        sorted_terms = self._terms.setdefault(notification.user_id, [])
+        for term, weight in terms.items():
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = {}
+                insort(sorted_terms, term)
+            posting[notification.id] = weight
+        self._documents[notification.id] = terms
+        self._created[notification.id] = notification.created_at
+
+    def _unindex(self, notification: NotificationRecord) -> None:
+        terms = self._documents.pop(notification.id, None)
+        self._created.pop(notification.id, None)
+        if not terms:
+            return
+        postings = self._postings.get(notification.user_id, {})
+        sorted_terms = self._terms.get(notification.user_id, [])
+        for term in terms:
+            posting = postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(notification.id, None)
+            if not posting:
+                del postings[term]
+                index = bisect_left(sorted_terms, term)
+                if index < len(sorted_terms) and sorted_terms[index] == term:
+                    del sorted_terms[index]
@@ -0,0 +1,157 @@
+# 🔄 Estado Compartilhado entre Workers (múltiplos processos)
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, cada processo se considera líder
+    fcntl = None
+
+from app.models.Notification import NotificationRecord
+
+# Campos de uma notificação que podem mudar depois da criação
+MUTABLE_FIELDS = tuple(
+    field for field in NotificationRecord.__slots__
+    if not field.startswith("_") and field not in ("id", "user_id", "status", "created_at")
+)
+
+def backend_from_env() -> str:
+    """Backend de estado configurado: `local` (padrão, um processo) ou `sqlite`"""
+    return os.environ.get('NOTIFICATIONS_STATE_BACKEND', 'local').lower()
+
+class LeaderLock:
+    """Lock de arquivo (flock) que elege um único processo líder no host
+
+    O líder executa as tarefas que não podem rodar em todos os workers
+    (reagendamento na inicialização e varredura de retenção).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_leader = False
+        self._file = None
+
+    def try_acquire(self) -> bool:
+        if self.is_leader:
+            return True
+        if fcntl is None:
+            self.is_leader = True
+            return True
+        if self._file is None:
+            self._file = open(self.path, 'a+')
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self.is_leader = True
+        return True
+
+class SQLiteChangeFeed:
+    """Replica no store local as mudanças gravadas por outros processos
+
+    Cada worker mantém o estado completo em memória e lê localmente; as
+    escritas vão para o SQLite pelo repositório, que também registra cada
+    mudança no change_log. Esta thread observa `PRAGMA data_version` (barato,
+    lido da memória compartilhada do WAL) e, quando outro processo faz commit,
+    aplica as novas entradas do log no store, disparando os mesmos listeners
+    (rollups, SSE, ETags) de uma mudança local.
+
+    Mudanças concorrentes no mesmo registro são resolvidas por (revision,
+    origin): cada mutação local avança a revisão, e uma mudança remota só é
+    aplicada se for maior que a do registro local. Todos os workers e o SQLite
+    escolhem a mesma versão, independente da ordem dos flushes.
+    """
+
+    def __init__(self, repository, store, handlers: Optional[Dict[str, Callable]] = None,
+                 poll_interval: float = 0.02, leader_lock: Optional[LeaderLock] = None,
+                 on_leader: Optional[Callable[[], None]] = None):
+        self.repository = repository
+        self.store = store
+        self.handlers = handlers or {}
+        self.poll_interval = poll_interval
+        self.leader_lock = leader_lock
+        self.on_leader = on_leader
+        self.last_seq = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def start(self, after_seq: int) -> None:
+        """Começa a aplicar as mudanças com sequência maior que `after_seq`"""
+        if self._thread is not None:
+            return
+        self.last_seq = after_seq
+        self._conn = sqlite3.connect(self.repository.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._check_leadership()
+        self._thread = threading.Thread(target=self._run, name="notification-change-feed", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def poll(self) -> int:
+        """Aplica as mudanças pendentes; retorna quantas foram aplicadas"""
+        applied = 0
+        while True:
+            changes = self.repository.read_changes(self._conn, self.last_seq)
+            if not changes:
+                return applied
+            with self.repository.suppressed():
+                for seq, kind, key, payload in changes:
+                    try:
+                        self._apply(kind, key, payload)
+                    except (ValueError, KeyError) as e:
+                        print(f"Erro ao aplicar mudança {seq} ({kind}): {e}")
+                    self.last_seq = seq
+            applied += len(changes)
+
+    def _apply(self, kind: str, key: str, payload: Optional[str]) -> None:
+        if kind == "notification":
+            value = self.repository.decode_notification(payload)
+            existing = self.store.get(key)
+            if existing is None:
+                self.store.insert(value)
+            elif (value.revision, value.origin) > (existing.revision, existing.origin):
+                self.store.set_status(
+                    key, value.status, **{field: getattr(value, field) for field in MUTABLE_FIELDS}
+                )
+            else:
+                # Versão antiga ou a mesma que já está aplicada
+                return
+        elif kind == "notification_delete":
+            value = self.store.remove(key)
+        else:
+            value = json.loads(payload)
+        handler = self.handlers.get(kind)
+        if handler is not None:
+            handler(key, value)
+
+    def _check_leadership(self) -> None:
+        if self.leader_lock is None or self.leader_lock.is_leader:
+            return
+        if self.leader_lock.try_acquire() and self.on_leader is not None:
+            self.on_leader()
+
+    def _run(self) -> None:
+        data_version = None
+        ticks = 0
+        while not self._stop.wait(self.poll_interval):
+            try:
+                current = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                if current != data_version:
+                    data_version = current
+                    self.poll()
+                # Seguidores tentam assumir a liderança a cada ~1s (líder encerrado)
+                ticks += 1
+                if ticks * self.poll_interval >= 1.0:
+                    ticks = 0
+                    self._check_leadership()
+            except sqlite3.Error as e:
+                print(f"Erro ao ler mudanças de outros workers: {e}")
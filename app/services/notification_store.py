@@ -0,0 +1,253 @@
+# 🔔 Store de Notificações em Memória
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.models.Notification import NotificationPriority, NotificationRecord, NotificationStatus, NotificationType
+
+SortKey = Tuple[int, str]
+
+class NotificationStore:
+    """Armazena notificações com índices por id, por usuário e por (usuário, status)
+
+    Os índices secundários são listas de chaves (created_at, id) ordenadas, o que
+    permite paginação por cursor e contagens em O(1) pelo tamanho de cada índice.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Índice primário: id -> notificação
+        self._by_id: Dict[str, NotificationRecord] = {}
+        # Índices secundários ordenados por (created_at, id)
+        self._by_user: Dict[str, List[SortKey]] = {}
+        self._by_user_status: Dict[Tuple[str, NotificationStatus], List[SortKey]] = {}
+        # Listeners recebem on_insert / on_status_change / on_remove
+        self._listeners: List = []
+        # Identificação deste processo gravada em `origin` a cada mutação local
+        self.origin = ""
+
+    def add_listener(self, listener) -> None:
+        """Registra um objeto notificado a cada inserção, mudança de status ou remoção"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    @staticmethod
+    def sort_key(notification: NotificationRecord) -> SortKey:
+        """Chave de ordenação usada pelos índices e pelos cursores"""
+        return (notification.created_at, notification.id)
+
+    def insert(self, notification: NotificationRecord) -> NotificationRecord:
+        """Insere uma notificação e atualiza todos os índices (ValueError se inválida)"""
+        _check(notification)
+        with self._lock:
+            notification_id = notification.id
+            if notification_id in self._by_id:
+                self.remove(notification_id)
+            self._by_id[notification_id] = notification
+            self._index(notification)
+            for listener in self._listeners:
+                listener.on_insert(notification)
+            return notification
+
+    def insert_many(self, notifications: List[NotificationRecord]) -> None:
+        """Insere várias notificações de uma vez"""
+        with self._lock:
+            for notification in notifications:
+                self.insert(notification)
+
+    def get(self, notification_id: str) -> Optional[NotificationRecord]:
+        """Busca uma notificação pelo id em O(1)"""
+        return self._by_id.get(notification_id)
+
+    def remove(self, notification_id: str) -> Optional[NotificationRecord]:
+        """Remove uma notificação de todos os índices"""
+        with self._lock:
+            notification = self._by_id.pop(notification_id, None)
+            if notification is not None:
+                self._unindex(notification)
+                for listener in self._listeners:
+                    listener.on_remove(notification)
+            return notification
+
+    def set_status(self, notification_id: str, status: NotificationStatus, **fields) -> Optional[NotificationRecord]:
+        """Altera o status (e campos extras) de uma notificação mantendo os índices"""
+        with self._lock:
+            notification = self._by_id.get(notification_id)
+            if notification is None:
+                return None
+            user_id = notification.user_id
+            old_status = notification.status
+            key = self.sort_key(notification)
+            _discard(self._by_user_status.get((user_id, old_status)), key)
+            notification.status = status
+            _assign(notification, fields, self.origin)
+            insort(self._by_user_status.setdefault((user_id, status), []), key)
+            for listener in self._listeners:
+                listener.on_status_change(notification, old_status)
+            return notification
+
+    def update_fields(self, notification_id: str, **fields) -> Optional[NotificationRecord]:
+        """Atualiza campos de uma notificação mantendo o status atual"""
+        with self._lock:
+            notification = self._by_id.get(notification_id)
+            if notification is None:
+                return None
+            return self.set_status(notification_id, notification.status, **fields)
+
+    def set_status_many(self, notification_ids: Iterable[str], status: NotificationStatus,
+                        from_status: Optional[NotificationStatus] = None, **fields) -> int:
+        """Altera o status de várias notificações sob um único lock; retorna quantas mudaram
+
+        Com `from_status` só mudam as que ainda estão nesse status (as demais
+        foram alteradas por outra requisição e são mantidas).
+        """
+        changed = 0
+        with self._lock:
+            for notification_id in notification_ids:
+                notification = self._by_id.get(notification_id)
+                if notification is None or notification.status == status:
+                    continue
+                if from_status is not None and notification.status != from_status:
+                    continue
+                self.set_status(notification_id, status, **fields)
+                changed += 1
+        return changed
+
+    def remove_many(self, notification_ids: Iterable[str]) -> int:
+        """Remove várias notificações sob um único lock; retorna quantas existiam"""
+        with self._lock:
+            return sum(1 for notification_id in notification_ids if self.remove(notification_id) is not None)
+
+    def set_status_for_user(self, user_id: str, from_status: NotificationStatus,
+                            to_status: NotificationStatus, **fields) -> int:
+        """Altera o status de todas as notificações do usuário em um status específico"""
+        with self._lock:
+            keys = self._by_user_status.pop((user_id, from_status), None)
+            if not keys or from_status == to_status:
+                if keys:
+                    self._by_user_status[(user_id, from_status)] = keys
+                return 0
+            for _, notification_id in keys:
+                notification = self._by_id[notification_id]
+                notification.status = to_status
+                _assign(notification, fields, self.origin)
+                for listener in self._listeners:
+                    listener.on_status_change(notification, from_status)
+            # As duas listas já estão ordenadas: o timsort faz o merge em tempo linear
+            target = self._by_user_status.get((user_id, to_status), [])
+            self._by_user_status[(user_id, to_status)] = sorted(target + keys)
+            return len(keys)
+
+    def list_for_user(self, user_id: str, status: Optional[NotificationStatus] = None) -> List[NotificationRecord]:
+        """Lista notificações de um usuário (custo proporcional aos dados do usuário)"""
+        with self._lock:
+            return [self._by_id[key[1]] for key in self._keys(user_id, status)]
+
+    def page_for_user(self, user_id: str, status: Optional[NotificationStatus] = None, limit: int = 20,
+                      after: Optional[SortKey] = None,
+                      offset: int = 0) -> Tuple[List[NotificationRecord], Optional[SortKey]]:
+        """Retorna uma página (mais recentes primeiro) e a chave do último item
+
+        Com `after` a busca é feita por bisseção no índice (keyset); o custo da
+        página é O(log n + limit), independente da profundidade.
+        """
+        with self._lock:
+            keys = self._keys(user_id, status)
+            end = bisect_left(keys, after) if after is not None else len(keys) - offset
+            start = max(end - limit, 0)
+            if end <= 0:
+                return [], None
+            page_keys = keys[start:end]
+            if not page_keys:
+                return [], None
+            page_keys.reverse()
+            next_key = page_keys[-1] if start > 0 else None
+            return [self._by_id[key[1]] for key in page_keys], next_key
+
+    def select_for_user(self, user_id: str, status: Optional[NotificationStatus] = None,
+                        created_before: Optional[int] = None,
+                        predicate: Optional[Callable[[NotificationRecord], bool]] = None) -> List[NotificationRecord]:
+        """Notificações do usuário por status e/ou criadas antes de um instante
+
+        O corte por `created_before` é uma bisseção no índice; `predicate` só é
+        avaliado sobre as chaves que restam.
+        """
+        with self._lock:
+            keys = self._keys(user_id, status)
+            end = bisect_left(keys, (created_before, "")) if created_before is not None else len(keys)
+            selected = [self._by_id[key[1]] for key in keys[:end]]
+        if predicate is not None:
+            selected = [notification for notification in selected if predicate(notification)]
+        return selected
+
+    def user_ids(self) -> List[str]:
+        """Usuários com notificações no store"""
+        with self._lock:
+            return [user_id for user_id, keys in self._by_user.items() if keys]
+
+    def scan_user(self, user_id: str, after: Optional[SortKey] = None,
+                  limit: int = 100) -> Tuple[List[NotificationRecord], Optional[SortKey]]:
+        """Percorre as notificações de um usuário da mais antiga para a mais nova
+
+        Retorna o bloco e a chave para continuar (None quando terminou); a chave
+        continua válida mesmo se houver remoções entre as chamadas.
+        """
+        with self._lock:
+            keys = self._by_user.get(user_id, [])
+            start = bisect_right(keys, after) if after is not None else 0
+            block = keys[start:start + limit]
+            next_key = block[-1] if start + limit < len(keys) else None
+            return [self._by_id[key[1]] for key in block], next_key
+
+    def count(self, user_id: str, status: Optional[NotificationStatus] = None) -> int:
+        """Conta notificações de um usuário, opcionalmente por status, em O(1)"""
+        return len(self._keys(user_id, status))
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _keys(self, user_id: str, status: Optional[NotificationStatus]) -> List[SortKey]:
+        if status is None:
+            return self._by_user.get(user_id, [])
+        return self._by_user_status.get((user_id, status), [])
+
+    def _index(self, notification: NotificationRecord) -> None:
+        user_id = notification.user_id
+        key = self.sort_key(notification)
+        insort(self._by_user.setdefault(user_id, []), key)
+        insort(self._by_user_status.setdefault((user_id, notification.status), []), key)
+
+    def _unindex(self, notification: NotificationRecord) -> None:
+        user_id = notification.user_id
+        key = self.sort_key(notification)
+        _discard(self._by_user.get(user_id), key)
+        _discard(self._by_user_status.get((user_id, notification.status)), key)
+
+def _check(notification: NotificationRecord) -> None:
+    """Valida os campos usados pelos índices e listeners antes de tocar em qualquer um deles"""
+    for name in ("id", "user_id", "title", "message"):
+        if not isinstance(getattr(notification, name), str):
+            raise ValueError(f"{name} deve ser texto: {getattr(notification, name)!r}")
+    for name, enum in (("type", NotificationType), ("priority", NotificationPriority), ("status", NotificationStatus)):
+        if not isinstance(getattr(notification, name), enum):
+            raise ValueError(f"{name} inválido: {getattr(notification, name)!r}")
+    if not isinstance(notification.created_at, int) or isinstance(notification.created_at, bool):
+        raise ValueError(f"created_at inválido: {notification.created_at!r}")
+
+def _assign(notification: NotificationRecord, fields: Dict, origin: str) -> None:
+    for name, value in fields.items():
+        setattr(notification, name, value)
+    # Mudança local avança a revisão; uma vinda de outro worker já traz a sua
+    if "revision" not in fields:
+        notification.revision += 1
+        notification.origin = origin
+    notification.invalidate()
+
+def _discard(keys: Optional[List[SortKey]], key: SortKey) -> None:
+    """Remove uma chave de uma lista ordenada, se existir"""
+    if not keys:
+        return
+    index = bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        del keys[index]
@@ -0,0 +1,49 @@
+# 🏷️ Versões de Recursos para GET Condicional (ETag)
+
+import hashlib
+import threading
+import time
+from typing import Dict, Tuple
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+
+class ResourceVersions:
+    """Contador de versão por (recurso, usuário), alterado a cada mutação
+
+    As ETags combinam a época do processo (para não reaproveitar versões após
+    um reinício), o recurso, a versão e um hash da variante da consulta.
+    """
+
+    NOTIFICATIONS = "notifications"
+    CONFIG = "config"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._epoch = format(time.time_ns() // 1_000_000, "x")
+
+    def bump(self, resource: str, user_id: str) -> int:
+        with self._lock:
+            key = (resource, user_id)
+            version = self._versions.get(key, 0) + 1
+            self._versions[key] = version
+            return version
+
+    def get(self, resource: str, user_id: str) -> int:
+        return self._versions.get((resource, user_id), 0)
+
+    def etag(self, resource: str, user_id: str, variant: str = "") -> str:
+        """ETag forte (sem aspas) da versão atual do recurso"""
+        digest = hashlib.blake2b(f"{user_id}\0{variant}".encode("utf-8"), digest_size=8).hexdigest()
+        return f"{self._epoch}-{resource}-{self.get(resource, user_id)}-{digest}"
+
+    # Eventos do NotificationStore
+
+    def on_insert(self, notification: NotificationRecord) -> None:
+        self.bump(self.NOTIFICATIONS, notification.user_id)
+
+    def on_status_change(self, notification: NotificationRecord, old_status: NotificationStatus) -> None:
+        self.bump(self.NOTIFICATIONS, notification.user_id)
+
+    def on_remove(self, notification: NotificationRecord) -> None:
+        self.bump(self.NOTIFICATIONS, notification.user_id)
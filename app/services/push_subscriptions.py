@@ -0,0 +1,212 @@
+# 📲 Registro de Subscriptions e Envio Push em Lote
+
+import http.client
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from pywebpush import WebPusher
+    from py_vapid import Vapid
+except ImportError:  # Dependência opcional: sem ela o payload vai sem criptografia
+    WebPusher = None
+    Vapid = None
+
+class SubscriptionRegistry:
+    """Subscriptions de push indexadas por id, por endpoint (deduplicação) e por usuário"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, Dict] = {}
+        self._by_endpoint: Dict[str, str] = {}
+        self._by_user: Dict[str, Dict[str, Dict]] = {}
+
+    def register(self, subscription: Dict) -> Tuple[Dict, bool]:
+        """Registra a subscription; se o endpoint já existe, atualiza a existente
+
+        Retorna (subscription, criada).
+        """
+        with self._lock:
+            existing_id = self._by_endpoint.get(subscription["endpoint"])
+            if existing_id is None:
+                self._add(subscription)
+                return subscription, True
+
+            existing = self._by_id[existing_id]
+            self._by_user.get(existing["user_id"], {}).pop(existing_id, None)
+            existing.update({
+                "user_id": subscription["user_id"],
+                "keys": subscription["keys"],
+                "user_agent": subscription.get("user_agent", existing.get("user_agent", "")),
+                "active": True
+            })
+            self._by_user.setdefault(existing["user_id"], {})[existing_id] = existing
+            return existing, False
+
+    def load(self, subscriptions: List[Dict]) -> None:
+        """Carrega subscriptions persistidas"""
+        with self._lock:
+            for subscription in subscriptions:
+                if subscription["endpoint"] in self._by_endpoint:
+                    continue
+                self._add(subscription)
+
+    def apply(self, subscription: Dict) -> None:
+        """Substitui a versão local por uma já resolvida em outro processo"""
+        with self._lock:
+            existing = self._by_id.pop(subscription["id"], None)
+            if existing is not None:
+                self._by_endpoint.pop(existing["endpoint"], None)
+                self._by_user.get(existing["user_id"], {}).pop(existing["id"], None)
+            self._add(subscription)
+
+    def active_for_user(self, user_id: str) -> List[Dict]:
+        """Subscriptions ativas de um usuário"""
+        with self._lock:
+            return [s for s in self._by_user.get(user_id, {}).values() if s.get("active")]
+
+    def deactivate(self, endpoint: str) -> Optional[Dict]:
+        """Desativa a subscription de um endpoint (ex.: 404/410 do serviço de push)"""
+        with self._lock:
+            subscription_id = self._by_endpoint.get(endpoint)
+            if subscription_id is None:
+                return None
+            subscription = self._by_id[subscription_id]
+            subscription["active"] = False
+            return subscription
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _add(self, subscription: Dict) -> None:
+        self._by_id[subscription["id"]] = subscription
+        self._by_endpoint[subscription["endpoint"]] = subscription["id"]
+        self._by_user.setdefault(subscription["user_id"], {})[subscription["id"]] = subscription
+
+class PushFanoutSender:
+    """Envia um payload para várias subscriptions agrupando por host do serviço de push
+
+    Mantém conexões HTTP keep-alive por host e as reutiliza entre envios.
+    Endpoints que respondem 404/410 são desativados via `on_gone`.
+    """
+
+    GONE_STATUSES = (404, 410)
+
+    def __init__(self, on_gone: Optional[Callable[[str], None]] = None, timeout: float = 10.0,
+                 max_idle_per_host: int = 4, ttl: int = 86400,
+                 vapid_private_key: Optional[str] = None, vapid_claims: Optional[Dict] = None):
+        self.on_gone = on_gone
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.ttl = ttl
+        self.vapid_private_key = vapid_private_key
+        self.vapid_claims = vapid_claims or {}
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = defaultdict(list)
+        self._vapid_headers: Dict[str, Tuple[float, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def send(self, subscriptions: List[Dict], payload: bytes) -> Dict:
+        """Envia o payload para todas as subscriptions; retorna o resumo do envio"""
+        results = {
+            "success": 0,
+            "failed": 0,
+            "gone": 0,
+            "errors": []
+        }
+
+        by_host: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+        for subscription in subscriptions:
+            parts = urlsplit(subscription["endpoint"])
+            by_host[(parts.scheme, parts.netloc)].append(subscription)
+
+        for host, group in by_host.items():
+            connection = self._acquire(host)
+            try:
+                for subscription in group:
+                    status, connection = self._post(host, connection, subscription, payload)
+                    if 200 <= status < 300:
+                        results["success"] += 1
+                    elif status in self.GONE_STATUSES:
+                        results["gone"] += 1
+                        if self.on_gone:
+                            self.on_gone(subscription["endpoint"])
+                    else:
+                        results["failed"] += 1
+                        results["errors"].append(subscription["endpoint"])
+            finally:
+                self._release(host, connection)
+
+        return results
+
+    def close(self) -> None:
+        """Fecha todas as conexões ociosas"""
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+    def _post(self, host, connection, subscription: Dict, payload: bytes):
+        body, headers = self._encode(host, subscription, payload)
+        path = urlsplit(subscription["endpoint"]).path or "/"
+        # Uma nova tentativa caso o servidor tenha fechado a conexão ociosa
+        for attempt in range(2):
+            try:
+                connection.request("POST", path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.will_close:
+                    connection.close()
+                return response.status, connection
+            except (http.client.HTTPException, OSError) as e:
+                connection.close()
+                if attempt:
+                    print(f"Erro ao enviar push para {host[1]}: {e}")
+                    return 0, connection
+        return 0, connection
+
+    def _encode(self, host, subscription: Dict, payload: bytes) -> Tuple[bytes, Dict]:
+        headers = {"TTL": str(self.ttl), "Content-Type": "application/octet-stream"}
+        if WebPusher is None or not subscription.get("keys", {}).get("auth"):
+            return payload, headers
+        encoded = WebPusher(subscription).encode(payload, content_encoding="aes128gcm")
+        headers["Content-Encoding"] = "aes128gcm"
+        if self.vapid_private_key:
+            headers.update(self._vapid_for(host))
+        return encoded["body"], headers
+
+    def _vapid_for(self, host) -> Dict:
+        # A assinatura VAPID depende só do host (aud): é reaproveitada por 12h
+        audience = f"{host[0]}://{host[1]}"
+        now = time.time()
+        with self._lock:
+            cached = self._vapid_headers.get(audience)
+            if cached and cached[0] > now:
+                return cached[1]
+        claims = {**self.vapid_claims, "aud": audience, "exp": int(now) + 12 * 3600}
+        headers = Vapid.from_string(private_key=self.vapid_private_key).sign(claims)
+        with self._lock:
+            self._vapid_headers[audience] = (now + 11 * 3600, headers)
+        return headers
+
+    def _acquire(self, host) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get(host)
+            if idle:
+                return idle.pop()
+        scheme, netloc = host
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _release(self, host, connection: http.client.HTTPConnection) -> None:
+        if connection.sock is None:
+            return
+        with self._lock:
+            idle = self._idle[host]
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
@@ -0,0 +1,35 @@
+# 🧪 Configuração comum dos testes dos serviços Python
+
+import importlib.util
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Banco e arquivo frio do controller fora do diretório do projeto
+_STATE_DIR = tempfile.mkdtemp(prefix="notifications-tests-")
+os.environ.setdefault('NOTIFICATIONS_DB_PATH', os.path.join(_STATE_DIR, 'notifications.sqlite3'))
+os.environ.setdefault('NOTIFICATIONS_ARCHIVE_DIR', os.path.join(_STATE_DIR, 'archive'))
+
+@pytest.fixture(scope="session")
+def email_service():
+    """Módulo app/services/email.service.py (o ponto no nome impede o import direto)"""
+    path = os.path.join(ROOT, 'app', 'services', 'email.service.py')
+    spec = importlib.util.spec_from_file_location("email_service", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope="session")
+def client():
+    """Cliente Flask com o blueprint de notificações registrado"""
+    from flask import Flask
+    from app.controllers.api.NotificationController import notifications_bp
+    
+    app = Flask(__name__)
+    app.register_blueprint(notifications_bp, url_prefix='/api')
+    return app.test_client()
@@ -0,0 +1,151 @@
+# 🧪 Servidores locais que fazem o papel dos provedores nos testes
+
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Servidor SMTP mínimo com comportamento configurável
+    
+    - `advertise_8bitmime`: anuncia (ou não) 8BITMIME no EHLO
+    - `max_per_session`: depois de N mensagens responde 421 e fecha a sessão
+    - `delay`: segundos gastos em cada DATA
+    - destinatários que começam com "bad" recebem 550 no RCPT
+    """
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, advertise_8bitmime=True, max_per_session=None, delay=0.0):
+        super().__init__(("127.0.0.1", 0), SMTPSession)
+        self.advertise_8bitmime = advertise_8bitmime
+        self.max_per_session = max_per_session
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.sessions = 0
+        self.open_sessions = 0
+        self.peak_sessions = 0
+        self.commands = []
+        self.messages = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+    
+    @property
+    def port(self):
+        return self.server_address[1]
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class SMTPSession(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+            server.open_sessions += 1
+            server.peak_sessions = max(server.peak_sessions, server.open_sessions)
+        try:
+            self._converse(server)
+        finally:
+            with server.lock:
+                server.open_sessions -= 1
+    
+    def _converse(self, server):
+        reply = lambda line: self.wfile.write(line.encode("ascii") + b"\r\n")
+        reply("220 standin")
+        sent = 0
+        envelope = {}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii").strip()
+            verb = command[:4].upper()
+            with server.lock:
+                server.commands.append(verb)
+            if verb == "EHLO":
+                extensions = ["standin", "8BITMIME"] if server.advertise_8bitmime else ["standin"]
+                for extension in extensions[:-1]:
+                    reply(f"250-{extension}")
+                reply(f"250 {extensions[-1]}")
+            elif verb == "HELO" or verb == "NOOP":
+                reply("250 ok")
+            elif verb == "MAIL":
+                if server.max_per_session is not None and sent >= server.max_per_session:
+                    reply("421 too many messages, closing")
+                    return
+                envelope = {"mail": command, "rcpt": []}
+                reply("250 ok")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip("<> ")
+                if address.startswith("bad"):
+                    reply("550 no such user")
+                else:
+                    envelope["rcpt"].append(address)
+                    reply("250 ok")
+            elif verb == "DATA":
+                reply("354 go ahead")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b""):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.messages.append({**envelope, "data": b"".join(lines)})
+                sent += 1
+                reply("250 queued")
+            elif verb == "RSET":
+                envelope = {}
+                reply("250 ok")
+            elif verb == "QUIT":
+                reply("221 bye")
+                return
+            else:
+                reply("502 not implemented")
+
+class SendGridStandIn(ThreadingHTTPServer):
+    """API /v3/mail/send local: cada requisição consome a próxima resposta de `responses`
+    
+    Cada resposta é (status, corpo JSON ou None, cabeçalhos); sem respostas na
+    fila o servidor responde 202.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, responses=None):
+        super().__init__(("127.0.0.1", 0), SendGridHandler)
+        self.responses = list(responses or [])
+        self.requests = []
+        self.connections = set()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v3/mail/send"
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class SendGridHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        self.server.connections.add(self.client_address)
+        status, payload, headers = self.server.responses.pop(0) if self.server.responses else (202, None, {})
+        encoded = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+    
+    def log_message(self, *args):
+        pass
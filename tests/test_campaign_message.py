@@ -0,0 +1,138 @@
+# 🧪 Testes da CampaignMessage (MIME montado uma vez) contra um servidor SMTP local
+
+from email import message_from_bytes, policy
+
+import pytest
+
+from standins import SMTPStandIn
+
+HTML = "<p>Olá, {nome}! Seu ensaio de {tipo} está confirmado.</p>\n<p>{recado}</p>"
+TEXT = "Olá, {nome}!\n{recado}"
+
+def campaign_service(email_service, server):
+    service = email_service.EmailService()
+    service.rate_limiters["smtp"] = email_service.TokenBucket(rate=100000)
+    service.smtp_pool = email_service.SMTPConnectionPool("127.0.0.1", server.port, use_tls=False)
+    return service
+
+def send(email_service, server, recado="Até breve"):
+    service = campaign_service(email_service, server)
+    recipients = [{"email": "ana@x.com", "variables": {"nome": "Ana Júlia", "recado": recado}}]
+    results = service.send_campaign(recipients, "Confirmação, {nome}", HTML, TEXT, shared={"tipo": "gestante"})
+    service.smtp_pool.close()
+    assert results["success"] == 1
+    return server.messages[0]
+
+def bodies(data):
+    message = message_from_bytes(data, policy=policy.default)
+    return {
+        part.get_content_subtype(): (part["Content-Transfer-Encoding"], part.get_content())
+        for part in message.iter_parts()
+    }
+
+def expected(recado="Até breve"):
+    return {
+        "plain": TEXT.format(nome="Ana Júlia", recado=recado),
+        "html": HTML.format(nome="Ana Júlia", tipo="gestante", recado=recado)
+    }
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def seven_bit_server():
+    server = SMTPStandIn(advertise_8bitmime=False)
+    yield server
+    server.stop()
+
+def decoded(parts):
+    return {subtype: body.replace("\r\n", "\n") for subtype, (_, body) in parts.items()}
+
+def test_8bitmime_server_gets_8bit_parts(email_service, smtp_server):
+    sent = send(email_service, smtp_server)
+    parts = bodies(sent["data"])
+    
+    assert "BODY=8BITMIME" in sent["mail"]
+    assert {encoding for encoding, _ in parts.values()} == {"8bit"}
+    assert decoded(parts) == expected()
+
+def test_server_without_8bitmime_gets_quoted_printable(email_service, seven_bit_server):
+    sent = send(email_service, seven_bit_server)
+    parts = bodies(sent["data"])
+    
+    assert "BODY=8BITMIME" not in sent["mail"]
+    assert sent["data"].isascii()
+    assert {encoding for encoding, _ in parts.values()} == {"quoted-printable"}
+    assert decoded(parts) == expected()
+
+def test_line_over_998_octets_is_quoted_printable(email_service, smtp_server):
+    recado = "ã" * 600
+    sent = send(email_service, smtp_server, recado=recado)
+    parts = bodies(sent["data"])
+    
+    assert max(map(len, sent["data"].split(b"\r\n"))) <= 998
+    assert {encoding for encoding, _ in parts.values()} == {"quoted-printable"}
+    assert decoded(parts) == expected(recado)
+
+def test_long_subject_is_folded(email_service):
+    message = email_service.CampaignMessage("jessica@jessicasantos.com", "{nome}", HTML)
+    
+    data = message.build("ana@x.com", {"nome": "a" * 1200, "tipo": "", "recado": ""})
+    
+    assert max(map(len, data.split(b"\r\n"))) <= 998
+    assert message_from_bytes(data, policy=policy.default)["Subject"] == "a" * 1200
+
+def test_date_and_message_id_are_generated_per_message(email_service, monkeypatch):
+    dates = iter(["Mon, 19 Oct 2026 10:00:00 -0300", "Mon, 19 Oct 2026 10:05:00 -0300"])
+    monkeypatch.setattr(email_service, "formatdate", lambda **kwargs: next(dates))
+    message = email_service.CampaignMessage("jessica@jessicasantos.com", "Oi", "<p>Oi</p>")
+    
+    first = message_from_bytes(message.build("a@x.com", {}))
+    second = message_from_bytes(message.build("b@x.com", {}))
+    
+    assert (first["Date"], second["Date"]) == ("Mon, 19 Oct 2026 10:00:00 -0300", "Mon, 19 Oct 2026 10:05:00 -0300")
+    assert first["Message-ID"] != second["Message-ID"]
+
+def test_missing_variables_are_reported_as_errors(email_service, smtp_server):
+    service = campaign_service(email_service, smtp_server)
+    recipients = [{"email": "ana@x.com", "variables": {"nome": "Ana"}},
+                  {"email": "bia@x.com", "variables": {"nome": "Bia", "recado": "Oi"}}]
+    
+    results = service.send_campaign(recipients, "Oi", HTML, shared={"tipo": "gestante"})
+    service.smtp_pool.close()
+    
+    assert results == {"success": 1, "failed": 1, "errors": ["ana@x.com"]}
+    assert [m["rcpt"] for m in smtp_server.messages] == [["bia@x.com"]]
+
+@pytest.mark.parametrize("to_email, nome", [
+    ("ana@x.com", "Ana\r\nBcc: victim@evil.com"),
+    ("ana@x.com", "Ana\nBcc: victim@evil.com"),
+    ("ana@x.com\r\nBcc: victim@evil.com", "Ana")
+])
+def test_line_breaks_in_headers_are_rejected(email_service, to_email, nome):
+    message = email_service.CampaignMessage("jessica@jessicasantos.com", "Olá, {nome}", "<p>{nome}</p>")
+    
+    with pytest.raises(ValueError, match="Quebra de linha"):
+        message.build(to_email, {"nome": nome})
+
+def test_header_injection_is_not_sent(email_service, smtp_server):
+    service = campaign_service(email_service, smtp_server)
+    recipients = [{"email": "ana@x.com", "variables": {"nome": "Ana\r\nBcc: victim@evil.com"}},
+                  {"email": "bia@x.com", "variables": {"nome": "Bia"}}]
+    
+    results = service.send_campaign(recipients, "Olá, {nome}", "<p>{nome}</p>")
+    service.smtp_pool.close()
+    
+    assert results == {"success": 1, "failed": 1, "errors": ["ana@x.com"]}
+    assert [m["rcpt"] for m in smtp_server.messages] == [["bia@x.com"]]
+    assert b"Bcc" not in smtp_server.messages[0]["data"]
+
+def test_line_breaks_in_the_body_are_kept(email_service):
+    message = email_service.CampaignMessage("jessica@jessicasantos.com", "Oi", "<p>{recado}</p>")
+    
+    data = message.build("ana@x.com", {"recado": "linha 1\nlinha 2"})
+    
+    assert b"linha 1\r\nlinha 2" in data
@@ -0,0 +1,143 @@
+# 🧪 Testes dos envios em massa do EmailService contra servidores locais
+
+import time
+
+import pytest
+
+from standins import SMTPStandIn, SendGridStandIn
+
+def make_service(email_service, smtp_server=None, sendgrid_server=None):
+    """EmailService apontado para os servidores locais e sem limite de taxa"""
+    service = email_service.EmailService()
+    service.rate_limiters = {
+        "smtp": email_service.TokenBucket(rate=100000),
+        "sendgrid": email_service.TokenBucket(rate=100000)
+    }
+    if smtp_server:
+        service.smtp_pool = email_service.SMTPConnectionPool(
+            "127.0.0.1", smtp_server.port, use_tls=False,
+            max_connections=service.bulk_concurrency
+        )
+    if sendgrid_server:
+        service.sendgrid_url = sendgrid_server.url
+    return service
+
+@pytest.fixture
+def slow_smtp():
+    server = SMTPStandIn(delay=0.02)
+    yield server
+    server.stop()
+
+def run_smtp_bulk(service, count, concurrency):
+    recipients = [f"u{index}@x.com" for index in range(count)]
+    started = time.monotonic()
+    results = service.send_bulk_email(recipients, "Olá", "<p>Olá</p>", concurrency=concurrency)
+    return results, time.monotonic() - started
+
+@pytest.mark.parametrize("concurrency", [1, 8, 16])
+def test_smtp_sessions_follow_requested_concurrency(email_service, slow_smtp, concurrency):
+    service = make_service(email_service, smtp_server=slow_smtp)
+    
+    results, _ = run_smtp_bulk(service, 48, concurrency)
+    service.smtp_pool.close()
+    
+    assert results["success"] == 48
+    assert slow_smtp.peak_sessions == concurrency
+
+def test_concurrency_above_default_pool_size_opens_more_sessions(email_service, slow_smtp):
+    service = make_service(email_service, smtp_server=slow_smtp)
+    
+    run_smtp_bulk(service, 64, service.bulk_concurrency)
+    assert slow_smtp.peak_sessions == service.bulk_concurrency
+    results, _ = run_smtp_bulk(service, 64, 16)
+    service.smtp_pool.close()
+    
+    assert results["success"] == 64
+    assert slow_smtp.peak_sessions == 16
+    # As sessões da primeira rodada são reaproveitadas: só as que faltavam são abertas
+    assert slow_smtp.sessions == 16
+
+def test_sendgrid_batches_run_concurrently(email_service):
+    server = SendGridStandIn()
+    try:
+        service = make_service(email_service, sendgrid_server=server)
+        recipients = [f"u{index}@x.com" for index in range(2500)]
+        progress = []
+        
+        results = service.send_bulk_email(recipients, "Olá", "<p>Olá</p>", provider="sendgrid",
+                                          concurrency=3, on_progress=lambda done, total, _: progress.append(done))
+        
+        assert results == {"success": 2500, "failed": 0, "errors": []}
+        assert sorted(len(body["personalizations"]) for body in server.requests) == [500, 1000, 1000]
+        assert progress[-1] == 2500
+    finally:
+        server.stop()
+
+@pytest.fixture
+def sendgrid_server():
+    server = SendGridStandIn()
+    yield server
+    server.stop()
+
+def test_sendgrid_splits_batches_over_one_keep_alive_connection(email_service, sendgrid_server):
+    service = make_service(email_service, sendgrid_server=sendgrid_server)
+    recipients = [f"u{index}@x.com" for index in range(2001)]
+    
+    results = service.send_bulk_sendgrid(recipients, "Olá", "<p>Olá</p>", concurrency=1)
+    
+    assert results["success"] == 2001
+    assert [len(body["personalizations"]) for body in sendgrid_server.requests] == [1000, 1000, 1]
+    assert len(sendgrid_server.connections) == 1
+
+def test_sendgrid_partial_400_fails_only_rejected_recipients(email_service, sendgrid_server):
+    sendgrid_server.responses = [
+        (400, {"errors": [{"field": "personalizations.1.to", "message": "invalid"},
+                          {"field": "personalizations.3", "message": "invalid"}]}, {})
+    ]
+    service = make_service(email_service, sendgrid_server=sendgrid_server)
+    recipients = ["a@x.com", "bad1@x", "c@x.com", "bad2@x", "e@x.com"]
+    
+    results = service.send_bulk_sendgrid(recipients, "Olá", "<p>Olá</p>",
+                                         substitutions={"c@x.com": {"-nome-": "Carla"}})
+    
+    assert results == {"success": 3, "failed": 2, "errors": ["bad1@x", "bad2@x"]}
+    resent = sendgrid_server.requests[1]["personalizations"]
+    assert [p["to"][0]["email"] for p in resent] == ["a@x.com", "c@x.com", "e@x.com"]
+    assert resent[1]["substitutions"] == {"-nome-": "Carla"}
+
+@pytest.mark.parametrize("retry_after", ["0", "Wed, 21 Oct 2015 07:28:00 GMT"])
+def test_sendgrid_429_retries_after_retry_after(email_service, sendgrid_server, retry_after):
+    sendgrid_server.responses = [(429, None, {"Retry-After": retry_after})]
+    service = make_service(email_service, sendgrid_server=sendgrid_server)
+    
+    started = time.monotonic()
+    results = service.send_bulk_sendgrid(["a@x.com"], "Olá", "<p>Olá</p>")
+    
+    assert results["success"] == 1
+    assert len(sendgrid_server.requests) == 2
+    assert time.monotonic() - started < 1
+
+def test_sendgrid_gives_up_after_max_retries(email_service, sendgrid_server):
+    sendgrid_server.responses = [(503, None, {"Retry-After": "0"})] * 3
+    service = make_service(email_service, sendgrid_server=sendgrid_server)
+    
+    results = service.send_bulk_sendgrid(["a@x.com", "b@x.com"], "Olá", "<p>Olá</p>")
+    
+    assert results == {"success": 0, "failed": 2, "errors": ["a@x.com", "b@x.com"]}
+    assert len(sendgrid_server.requests) == service.sendgrid_max_retries
+
+class FakeResponse:
+    def __init__(self, retry_after=None):
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+def test_retry_after_accepts_seconds_and_http_dates(email_service):
+    retry_after = email_service._retry_after
+    in_a_minute = email_service.formatdate(time.time() + 60, usegmt=True)
+    
+    assert retry_after(FakeResponse("7"), 0) == 7
+    assert 55 < retry_after(FakeResponse(in_a_minute), 0) <= 60
+    assert retry_after(FakeResponse("Wed, 21 Oct 2015 07:28:00 GMT"), 0) == 0
+
+@pytest.mark.parametrize("value", [None, "", "soon", "inf", "-5"])
+def test_retry_after_falls_back_to_exponential_backoff(email_service, value):
+    assert email_service._retry_after(FakeResponse(value), 2) == 4
@@ -0,0 +1,103 @@
+# 🧪 Testes dos templates compilados (mesma saída do str.format)
+
+import pytest
+
+class Cliente:
+    nome = "Ana"
+    
+    def __repr__(self):
+        return "Cliente('Ana')"
+
+VARIABLES = {
+    "nome": "Ana Júlia",
+    "desconto": 15,
+    "valor": 1234.5,
+    "largura": 12,
+    "data": "21/10",
+    "cliente": Cliente(),
+    "itens": ["retrato", "gestante"],
+    "extra": {"cidade": "Curitiba"}
+}
+
+TEMPLATES = [
+    "",
+    "sem variáveis",
+    "Olá, {nome}!",
+    "{nome}{desconto}",
+    "{desconto}% OFF — {desconto:03d}",
+    "R$ {valor:,.2f} / {valor:>10.1f} / {valor!s:^12}",
+    "{nome!r} {nome!a} {cliente!r}",
+    "{{nome}} {{{nome}}}",
+    "{nome:>{largura}}|{valor:{largura}.{desconto}}",
+    "{cliente.nome} gosta de {itens[0]} e {itens[1]!r} em {extra[cidade]}",
+    "<p style=\"color: #333;\">{data}</p>\n<p>{nome}</p>"
+]
+
+@pytest.mark.parametrize("text", TEMPLATES)
+def test_render_matches_str_format(email_service, text):
+    template = email_service.CompiledTemplate.compile(text)
+    
+    assert template.render(VARIABLES) == text.format(**VARIABLES)
+
+@pytest.mark.parametrize("text", TEMPLATES)
+@pytest.mark.parametrize("shared", [{}, {"nome": "Ana Júlia"}, {"desconto": 15, "largura": 12},
+                                    {"cliente": Cliente(), "itens": ["retrato", "gestante"]}])
+def test_partial_then_render_matches_str_format(email_service, text, shared):
+    template = email_service.CompiledTemplate.compile(text).partial(shared)
+    
+    assert template.render(VARIABLES) == text.format(**VARIABLES)
+
+def test_partial_merges_adjacent_literals(email_service):
+    template = email_service.CompiledTemplate.compile("Olá, {nome}! {desconto}% OFF").partial({"nome": "Ana"})
+    
+    assert template.parts == ["Olá, Ana! ", None, "% OFF"]
+    assert template.fields == {"desconto"}
+
+def test_fields_are_root_names(email_service):
+    template = email_service.CompiledTemplate.compile("{cliente.nome} {itens[0]} {valor:{largura}}")
+    
+    assert template.fields == {"cliente", "itens", "valor", "largura"}
+
+def test_missing_variable_raises_like_str_format(email_service):
+    template = email_service.CompiledTemplate.compile("Olá, {nome}!")
+    
+    with pytest.raises(KeyError):
+        template.render({})
+
+@pytest.fixture(scope="module")
+def templates(email_service):
+    return email_service.EmailTemplateService()
+
+def sample_variables(service, name):
+    return {variable: f"<{variable}>" for variable in service.templates[name]["variables"]}
+
+def test_service_templates_match_str_format(templates):
+    for name, template in templates.templates.items():
+        variables = sample_variables(templates, name)
+        
+        rendered = templates.render_template(name, variables)
+        
+        assert rendered["subject"] == template["subject"].format(**variables)
+        assert rendered["html"] == template["html"].format(**variables)
+
+def test_render_batch_matches_render_template(templates):
+    variables = sample_variables(templates, "promocao_ensaio")
+    shared = {key: variables[key] for key in ("desconto", "data_limite", "unsubscribe_url")}
+    recipients = [
+        {key: value for key, value in variables.items() if key not in shared},
+        {**{key: value for key, value in variables.items() if key not in shared}, "nome": "Bia"}
+    ]
+    
+    rendered = templates.render_batch("promocao_ensaio", recipients, shared)
+    
+    for recipient, result in zip(recipients, rendered):
+        expected = templates.render_template("promocao_ensaio", {**shared, **recipient})
+        assert result == {"subject": expected["subject"], "html": expected["html"]}
+
+def test_render_batch_reports_missing_variables(templates):
+    with pytest.raises(ValueError, match="nome"):
+        templates.render_batch("boas_vindas", [{}])
+
+def test_undeclared_variable_fails_at_compile(templates):
+    with pytest.raises(ValueError, match="cupom"):
+        templates._compile("teste", {"subject": "{cupom}", "html": "", "variables": []})
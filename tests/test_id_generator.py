@@ -0,0 +1,73 @@
+# 🧪 Testes do gerador de IDs ordenáveis e da reserva de worker ids
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.models.Notification import now_ms
+from app.services.id_generator import (
+    ENCODED_LENGTH, IdGenerator, claim_worker_id, decode, encode, timestamp_ms
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_ids_are_unique_and_sorted_as_strings(tmp_path):
+    generator = IdGenerator(slot_prefix=str(tmp_path / "worker"))
+    
+    ids = [generator.next_id("notif") for _ in range(20000)]
+    
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(len(i) == len("notif_") + ENCODED_LENGTH for i in ids)
+
+def test_timestamp_is_embedded_in_the_id():
+    before = now_ms()
+    generated = IdGenerator(worker_id=7).next_id("notif")
+    
+    assert before <= timestamp_ms(generated) <= now_ms()
+    assert timestamp_ms("notif_1") is None
+    assert decode(encode(123456789)) == 123456789
+
+def test_fixed_worker_id_from_argument_or_environment(monkeypatch):
+    monkeypatch.setenv("NOTIFICATIONS_WORKER_ID", "5")
+    
+    assert IdGenerator().worker_id == 5
+    assert IdGenerator(worker_id=1030).worker_id == 6
+
+def test_worker_id_is_claimed_on_first_id(tmp_path, monkeypatch):
+    monkeypatch.delenv("NOTIFICATIONS_WORKER_ID", raising=False)
+    prefix = str(tmp_path / "worker")
+    first = IdGenerator(slot_prefix=prefix)
+    second = IdGenerator(slot_prefix=prefix)
+    
+    assert first.worker_id is None
+    first.next_id()
+    second.next_id()
+    
+    assert first.worker_id != second.worker_id
+
+@pytest.mark.skipif(sys.platform == "win32", reason="flock indisponível")
+def test_processes_get_distinct_slots_and_free_them_on_exit(tmp_path):
+    prefix = str(tmp_path / "worker")
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from app.services.id_generator import claim_worker_id\n"
+        "print(claim_worker_id(sys.argv[2]), flush=True)\n"
+        "sys.stdin.read()\n"
+    )
+    workers = [
+        subprocess.Popen([sys.executable, "-c", script, ROOT, prefix],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(3)
+    ]
+    try:
+        claimed = sorted(int(worker.stdout.readline()) for worker in workers)
+        assert claimed == [0, 1, 2]
+    finally:
+        for worker in workers:
+            worker.communicate("")
+    
+    # Com os processos encerrados os slots voltam a ficar livres
+    assert claim_worker_id(prefix) == 0
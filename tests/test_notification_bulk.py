@@ -0,0 +1,70 @@
+# 🧪 Testes de POST /notifications/bulk
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.Notification import NotificationStatus, now_ms
+
+@pytest.fixture
+def controller():
+    from app.controllers.api import NotificationController as controller
+    return controller
+
+def create_scheduled(client, user_id):
+    response = client.post("/api/notifications", json={
+        "user_id": user_id, "title": "Lembrete", "type": "ensaio", "priority": "urgente",
+        "scheduled_at": (datetime.now() + timedelta(hours=1)).isoformat()
+    })
+    return response.get_json()["notification"]["id"]
+
+def test_read_and_unread_by_ids(client, controller):
+    notification_id = create_scheduled(client, "bulk-ids")
+    
+    read = client.post("/api/notifications/bulk", json={
+        "user_id": "bulk-ids", "action": "read", "ids": [notification_id, "inexistente"]
+    }).get_json()
+    unread = client.post("/api/notifications/bulk", json={
+        "user_id": "bulk-ids", "action": "unread", "ids": [notification_id]
+    }).get_json()
+    
+    assert (read["matched"], read["affected"], read["unread_count"]) == (1, 1, 0)
+    assert (unread["affected"], unread["unread_count"]) == (1, 1)
+    assert controller.notification_store.get(notification_id).read_at is None
+
+def test_unread_does_not_push_an_already_sent_notification(client, controller, monkeypatch):
+    notification_id = create_scheduled(client, "bulk-unread")
+    submitted = []
+    monkeypatch.setattr(controller.delivery_pool, "submit_many", lambda items: submitted.extend(items) or True)
+    
+    # O timer disparou e o push saiu; depois a usuária lê e marca como não lida
+    controller.notification_scheduler.cancel(notification_id)
+    now = now_ms()
+    controller.notification_store.set_status(notification_id, NotificationStatus.ENVIADA, sent_at=now)
+    controller.notification_store.set_status(notification_id, NotificationStatus.LIDA, read_at=now)
+    client.post("/api/notifications/bulk", json={
+        "user_id": "bulk-unread", "action": "unread", "ids": [notification_id]
+    })
+    notification = controller.notification_store.get(notification_id)
+    assert notification.status == NotificationStatus.PENDENTE
+    
+    controller.start_leader_tasks()
+    controller.apply_remote_notification(notification_id, notification)
+    controller.dispatch_scheduled(notification_id)
+    
+    assert controller.notification_scheduler.due_at(notification_id) is None
+    assert submitted == []
+
+def test_delete_by_filter(client, controller):
+    ids = [create_scheduled(client, "bulk-filter") for _ in range(3)]
+    
+    result = client.post("/api/notifications/bulk", json={
+        "user_id": "bulk-filter", "action": "delete", "filter": {"type": "ensaio"}
+    }).get_json()
+    
+    assert result["affected"] == 3
+    assert all(controller.notification_store.get(i) is None for i in ids)
+
+def test_invalid_requests(client):
+    assert client.post("/api/notifications/bulk", json={"action": "explode", "ids": []}).status_code == 400
+    assert client.post("/api/notifications/bulk", json={"action": "read"}).status_code == 400
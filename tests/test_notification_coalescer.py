@@ -0,0 +1,152 @@
+# 🧪 Testes do coalescer (rajadas viram resumo) e do fluxo de resumo no controller
+
+import json
+
+import pytest
+
+from app.models.Notification import NotificationPriority, NotificationRecord, NotificationStatus, NotificationType
+from app.services.notification_coalescer import NotificationCoalescer
+
+class ManualScheduler:
+    """Scheduler que só dispara quando o teste manda"""
+    
+    def __init__(self):
+        self.timers = {}
+    
+    def schedule(self, key, due_ms, callback):
+        self.timers[key] = callback
+    
+    def cancel(self, key):
+        return self.timers.pop(key, None) is not None
+    
+    def fire(self, key):
+        self.timers.pop(key)()
+
+def make_coalescer(window_ms=30000):
+    flushed = []
+    coalescer = NotificationCoalescer(ManualScheduler(), flushed.append, window_ms=window_ms)
+    return coalescer, flushed
+
+def record(id, user_id="ana", type=NotificationType.PAGAMENTO, priority=NotificationPriority.MEDIA):
+    return NotificationRecord(id=id, user_id=user_id, type=type, priority=priority)
+
+def test_first_of_a_burst_goes_now_and_the_rest_are_held():
+    coalescer, flushed = make_coalescer()
+    
+    assert coalescer.offer(record("a")) is False
+    assert coalescer.offer(record("b")) is True
+    assert coalescer.offer(record("c")) is True
+    
+    assert coalescer.pending() == 2
+    assert flushed == []
+    assert list(coalescer.scheduler.timers) == ["digest:ana:pagamento"]
+
+def test_window_end_flushes_held_and_reopens_while_the_burst_continues():
+    coalescer, flushed = make_coalescer()
+    coalescer.offer(record("a"))
+    coalescer.offer(record("b"))
+    coalescer.offer(record("c"))
+    
+    coalescer.scheduler.fire("digest:ana:pagamento")
+    
+    assert [[n.id for n in group] for group in flushed] == [["b", "c"]]
+    assert coalescer.offer(record("d")) is True
+    coalescer.scheduler.fire("digest:ana:pagamento")
+    assert [n.id for n in flushed[-1]] == ["d"]
+
+def test_quiet_window_closes_without_reopening():
+    coalescer, flushed = make_coalescer()
+    coalescer.offer(record("a"))
+    
+    coalescer.scheduler.fire("digest:ana:pagamento")
+    
+    assert flushed == []
+    assert coalescer.scheduler.timers == {}
+    assert coalescer.offer(record("b")) is False
+
+def test_groups_are_per_user_and_type():
+    coalescer, _ = make_coalescer()
+    
+    assert coalescer.offer(record("a")) is False
+    assert coalescer.offer(record("b", type=NotificationType.AGENDAMENTO)) is False
+    assert coalescer.offer(record("c", user_id="bia")) is False
+    assert coalescer.offer(record("d")) is True
+
+@pytest.mark.parametrize("window_ms, priority", [(0, NotificationPriority.MEDIA), (30000, NotificationPriority.URGENTE)])
+def test_urgent_or_disabled_window_is_never_held(window_ms, priority):
+    coalescer, _ = make_coalescer(window_ms)
+    
+    assert [coalescer.offer(record(id, priority=priority)) for id in "abc"] == [False, False, False]
+    assert coalescer.pending() == 0
+
+def test_shutdown_flushes_held_groups_and_stops_holding():
+    coalescer, flushed = make_coalescer()
+    for id in "abc":
+        coalescer.offer(record(id))
+    coalescer.offer(record("x", type=NotificationType.ENSAIO))
+    
+    coalescer.shutdown()
+    
+    assert [[n.id for n in group] for group in flushed] == [["b", "c"]]
+    assert coalescer.pending() == 0
+    assert coalescer.scheduler.timers == {}
+    assert coalescer.offer(record("d")) is False
+
+@pytest.fixture
+def controller():
+    from app.controllers.api import NotificationController as controller
+    return controller
+
+@pytest.fixture
+def submitted(controller, monkeypatch):
+    """Entregas enfileiradas no delivery_pool (cada uma como lista de notificações)"""
+    submitted = []
+    monkeypatch.setattr(controller.delivery_pool, "submit", lambda n: submitted.append([n]) or True)
+    monkeypatch.setattr(controller.delivery_pool, "submit_digest", lambda group: submitted.append(group) or True)
+    return submitted
+
+def insert(controller, user_id, count):
+    records = [record(controller.id_generator.next_id("notif"), user_id=user_id) for _ in range(count)]
+    controller.notification_store.insert_many(records)
+    return records
+
+def test_digest_flow_submits_one_push_for_live_held_notifications(controller, submitted):
+    records = insert(controller, "rajada", 4)
+    coalescer = NotificationCoalescer(ManualScheduler(), controller.flush_digest)
+    for notification in records:
+        coalescer.offer(notification)
+    controller.notification_store.set_status(records[2].id, NotificationStatus.LIDA)
+    
+    coalescer.scheduler.fire("digest:rajada:pagamento")
+    
+    assert submitted == [[records[1], records[3]]]
+
+def test_digest_flow_sends_a_single_survivor_as_a_normal_push(controller, submitted):
+    records = insert(controller, "sobrevivente", 3)
+    controller.notification_store.remove(records[2].id)
+    
+    controller.flush_digest(records[1:])
+    
+    assert submitted == [[records[1]]]
+
+def test_held_notifications_are_submitted_on_shutdown(controller, submitted):
+    records = insert(controller, "desligando", 3)
+    coalescer = NotificationCoalescer(ManualScheduler(), controller.flush_digest)
+    for notification in records:
+        coalescer.offer(notification)
+    
+    coalescer.shutdown()
+    
+    assert submitted == [records[1:]]
+
+def test_digest_payload_summarizes_the_group(controller):
+    group = [NotificationRecord(id=f"n{i}", user_id="ana", title=f"Pagamento {i}", type=NotificationType.PAGAMENTO)
+             for i in range(5)]
+    
+    payload = json.loads(controller.build_digest_payload(group))
+    
+    assert payload["body"] == "Pagamento 4; Pagamento 3; Pagamento 2"
+    assert payload["tag"] == "digest-pagamento"
+    assert payload["data"]["ids"] == [f"n{i}" for i in range(5)]
+    assert payload["data"]["count"] == 5
+    assert payload["title"].startswith("5 ")
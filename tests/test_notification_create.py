@@ -0,0 +1,48 @@
+# 🧪 Testes da validação de POST /notifications e /notifications/batch
+
+import pytest
+
+@pytest.fixture
+def controller():
+    from app.controllers.api import NotificationController as controller
+    return controller
+
+@pytest.mark.parametrize("field, value", [
+    ("title", 5),
+    ("message", ["a"]),
+    ("action_url", {"x": 1}),
+    ("icon", 1.5),
+    ("image_url", False),
+    ("user_id", 7),
+    ("data", "texto"),
+    ("data", [1, 2]),
+    ("scheduled_at", {"a": 1}),
+    ("scheduled_at", True),
+    ("scheduled_at", 10 ** 20),
+    ("scheduled_at", "amanhã"),
+    ("type", "desconhecido")
+])
+def test_invalid_field_is_rejected_with_400(client, controller, field, value):
+    before = len(controller.notification_store)
+    
+    response = client.post("/api/notifications", json={"user_id": "validacao", "title": "Oi", field: value})
+    
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+    assert len(controller.notification_store) == before
+
+def test_body_must_be_an_object(client):
+    response = client.post("/api/notifications", json=["não", "é", "objeto"])
+    
+    assert response.status_code == 400
+
+def test_batch_reports_invalid_items_and_keeps_valid_ones(client):
+    response = client.post("/api/notifications/batch", json=[
+        {"user_id": "validacao-lote", "title": "Oi", "scheduled_at": "2099-01-01T10:00:00"},
+        {"user_id": "validacao-lote", "title": 5},
+        {"user_id": "validacao-lote", "data": {"a": 1}, "action_url": {"x": 1}}
+    ])
+    
+    body = response.get_json()
+    assert body["created"] == 1
+    assert [result["success"] for result in body["results"]] == [True, False, False]
@@ -0,0 +1,67 @@
+# 🧪 Testes do NotificationDeliveryPool
+
+import threading
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+from app.services.notification_delivery import NotificationDeliveryPool
+from app.services.notification_store import NotificationStore
+
+def make_pool(sender, **kwargs):
+    store = NotificationStore()
+    pool = NotificationDeliveryPool(store, sender, workers=1, max_queue=10, **kwargs)
+    return store, pool
+
+def test_delivery_marks_pending_as_sent():
+    store, pool = make_pool(lambda notification: True)
+    store.insert(NotificationRecord(id="n1", user_id="ana"))
+    
+    assert pool.submit(store.get("n1"))
+    pool.shutdown()
+    
+    assert store.get("n1").status == NotificationStatus.ENVIADA
+    assert store.get("n1").sent_at is not None
+
+def test_failed_delivery_marks_pending_as_failed():
+    store, pool = make_pool(lambda notification: False)
+    store.insert(NotificationRecord(id="n1", user_id="ana"))
+    
+    pool.submit(store.get("n1"))
+    pool.shutdown()
+    
+    assert store.get("n1").status == NotificationStatus.FALHADA
+
+def test_read_while_in_flight_stays_read():
+    started, release = threading.Event(), threading.Event()
+    
+    def sender(notification):
+        started.set()
+        release.wait(5)
+        return True
+    
+    store, pool = make_pool(sender)
+    store.insert(NotificationRecord(id="n1", user_id="ana"))
+    pool.submit(store.get("n1"))
+    assert started.wait(5)
+    
+    store.set_status("n1", NotificationStatus.LIDA, read_at=123)
+    release.set()
+    pool.shutdown()
+    
+    notification = store.get("n1")
+    assert notification.status == NotificationStatus.LIDA
+    assert notification.read_at == 123
+    assert notification.sent_at is not None
+
+def test_full_queue_rejects_without_blocking():
+    release = threading.Event()
+    store = NotificationStore()
+    pool = NotificationDeliveryPool(store, lambda notification: release.wait(5), workers=1, max_queue=1)
+    records = [NotificationRecord(id=f"n{index}", user_id="ana") for index in range(3)]
+    for record in records:
+        store.insert(record)
+    
+    accepted = [pool.submit(record) for record in records]
+    release.set()
+    pool.shutdown()
+    
+    assert accepted[0] and not all(accepted)
@@ -0,0 +1,127 @@
+# 🧪 Testes do NotificationEventBus (SSE): retomada por Last-Event-ID
+
+import json
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+from app.services.notification_events import NotificationEventBus
+from app.services.notification_store import NotificationStore
+
+def make_bus(buffer_size=256):
+    store = NotificationStore()
+    bus = NotificationEventBus(store, buffer_size=buffer_size)
+    store.add_listener(bus)
+    return store, bus
+
+def parse(chunk):
+    """Eventos SSE de um bloco: lista de (id, evento, dados)"""
+    events = []
+    for block in chunk.decode("utf-8").split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["id"], fields["event"], json.loads(fields["data"])))
+    return events
+
+def open_stream(bus, last_event_id=None):
+    stream = bus.stream("ana", last_event_id, heartbeat=0.05)
+    assert next(stream) == b"retry: 3000\n\n"
+    return stream
+
+def insert(store, notification_id):
+    store.insert(NotificationRecord(id=notification_id, user_id="ana", title=notification_id))
+
+def test_new_events_reach_an_open_stream():
+    store, bus = make_bus()
+    stream = open_stream(bus)
+    
+    insert(store, "n1")
+    events = parse(next(stream))
+    
+    assert [event for _, event, _ in events] == ["notification", "unread_count"]
+    assert events[0][0] == f"{bus.epoch}-1"
+    assert events[0][2]["id"] == "n1"
+    assert events[1][2] == {"delta": 1, "unread_count": 1}
+
+def test_resume_replays_missed_events():
+    store, bus = make_bus()
+    stream = open_stream(bus)
+    insert(store, "n1")
+    last_id = parse(next(stream))[-1][0]
+    
+    insert(store, "n2")
+    store.set_status("n1", NotificationStatus.LIDA)
+    resumed = open_stream(bus, last_id)
+    events = parse(next(resumed))
+    
+    assert [event for _, event, _ in events] == ["notification", "unread_count", "status", "unread_count"]
+    assert events[0][2]["id"] == "n2"
+
+def test_id_ahead_of_counter_resets_and_keeps_streaming():
+    store, bus = make_bus()
+    stream = open_stream(bus, f"{bus.epoch}-50")
+    
+    reset = parse(next(stream))
+    insert(store, "n1")
+    events = parse(next(stream))
+    
+    assert [event for _, event, _ in reset] == ["reset"]
+    assert [event for _, event, _ in events][0] == "notification"
+
+def test_id_from_another_process_resets():
+    store, bus = make_bus()
+    insert(store, "n0")
+    
+    for foreign in ("0123456789ab-1", "7", "lixo"):
+        stream = open_stream(bus, foreign)
+        assert [event for _, event, _ in parse(next(stream))] == ["reset"]
+        stream.close()
+
+def test_id_older_than_buffer_resets_with_unread_count():
+    store, bus = make_bus(buffer_size=2)
+    stream = open_stream(bus)
+    for index in range(3):
+        insert(store, f"n{index}")
+    next(stream)
+    
+    stream = open_stream(bus, f"{bus.epoch}-1")
+    events = parse(next(stream))
+    
+    assert events == [(f"{bus.epoch}-6", "reset", {"unread_count": 3})]
+
+def test_open_stream_that_falls_behind_the_buffer_gets_reset():
+    store, bus = make_bus(buffer_size=256)
+    stream = open_stream(bus)
+    
+    # 300 inserções publicam 600 eventos antes da próxima leitura
+    for index in range(300):
+        insert(store, f"n{index}")
+    events = parse(next(stream))
+    
+    assert events == [(f"{bus.epoch}-600", "reset", {"unread_count": 300})]
+    insert(store, "n300")
+    assert [event_id for event_id, _, _ in parse(next(stream))] == [f"{bus.epoch}-601", f"{bus.epoch}-602"]
+
+def test_mark_all_read_beyond_the_buffer_resets_open_stream():
+    store, bus = make_bus(buffer_size=256)
+    for index in range(130):
+        insert(store, f"n{index}")
+    stream = open_stream(bus)
+    
+    store.set_status_for_user("ana", NotificationStatus.PENDENTE, NotificationStatus.LIDA)
+    
+    assert parse(next(stream)) == [(f"{bus.epoch}-260", "reset", {"unread_count": 0})]
+
+def test_stream_exactly_buffer_size_behind_gets_every_event():
+    store, bus = make_bus(buffer_size=4)
+    stream = open_stream(bus)
+    
+    insert(store, "n1")
+    insert(store, "n2")
+    events = parse(next(stream))
+    
+    assert [event for _, event, _ in events] == ["notification", "unread_count"] * 2
+
+def test_idle_stream_sends_heartbeat():
+    _, bus = make_bus()
+    stream = open_stream(bus)
+    
+    assert next(stream) == b": ping\n\n"
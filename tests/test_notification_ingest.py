@@ -0,0 +1,106 @@
+# 🧪 Testes da leitura incremental de lotes (array JSON e NDJSON)
+
+import io
+import json
+
+import pytest
+
+from app.services.notification_ingest import iter_json_array, iter_ndjson
+
+ITEMS = [
+    {"title": "Olá, Sessão", "message": "Família [a, b] {x}", "data": {"valor": 850.5}},
+    1234567,
+    "texto com \\\"aspas\\\" e \\u00e7",
+    [1, [2, 3]],
+    True,
+    None,
+    -0.25e3,
+    {"nested": [-2.5e+30, 1e-7, False, None, {"é": "\u2713\n"}], "n": 10 ** 20}
+]
+
+def read_all(items):
+    values = []
+    for value, error in items:
+        assert error is None, error
+        values.append(value)
+    return values
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 64 * 1024])
+def test_array_is_read_across_any_chunk_boundary(chunk_size):
+    body = json.dumps(ITEMS, ensure_ascii=False, indent=1).encode("utf-8")
+    
+    assert read_all(iter_json_array(io.BytesIO(body), chunk_size=chunk_size)) == ITEMS
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_escapes_and_special_numbers_across_chunk_boundaries(chunk_size):
+    items = ITEMS + [float("-inf"), float("inf"), "emoji 😀 no fim"]
+    body = json.dumps(items, ensure_ascii=True).encode("ascii")
+    
+    assert read_all(iter_json_array(io.BytesIO(body), chunk_size=chunk_size)) == items
+
+def test_empty_array_and_whitespace():
+    assert read_all(iter_json_array(io.BytesIO(b"  [ \n ]  "))) == []
+
+def test_items_are_yielded_before_the_array_ends():
+    stream = io.BytesIO(b'[{"a": 1}, {"b": 2}, ')
+    items = iter_json_array(stream, chunk_size=4)
+    
+    assert next(items) == ({"a": 1}, None)
+    assert next(items) == ({"b": 2}, None)
+    assert next(items)[1] is not None
+
+@pytest.mark.parametrize("body, message", [
+    (b"", "Corpo vazio"),
+    (b'{"a": 1}', "O corpo deve ser um array JSON ou NDJSON"),
+    (b"[1, 2", "Array JSON não terminado"),
+    (b"[1 2]", "Separador inesperado"),
+    (b"[1, }", "JSON inválido"),
+    (b'["\xff"]', "Codificação inválida"),
+])
+def test_array_errors_stop_the_stream(body, message):
+    results = list(iter_json_array(io.BytesIO(body), chunk_size=2))
+    
+    value, error = results[-1]
+    assert value is None and error.startswith(message)
+
+def test_values_before_an_error_are_kept():
+    results = list(iter_json_array(io.BytesIO(b'[{"ok": 1}, oops]')))
+    
+    assert results[0] == ({"ok": 1}, None)
+    assert results[1][1].startswith("JSON inválido")
+
+class CountingStream(io.BytesIO):
+    def __init__(self, body):
+        super().__init__(body)
+        self.consumed = 0
+    
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+@pytest.mark.parametrize("broken", [b'{"a": tru e}', b'{"a" 1}', b'{"a": 1 x}', b'{"a": "\x01"}',
+                                    b'{"a": "\\q"}', b'{"a": 1,}', b'[1,]'])
+def test_malformed_element_fails_without_reading_the_rest(broken):
+    filler = b"".join(b', {"title": "%d"}' % index for index in range(20000))
+    stream = CountingStream(b"[" + broken + filler + b"]")
+    
+    results = list(iter_json_array(stream, chunk_size=1024))
+    
+    assert results == [(None, results[0][1])]
+    assert results[0][1].startswith("JSON inválido")
+    assert stream.consumed <= 1024
+
+def test_ndjson_reports_bad_lines_and_continues():
+    body = b'{"title": "a"}\n\n   \nnot json\n{"title": "b"}\r\n[1]'
+    
+    results = list(iter_ndjson(io.BytesIO(body)))
+    
+    assert [value for value, _ in results] == [{"title": "a"}, None, {"title": "b"}, [1]]
+    assert results[1][1].startswith("JSON inválido")
+    assert [error for _, error in results if error is None] == [None, None, None]
+
+def test_multibyte_characters_split_between_chunks():
+    body = json.dumps(["ção é ✓"], ensure_ascii=False).encode("utf-8")
+    
+    assert read_all(iter_json_array(io.BytesIO(body), chunk_size=1)) == ["ção é ✓"]
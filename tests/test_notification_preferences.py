@@ -0,0 +1,110 @@
+# 🧪 Testes das políticas de preferência (NotificationPolicy.decide)
+
+from datetime import datetime
+
+import pytest
+
+from app.models.Notification import NotificationPriority, NotificationRecord, NotificationType
+from app.services.notification_preferences import (
+    DEFER, DELIVER, DROP, NotificationPolicy, PreferenceCache, parse_minutes
+)
+
+NIGHT = datetime(2025, 6, 20, 23, 15)
+MORNING = datetime(2025, 6, 21, 7, 59)
+AFTERNOON = datetime(2025, 6, 20, 15, 0)
+
+def test_defaults_deliver_outside_quiet_hours():
+    policy = NotificationPolicy.compile({})
+    
+    assert policy.decide(NotificationType.AGENDAMENTO, NotificationPriority.MEDIA, now=AFTERNOON) == (DELIVER, None)
+
+def test_disabled_type_or_channel_is_dropped():
+    policy = NotificationPolicy.compile({"push_enabled": False})
+    
+    # sistema vem desativado por padrão
+    assert NotificationPolicy.compile({}).decide(
+        NotificationType.SISTEMA, NotificationPriority.ALTA, now=AFTERNOON
+    ) == (DROP, None)
+    assert policy.decide(NotificationType.PAGAMENTO, NotificationPriority.ALTA, now=AFTERNOON) == (DROP, None)
+    assert policy.decide(
+        NotificationType.PAGAMENTO, NotificationPriority.ALTA, channel="email", now=AFTERNOON
+    ) == (DELIVER, None)
+
+@pytest.mark.parametrize("now, release", [
+    (NIGHT, datetime(2025, 6, 21, 8, 0)),
+    (MORNING, datetime(2025, 6, 21, 8, 0)),
+])
+def test_quiet_hours_across_midnight_defer_until_end(now, release):
+    policy = NotificationPolicy.compile({})
+    
+    action, release_at = policy.decide(NotificationType.WHATSAPP, NotificationPriority.MEDIA, now=now)
+    
+    assert action == DEFER
+    assert release_at == int(release.timestamp() * 1000)
+
+def test_quiet_hours_end_is_exclusive():
+    policy = NotificationPolicy.compile({})
+    
+    assert policy.decide(
+        NotificationType.WHATSAPP, NotificationPriority.MEDIA, now=datetime(2025, 6, 21, 8, 0)
+    ) == (DELIVER, None)
+
+def test_same_day_window_and_urgent_bypass():
+    policy = NotificationPolicy.compile({"quiet_hours_start": "12:00", "quiet_hours_end": "14:00"})
+    lunch = datetime(2025, 6, 20, 13, 0)
+    
+    action, release_at = policy.decide(NotificationType.ENSAIO, NotificationPriority.BAIXA, now=lunch)
+    assert action == DEFER
+    assert release_at == int(datetime(2025, 6, 20, 14, 0).timestamp() * 1000)
+    assert policy.decide(NotificationType.ENSAIO, NotificationPriority.URGENTE, now=lunch) == (DELIVER, None)
+
+def test_disabled_or_empty_quiet_window_always_delivers():
+    for config in ({"quiet_hours_enabled": False}, {"quiet_hours_start": "10:00", "quiet_hours_end": "10:00"}):
+        policy = NotificationPolicy.compile(config)
+        assert policy.decide(NotificationType.ENSAIO, NotificationPriority.MEDIA, now=NIGHT) == (DELIVER, None)
+
+def test_invalid_stored_hours_fall_back_to_default():
+    policy = NotificationPolicy.compile({"quiet_hours_start": "25:99"})
+    
+    assert (policy.quiet_start, policy.quiet_end) == (parse_minutes("22:00"), parse_minutes("08:00"))
+
+def test_preference_cache_recompiles_after_invalidate():
+    configs = {}
+    cache = PreferenceCache(configs)
+    assert cache.policy("ana").decide(NotificationType.MARKETING, NotificationPriority.MEDIA, now=AFTERNOON)[0] == DELIVER
+    
+    configs["ana"] = {"marketing_enabled": False}
+    assert cache.policy("ana").decide(NotificationType.MARKETING, NotificationPriority.MEDIA, now=AFTERNOON)[0] == DELIVER
+    cache.invalidate("ana")
+    assert cache.policy("ana").decide(NotificationType.MARKETING, NotificationPriority.MEDIA, now=AFTERNOON)[0] == DROP
+
+def test_deferred_notification_survives_restart():
+    from app.controllers.api import NotificationController as controller
+    
+    # Janela de silêncio que cobre o instante atual
+    now = datetime.now()
+    minute = now.hour * 60 + now.minute
+    controller.configs_db["silencio"] = {
+        "quiet_hours_start": "%02d:%02d" % divmod((minute - 60) % 1440, 60),
+        "quiet_hours_end": "%02d:%02d" % divmod((minute + 60) % 1440, 60)
+    }
+    controller.preference_cache.invalidate("silencio")
+    notification = NotificationRecord(
+        id=controller.id_generator.next_id("notif"), user_id="silencio", type=NotificationType.AGENDAMENTO
+    )
+    controller.notification_store.insert(notification)
+    
+    assert controller.dispatch_many([notification]) == []
+    release_at = notification.scheduled_at
+    assert release_at is not None
+    assert controller.notification_scheduler.due_at(notification.id) == release_at
+    
+    # Restart: os timers em memória se perdem, o scheduled_at persistido não
+    controller.notification_repository.flush()
+    controller.notification_scheduler.cancel(notification.id)
+    persisted = {n.id: n for n in controller.notification_repository.load_notifications()}
+    assert persisted[notification.id].scheduled_at == release_at
+    
+    controller.start_leader_tasks()
+    assert controller.notification_scheduler.due_at(notification.id) == release_at
+    controller.notification_scheduler.cancel(notification.id)
@@ -0,0 +1,77 @@
+# 🧪 Testes do NotificationRecord: JSON em cache e projeção
+
+import json
+from datetime import datetime
+
+import pytest
+
+from app.models import Notification as model
+from app.models.Notification import FIELD_NAMES, NotificationRecord, NotificationStatus, to_epoch_ms
+from app.services.notification_store import NotificationStore
+
+def test_to_json_matches_to_dict_and_is_cached():
+    record = NotificationRecord(id="n1", user_id="ana", title="Sessão", created_at=1_700_000_000_000)
+    
+    first = record.to_json()
+    
+    assert json.loads(first) == record.to_dict()
+    assert record.to_json() is first
+
+def test_store_mutation_refreshes_the_cache():
+    store = NotificationStore()
+    record = store.insert(NotificationRecord(id="n1", user_id="ana"))
+    record.to_json()
+    
+    store.set_status("n1", NotificationStatus.LIDA, read_at=1_700_000_000_000)
+    
+    assert json.loads(record.to_json())["status"] == "lida"
+
+def test_mutation_during_serialization_is_not_cached(monkeypatch):
+    store = NotificationStore()
+    record = store.insert(NotificationRecord(id="n1", user_id="ana"))
+    real_dumps = model.dumps_json
+    
+    def dumps_then_mutate(value):
+        # Uma thread de entrega muda o registro enquanto a requisição serializa
+        encoded = real_dumps(value)
+        store.set_status("n1", NotificationStatus.ENVIADA)
+        return encoded
+    
+    monkeypatch.setattr(model, "dumps_json", dumps_then_mutate)
+    stale = record.to_json()
+    monkeypatch.setattr(model, "dumps_json", real_dumps)
+    
+    assert json.loads(stale)["status"] == "pendente"
+    assert json.loads(record.to_json())["status"] == "enviada"
+
+def test_project_follows_requested_order():
+    record = NotificationRecord(id="n1", user_id="ana", title="Oi", created_at=1_700_000_000_000)
+    full = record.to_dict()
+    
+    assert record.project(["status", "id", "title"]) == ["pendente", "n1", "Oi"]
+    assert set(FIELD_NAMES) >= set(full)
+
+@pytest.mark.parametrize("value", [{"a": 1}, [2026], True, object(), 10 ** 20, float("inf"), "31/12/2026"])
+def test_to_epoch_ms_rejects_unsupported_values(value):
+    with pytest.raises(ValueError):
+        to_epoch_ms(value)
+
+def test_to_epoch_ms_accepts_numbers_strings_and_datetimes():
+    moment = datetime(2026, 10, 18, 12, 30)
+    
+    assert to_epoch_ms(None) is None and to_epoch_ms("") is None
+    assert to_epoch_ms(1760790600000) == 1760790600000
+    assert to_epoch_ms(moment.isoformat()) == to_epoch_ms(moment) == int(moment.timestamp() * 1000)
+
+@pytest.mark.parametrize("value", [{"big": 2 ** 70}, {1: "chave numérica"}])
+def test_dumps_json_falls_back_when_orjson_refuses(value):
+    assert json.loads(model.dumps_json(value)) == json.loads(json.dumps(value))
+
+def test_listing_with_values_orjson_refuses_succeeds(client):
+    created = client.post("/api/notifications", json={"user_id": "grande", "title": "Oi", "data": {"pedido": 2 ** 70}})
+    assert created.status_code == 200
+    
+    response = client.get("/api/notifications?user_id=grande")
+    
+    assert response.status_code == 200
+    assert response.get_json()["notifications"][0]["data"] == {"pedido": 2 ** 70}
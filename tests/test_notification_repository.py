@@ -0,0 +1,121 @@
+# 🧪 Testes do NotificationRepository: flush em lote, registros inválidos e recarga
+
+import pytest
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+from app.services.notification_repository import NotificationRepository
+from app.services.notification_store import NotificationStore
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "notifications.sqlite3")
+
+def open_repository(path):
+    # Intervalo longo: os testes chamam flush() explicitamente
+    return NotificationRepository(path, flush_interval=3600)
+
+def make_store(repository):
+    store = NotificationStore()
+    store.add_listener(repository)
+    return store
+
+def record(id, **fields):
+    return NotificationRecord(id=id, user_id=fields.pop("user_id", "ana"), title=f"Título {id}",
+                              created_at=fields.pop("created_at", 1000), **fields)
+
+def persisted(path):
+    repository = open_repository(path)
+    try:
+        return {record.id: record for record in repository.load_notifications()}
+    finally:
+        repository.close()
+
+def test_flush_persists_and_state_survives_a_restart(db_path):
+    repository = open_repository(db_path)
+    store = make_store(repository)
+    store.insert(record("a", data={"pedido": 7}, scheduled_at=5000))
+    store.insert(record("b", created_at=2000))
+    store.set_status("a", NotificationStatus.LIDA, read_at=3000)
+    
+    assert repository.flush() == 2
+    repository.close()
+    
+    loaded = persisted(db_path)
+    assert list(loaded) == ["a", "b"]
+    assert loaded["a"].to_dict() == store.get("a").to_dict()
+    assert loaded["a"].status is NotificationStatus.LIDA
+    assert loaded["b"].to_dict() == store.get("b").to_dict()
+
+def test_buffer_coalesces_insert_and_remove(db_path):
+    repository = open_repository(db_path)
+    store = make_store(repository)
+    store.insert(record("a"))
+    store.insert(record("b"))
+    repository.flush()
+    
+    store.remove("a")
+    store.insert(record("c"))
+    store.remove("c")
+    repository.flush()
+    repository.close()
+    
+    assert list(persisted(db_path)) == ["b"]
+
+@pytest.mark.parametrize("bad_fields", [
+    {"action_url": {"x": 1}},
+    {"data": {"grande": 2 ** 70}, "scheduled_at": 2 ** 70},
+    {"read_at": 1j}
+])
+def test_bad_row_is_dropped_without_blocking_the_rest(db_path, bad_fields):
+    repository = open_repository(db_path)
+    store = make_store(repository)
+    bad = record("bad")
+    for name, value in bad_fields.items():
+        setattr(bad, name, value)
+    store.insert(bad)
+    store.insert(record("ok1", user_id="bruno"))
+    
+    assert repository.flush() == 1
+    store.insert(record("ok2", user_id="bruno", created_at=2000))
+    assert repository.flush() == 1
+    assert repository._pending_upserts == {}
+    repository.close()
+    
+    assert list(persisted(db_path)) == ["ok1", "ok2"]
+
+def test_change_log_only_records_rows_that_were_written(db_path):
+    repository = open_repository(db_path)
+    repository.change_origin = "worker-a"
+    store = make_store(repository)
+    bad = record("bad")
+    bad.icon = ["x"]
+    store.insert(bad)
+    store.insert(record("ok"))
+    repository.flush()
+    
+    reader = open_repository(db_path)
+    try:
+        with reader._conn_lock:
+            changes = reader.read_changes(reader._conn, 0)
+    finally:
+        reader.close()
+        repository.close()
+    
+    assert [(kind, key) for _, kind, key, _ in changes] == [("notification", "ok")]
+
+def test_bad_subscription_and_config_are_dropped(db_path):
+    repository = open_repository(db_path)
+    repository.save_subscription({"id": "s1", "user_id": "ana", "endpoint": "https://push/1"})
+    repository.save_subscription({"id": "s2", "user_id": {"x": 1}, "endpoint": "https://push/2"})
+    repository.save_config("ana", {"enabled": True})
+    repository.save_config("bruno", {"quiet": {1, 2}})
+    
+    assert repository.flush() == 2
+    repository.close()
+    
+    reopened = open_repository(db_path)
+    try:
+        assert [s["id"] for s in reopened.load_subscriptions()] == ["s1"]
+        assert reopened.load_configs() == {"ana": {"enabled": True}}
+    finally:
+        reopened.close()
@@ -0,0 +1,129 @@
+# 🧪 Testes da retenção e do arquivo frio em segmentos
+
+import multiprocessing
+import sys
+
+import pytest
+
+from app.models.Notification import NotificationRecord, NotificationStatus, NotificationType
+from app.services.notification_retention import (
+    DAY_MS, RetentionPolicy, RetentionSweeper, SegmentArchive, parse_retention_rules
+)
+from app.services.notification_store import NotificationStore
+
+def record(index, user_id="ana", **kwargs):
+    return NotificationRecord(
+        id=f"n{index:05d}", user_id=user_id, title=f"Notificação {index}",
+        created_at=1_700_000_000_000 + index, updated_at=1_700_000_000_000 + index, **kwargs
+    )
+
+def test_policy_prefers_the_most_specific_rule():
+    policy = RetentionPolicy()
+    read_marketing = record(1, type=NotificationType.MARKETING, status=NotificationStatus.LIDA)
+    read_payment = record(2, type=NotificationType.PAGAMENTO, status=NotificationStatus.LIDA)
+    pending = record(3)
+    
+    assert policy.expires_at(read_marketing) == read_marketing.updated_at + 30 * DAY_MS
+    assert policy.expires_at(read_payment) == read_payment.updated_at + 90 * DAY_MS
+    assert policy.expires_at(pending) is None
+    assert RetentionPolicy({(None, None): 365}).expires_at(pending) == pending.updated_at + 365 * DAY_MS
+
+@pytest.mark.parametrize("status", [NotificationStatus.PENDENTE, NotificationStatus.ENVIADA])
+def test_defaults_never_expire_unread_notifications(status):
+    policy = RetentionPolicy()
+    
+    for notification_type in NotificationType:
+        unread = record(1, type=notification_type, status=status, scheduled_at=1_700_000_000_000)
+        assert policy.expires_at(unread) is None
+
+def test_sweeper_keeps_old_pending_and_scheduled_notifications(tmp_path):
+    store = NotificationStore()
+    store.insert(record(1))
+    store.insert(record(2, scheduled_at=1_800_000_000_000))
+    store.insert(record(3, status=NotificationStatus.FALHADA))
+    sweeper = RetentionSweeper(store, RetentionPolicy(), SegmentArchive(str(tmp_path)))
+    
+    archived = sum(sweeper.step(1_700_000_000_000 + 1000 * DAY_MS) for _ in range(3))
+    
+    assert archived == 1
+    assert store.get("n00003") is None and len(store) == 2
+
+def test_rules_are_parsed_from_text():
+    rules = parse_retention_rules(" marketing:lida=15, *:enviada=180,pagamento:*=never,*:*=400 ")
+    
+    assert rules == {
+        (NotificationType.MARKETING, NotificationStatus.LIDA): 15,
+        (None, NotificationStatus.ENVIADA): 180,
+        (NotificationType.PAGAMENTO, None): None,
+        (None, None): 400
+    }
+    assert parse_retention_rules("") == {}
+
+@pytest.mark.parametrize("text", ["lida=30", "*:lida", "*:lida=0", "*:lida=-3", "*:lida=trinta", "foo:lida=3", "*:nova=3"])
+def test_invalid_rules_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_retention_rules(text)
+
+def test_env_rules_override_the_defaults(monkeypatch):
+    monkeypatch.setenv("NOTIFICATIONS_RETENTION_DAYS", "*:lida=7,*:enviada=60")
+    policy = RetentionPolicy.from_env()
+    
+    read = record(1, type=NotificationType.PAGAMENTO, status=NotificationStatus.LIDA)
+    sent = record(2, status=NotificationStatus.ENVIADA)
+    failed = record(3, status=NotificationStatus.FALHADA)
+    read_system = record(4, type=NotificationType.SISTEMA, status=NotificationStatus.LIDA)
+    
+    assert policy.expires_at(read) == read.updated_at + 7 * DAY_MS
+    assert policy.expires_at(sent) == sent.updated_at + 60 * DAY_MS
+    assert policy.expires_at(failed) == failed.updated_at + 30 * DAY_MS
+    assert policy.expires_at(read_system) == read_system.updated_at + 30 * DAY_MS
+
+def test_sweeper_archives_only_expired(tmp_path):
+    store = NotificationStore()
+    for index in range(10):
+        store.insert(record(index, status=NotificationStatus.LIDA if index % 2 else NotificationStatus.PENDENTE))
+    archive = SegmentArchive(str(tmp_path))
+    sweeper = RetentionSweeper(store, RetentionPolicy(), archive, step_size=3)
+    now = 1_700_000_000_000 + 100 * DAY_MS
+    
+    archived = sum(sweeper.step(now) for _ in range(10))
+    
+    assert archived == 5
+    assert len(store) == 5
+    assert [item["id"] for item in archive.query("ana", limit=3)] == ["n00009", "n00007", "n00005"]
+
+def test_stale_instance_does_not_drop_other_writers_segments(tmp_path):
+    # Dois workers com o mesmo diretório: o segundo carregou o manifesto antes do primeiro gravar
+    leader = SegmentArchive(str(tmp_path), max_segment_bytes=200)
+    follower = SegmentArchive(str(tmp_path), max_segment_bytes=200)
+    
+    leader.append([record(index) for index in range(5)])
+    follower.append([record(index) for index in range(5, 10)])
+    leader.append([record(10, user_id="bruno")])
+    
+    fresh = SegmentArchive(str(tmp_path))
+    assert sum(entry["count"] for entry in fresh._manifest.values()) == 11
+    assert len(fresh.query("ana", limit=50)) == 10
+    assert len(fresh.query("bruno")) == 1
+
+def _append_many(directory, worker, rounds):
+    archive = SegmentArchive(directory, max_segment_bytes=2048)
+    for index in range(rounds):
+        archive.append([record(worker * 1000 + index, user_id=f"worker{worker}")])
+
+@pytest.mark.skipif(sys.platform == "win32", reason="flock indisponível")
+def test_concurrent_processes_keep_a_consistent_manifest(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_append_many, args=(str(tmp_path), worker, 40)) for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+    
+    archive = SegmentArchive(str(tmp_path))
+    assert sum(entry["count"] for entry in archive._manifest.values()) == 160
+    for worker in range(4):
+        assert len(archive.query(f"worker{worker}", limit=100)) == 40
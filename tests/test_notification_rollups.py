@@ -0,0 +1,94 @@
+# 🧪 Testes dos rollups diários por usuário
+
+from datetime import date, datetime, timedelta
+
+from app.models.Notification import NotificationPriority, NotificationRecord, NotificationStatus, NotificationType
+from app.services.notification_rollups import NotificationRollups
+from app.services.notification_store import NotificationStore
+
+TODAY = date(2026, 10, 18)
+
+def at(day_offset, hour=12):
+    """created_at em ms para `day_offset` dias antes de TODAY (horário local)"""
+    moment = datetime.combine(TODAY - timedelta(days=day_offset), datetime.min.time()) + timedelta(hours=hour)
+    return int(moment.timestamp() * 1000)
+
+def make_store():
+    store = NotificationStore()
+    rollups = NotificationRollups()
+    store.add_listener(rollups)
+    return store, rollups
+
+def record(id, day_offset=0, hour=12, user_id="ana", type=NotificationType.SISTEMA,
+           priority=NotificationPriority.MEDIA):
+    return NotificationRecord(id=id, user_id=user_id, type=type, priority=priority,
+                              created_at=at(day_offset, hour))
+
+def test_insert_updates_the_day_bucket():
+    store, rollups = make_store()
+    store.insert(record("a", type=NotificationType.PAGAMENTO, priority=NotificationPriority.ALTA))
+    store.insert(record("b"))
+    store.insert(record("c", user_id="bruno"))
+    
+    stats = rollups.stats("ana", 1, today=TODAY)
+    
+    assert stats["total"] == 2
+    assert stats["by_type"] == {"pagamento": 1, "sistema": 1}
+    assert stats["by_priority"] == {"alta": 1, "media": 1}
+    assert stats["by_status"] == {"pendente": 2}
+    assert stats["daily_count"] == {TODAY.isoformat(): 2}
+
+def test_status_change_moves_counts_between_statuses():
+    store, rollups = make_store()
+    store.insert(record("a"))
+    store.insert(record("b"))
+    
+    store.set_status("a", NotificationStatus.LIDA)
+    store.set_status_for_user("ana", NotificationStatus.PENDENTE, NotificationStatus.ENVIADA)
+    
+    assert rollups.stats("ana", 1, today=TODAY)["by_status"] == {"lida": 1, "enviada": 1}
+
+def test_remove_decrements_and_drops_empty_keys():
+    store, rollups = make_store()
+    store.insert(record("a", type=NotificationType.PAGAMENTO))
+    store.insert(record("b"))
+    
+    store.remove("a")
+    
+    stats = rollups.stats("ana", 1, today=TODAY)
+    assert stats["total"] == 1
+    assert stats["by_type"] == {"sistema": 1}
+
+def test_bucket_is_deleted_when_its_count_reaches_zero():
+    store, rollups = make_store()
+    store.insert(record("a", day_offset=1))
+    store.insert(record("b"))
+    
+    store.remove("a")
+    
+    assert list(rollups._buckets["ana"]) == [TODAY.isoformat()]
+    assert rollups.stats("ana", 7, today=TODAY)["daily_count"] == {TODAY.isoformat(): 1}
+
+def test_window_crosses_days_and_excludes_older_buckets():
+    store, rollups = make_store()
+    for index, offset in enumerate([0, 0, 1, 2, 6, 7, 30]):
+        store.insert(record(f"n{index}", day_offset=offset, hour=0 if offset == 2 else 23))
+    
+    week = rollups.stats("ana", 7, today=TODAY)
+    
+    assert week["total"] == 5
+    assert week["daily_count"] == {
+        (TODAY - timedelta(days=6)).isoformat(): 1,
+        (TODAY - timedelta(days=2)).isoformat(): 1,
+        (TODAY - timedelta(days=1)).isoformat(): 1,
+        TODAY.isoformat(): 2
+    }
+    assert rollups.stats("ana", 1, today=TODAY)["total"] == 2
+    assert rollups.stats("ana", 365, today=TODAY)["total"] == 7
+
+def test_unknown_user_has_empty_stats():
+    _, rollups = make_store()
+    
+    assert rollups.stats("ninguem", 30, today=TODAY) == {
+        "total": 0, "by_type": {}, "by_status": {}, "by_priority": {}, "daily_count": {}
+    }
@@ -0,0 +1,97 @@
+# 🧪 Testes do TimerScheduler: ordem, cancelamento e reagendamento
+
+import threading
+import time
+
+import pytest
+
+from app.models.Notification import now_ms
+from app.services.notification_scheduler import TimerScheduler
+
+@pytest.fixture
+def scheduler():
+    scheduler = TimerScheduler()
+    yield scheduler
+    scheduler.shutdown()
+
+def recorder():
+    fired, done = [], threading.Event()
+    
+    def record(key, last=False):
+        def callback():
+            fired.append(key)
+            if last:
+                done.set()
+        return callback
+    return fired, done, record
+
+def test_callbacks_fire_in_due_order(scheduler):
+    fired, done, record = recorder()
+    now = now_ms()
+    
+    scheduler.schedule("c", now + 60, record("c", last=True))
+    scheduler.schedule("a", now + 20, record("a"))
+    scheduler.schedule("b", now + 40, record("b"))
+    
+    assert done.wait(2)
+    assert fired == ["a", "b", "c"]
+    assert len(scheduler) == 0
+
+def test_cancel_prevents_callback(scheduler):
+    fired, done, record = recorder()
+    now = now_ms()
+    
+    scheduler.schedule("cancelada", now + 20, record("cancelada"))
+    scheduler.schedule("fim", now + 60, record("fim", last=True))
+    
+    assert scheduler.cancel("cancelada")
+    assert not scheduler.cancel("cancelada")
+    assert done.wait(2)
+    assert fired == ["fim"]
+
+def test_reschedule_replaces_previous_entry(scheduler):
+    fired, done, record = recorder()
+    now = now_ms()
+    
+    scheduler.schedule("n1", now + 20, record("primeiro"))
+    scheduler.schedule("n1", now + 80, record("segundo", last=True))
+    
+    assert scheduler.due_at("n1") == now + 80
+    assert done.wait(2)
+    time.sleep(0.05)
+    assert fired == ["segundo"]
+
+def test_reschedule_earlier_wakes_the_timer(scheduler):
+    fired, done, record = recorder()
+    
+    scheduler.schedule("n1", now_ms() + 60_000, record("tarde"))
+    started = time.monotonic()
+    scheduler.schedule("n1", now_ms() + 20, record("cedo", last=True))
+    
+    assert done.wait(2)
+    assert time.monotonic() - started < 1
+    assert fired == ["cedo"]
+
+def test_mass_cancel_compacts_the_heap(scheduler):
+    now = now_ms()
+    for index in range(100):
+        scheduler.schedule(f"n{index}", now + 60_000 + index, lambda: None)
+    for index in range(80):
+        scheduler.cancel(f"n{index}")
+    
+    assert len(scheduler) == 20
+    assert len(scheduler._heap) < 100
+    assert scheduler.due_at("n80") == now + 60_080
+
+def test_failing_callback_does_not_stop_the_scheduler(scheduler):
+    fired, done, record = recorder()
+    now = now_ms()
+    
+    def explode():
+        raise RuntimeError("falhou")
+    
+    scheduler.schedule("erro", now + 10, explode)
+    scheduler.schedule("depois", now + 40, record("depois", last=True))
+    
+    assert done.wait(2)
+    assert fired == ["depois"]
@@ -0,0 +1,112 @@
+# 🧪 Testes do índice de busca textual (prefixo, AND, ranking, filtro e remoção)
+
+import pytest
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+from app.services.notification_search import NotificationSearchIndex, fold, tokenize
+from app.services.notification_store import NotificationStore
+
+def make_index(*notifications):
+    store = NotificationStore()
+    index = NotificationSearchIndex(store)
+    store.add_listener(index)
+    store.insert_many(list(notifications))
+    return store, index
+
+def record(id, title="", message="", user_id="ana", created_at=1000):
+    return NotificationRecord(id=id, user_id=user_id, title=title, message=message, created_at=created_at)
+
+def ids(index, query, user_id="ana", **kwargs):
+    results, total = index.search(user_id, query, **kwargs)
+    return [notification.id for notification in results], total
+
+def test_fold_and_tokenize_ignore_case_and_accents():
+    assert fold("Sessão FAMÍLIA") == "sessao familia"
+    assert tokenize("Ensaio: Família, 20/06!") == ["ensaio", "familia", "20", "06"]
+
+@pytest.mark.parametrize("value, expected", [(None, ""), (42, "42"), (["A"], "['a']")])
+def test_fold_accepts_non_strings(value, expected):
+    assert fold(value) == expected
+
+def test_words_match_as_prefixes():
+    _, index = make_index(
+        record("a", "Pagamento aprovado"),
+        record("b", "Pagar sinal"),
+        record("c", "Agendamento novo")
+    )
+    
+    assert sorted(ids(index, "pag")[0]) == ["a", "b"]
+    assert ids(index, "pagamento")[0] == ["a"]
+    assert ids(index, "amento") == ([], 0)
+
+def test_all_query_words_must_match():
+    _, index = make_index(
+        record("a", "Ensaio gestante", "Maria amanhã"),
+        record("b", "Ensaio newborn", "Maria hoje"),
+        record("c", "Ensaio gestante", "Joana")
+    )
+    
+    assert ids(index, "ensaio gest maria") == (["a"], 1)
+    assert ids(index, "ensaio inexistente") == ([], 0)
+
+def test_title_beats_message_and_exact_beats_prefix():
+    # Peso do campo (título 2, mensagem 1) vezes 2 para termo exato; empate vai para a mais recente
+    _, index = make_index(
+        record("message-prefix", "Aviso", "ensaios da semana", created_at=4000),
+        record("message", "Aviso", "ensaio confirmado", created_at=2000),
+        record("title-prefix", "Ensaios da semana", created_at=3000),
+        record("title", "Ensaio confirmado", created_at=1000)
+    )
+    
+    assert ids(index, "ensaio")[0] == ["title", "title-prefix", "message", "message-prefix"]
+
+def test_ties_are_ordered_by_most_recent_and_paginated():
+    _, index = make_index(*[record(f"n{i}", "Lembrete", created_at=1000 + i) for i in range(5)])
+    
+    assert ids(index, "lembrete", limit=2) == (["n4", "n3"], 5)
+    assert ids(index, "lembrete", limit=2, offset=4) == (["n0"], 5)
+
+def test_status_filter_uses_the_current_status():
+    store, index = make_index(record("a", "Pagamento"), record("b", "Pagamento"))
+    store.set_status("a", NotificationStatus.LIDA)
+    
+    assert ids(index, "pagamento", status=NotificationStatus.LIDA) == (["a"], 1)
+    assert ids(index, "pagamento", status=NotificationStatus.PENDENTE) == (["b"], 1)
+
+def test_results_are_per_user():
+    _, index = make_index(record("a", "Pagamento"), record("b", "Pagamento", user_id="bia"))
+    
+    assert ids(index, "pagamento", user_id="bia") == (["b"], 1)
+
+def test_removed_document_leaves_the_index():
+    store, index = make_index(record("a", "Pagamento único"), record("b", "Pagamento parcelado"))
+    
+    store.remove("a")
+    
+    assert ids(index, "pagamento") == (["b"], 1)
+    assert ids(index, "unico") == ([], 0)
+    assert "unico" not in index._terms["ana"]
+    assert "a" not in index._documents
+
+def test_replaced_document_is_reindexed():
+    store, index = make_index(record("a", "Rascunho"))
+    
+    store.insert(record("a", "Versão final"))
+    
+    assert ids(index, "rascunho") == ([], 0)
+    assert ids(index, "final") == (["a"], 1)
+
+@pytest.mark.parametrize("field, value", [("title", None), ("message", 7), ("user_id", None),
+                                          ("status", "lida"), ("created_at", "ontem")])
+def test_invalid_record_is_rejected_before_any_index_changes(field, value):
+    store, index = make_index(record("a", "Pagamento"))
+    bad = record("a", "Substituto")
+    setattr(bad, field, value)
+    
+    with pytest.raises(ValueError, match=field):
+        store.insert(bad)
+    
+    assert store.get("a").title == "Pagamento"
+    assert store.count("ana") == 1
+    assert ids(index, "pagamento") == (["a"], 1)
+    assert "substituto" not in index._terms["ana"]
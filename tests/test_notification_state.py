@@ -0,0 +1,126 @@
+# 🧪 Testes da replicação entre workers (SQLiteChangeFeed) com dois stores no mesmo banco
+
+import sqlite3
+
+import pytest
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+from app.services.notification_repository import NotificationRepository
+from app.services.notification_state import SQLiteChangeFeed
+from app.services.notification_store import NotificationStore
+
+class Worker:
+    """Store + repositório + change feed de um processo, com flush e poll manuais"""
+    
+    def __init__(self, path, origin):
+        self.store = NotificationStore()
+        self.repository = NotificationRepository(path, flush_interval=3600)
+        self.repository.change_origin = origin
+        self.store.origin = origin
+        self.store.add_listener(self.repository)
+        self.feed = SQLiteChangeFeed(self.repository, self.store, poll_interval=3600)
+        self.feed.start(0)
+    
+    def sync(self):
+        self.repository.flush()
+        self.feed.poll()
+    
+    def close(self):
+        self.feed.stop()
+        self.repository.close()
+
+@pytest.fixture
+def workers(tmp_path):
+    path = str(tmp_path / "notifications.sqlite3")
+    a, b = Worker(path, "worker-a"), Worker(path, "worker-b")
+    yield a, b, path
+    a.close()
+    b.close()
+
+def stored_status(path, notification_id):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT status FROM notifications WHERE id = ?", (notification_id,)).fetchone()[0]
+
+def share(a, b, notification_id="n1"):
+    a.store.insert(NotificationRecord(id=notification_id, user_id="ana", title="Sessão", created_at=1000))
+    a.sync()
+    b.sync()
+    assert b.store.get(notification_id) is not None
+
+@pytest.mark.parametrize("flush_order", ["a-first", "b-first"])
+def test_concurrent_changes_converge_on_every_worker_and_sqlite(workers, flush_order):
+    a, b, path = workers
+    share(a, b)
+    
+    # A termina a entrega enquanto B marca como lida
+    a.store.set_status("n1", NotificationStatus.ENVIADA, sent_at=2000, updated_at=2000)
+    b.store.set_status("n1", NotificationStatus.LIDA, read_at=2001, updated_at=2001)
+    first, second = (a, b) if flush_order == "a-first" else (b, a)
+    first.repository.flush()
+    second.repository.flush()
+    a.feed.poll()
+    b.feed.poll()
+    
+    winner = a.store.get("n1").status
+    assert b.store.get("n1").status is winner
+    assert stored_status(path, "n1") == winner.value
+    # Empate na revisão: vence a maior origem, em qualquer ordem de flush
+    assert winner is NotificationStatus.LIDA
+    assert a.store.count("ana", NotificationStatus.LIDA) == b.store.count("ana", NotificationStatus.LIDA) == 1
+    assert a.store.count("ana", NotificationStatus.ENVIADA) == b.store.count("ana", NotificationStatus.ENVIADA) == 0
+
+def test_later_revision_wins_over_an_older_concurrent_one(workers):
+    a, b, path = workers
+    share(a, b)
+    
+    a.store.set_status("n1", NotificationStatus.ENVIADA, sent_at=2000)
+    a.store.set_status("n1", NotificationStatus.LIDA, read_at=3000)
+    b.store.set_status("n1", NotificationStatus.FALHADA)
+    a.repository.flush()
+    b.repository.flush()
+    a.feed.poll()
+    b.feed.poll()
+    
+    assert a.store.get("n1").status is b.store.get("n1").status is NotificationStatus.LIDA
+    assert b.store.get("n1").read_at == 3000
+    assert stored_status(path, "n1") == "lida"
+
+def test_sequential_changes_replicate_in_both_directions(workers):
+    a, b, _ = workers
+    share(a, b)
+    
+    b.store.set_status("n1", NotificationStatus.LIDA, read_at=3000)
+    b.sync()
+    a.sync()
+    a.store.set_status("n1", NotificationStatus.PENDENTE, read_at=None)
+    a.sync()
+    b.sync()
+    
+    assert a.store.get("n1").status is b.store.get("n1").status is NotificationStatus.PENDENTE
+    assert b.store.get("n1").read_at is None
+    assert a.store.get("n1").revision == b.store.get("n1").revision == 2
+
+def test_database_from_before_revisions_is_migrated(tmp_path):
+    path = str(tmp_path / "antigo.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("""CREATE TABLE notifications (
+            id TEXT PRIMARY KEY, user_id TEXT NOT NULL, title TEXT NOT NULL, message TEXT NOT NULL,
+            type TEXT NOT NULL, priority TEXT NOT NULL, status TEXT NOT NULL, data TEXT,
+            action_url TEXT, icon TEXT, image_url TEXT, scheduled_at INTEGER, sent_at INTEGER,
+            read_at INTEGER, created_at INTEGER NOT NULL, updated_at INTEGER NOT NULL)""")
+        conn.execute("INSERT INTO notifications VALUES ('n1', 'ana', 'Oi', '', 'sistema', 'media', "
+                     "'pendente', NULL, '', '', '', NULL, NULL, NULL, 1000, 1000)")
+    
+    repository = NotificationRepository(path, flush_interval=3600)
+    try:
+        [record] = repository.load_notifications()
+        assert (record.revision, record.origin) == (0, "")
+        store = NotificationStore()
+        store.insert(record)
+        store.add_listener(repository)
+        store.set_status("n1", NotificationStatus.LIDA)
+        assert repository.flush() == 1
+    finally:
+        repository.close()
+    
+    assert stored_status(path, "n1") == "lida"
@@ -0,0 +1,71 @@
+# 🧪 Testes do endpoint /notifications/stats (fields=, format=compact e validação)
+
+from datetime import date, timedelta
+
+import pytest
+
+def create(client, user_id, **fields):
+    response = client.post("/api/notifications", json={"user_id": user_id, "title": "Oi", **fields})
+    assert response.status_code == 200
+
+def stats(client, query):
+    return client.get(f"/api/notifications/stats?{query}")
+
+def test_full_stats_by_default(client):
+    create(client, "stats-full", type="pagamento", priority="alta")
+    create(client, "stats-full")
+    
+    body = stats(client, "user_id=stats-full").get_json()
+    
+    assert body["period_days"] == 7
+    assert body["stats"]["total"] == 2
+    assert body["stats"]["by_type"] == {"pagamento": 1, "sistema": 1}
+    assert body["stats"]["daily_count"] == {date.today().isoformat(): 2}
+
+def test_fields_selects_sections_in_requested_order(client):
+    create(client, "stats-fields", type="pagamento")
+    
+    body = stats(client, "user_id=stats-fields&fields=by_type,total,by_type").get_json()
+    
+    assert list(body["stats"]) == ["by_type", "total"]
+    assert body["stats"] == {"by_type": {"pagamento": 1}, "total": 1}
+
+@pytest.mark.parametrize("fields", ["total,segredo", ",", "by_type, nada"])
+def test_unknown_or_empty_fields_return_400(client, fields):
+    response = stats(client, f"user_id=stats-fields&fields={fields}")
+    
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+def test_compact_format_uses_columns_and_dense_daily_series(client):
+    create(client, "stats-compact", type="pagamento")
+    create(client, "stats-compact", type="pagamento")
+    create(client, "stats-compact")
+    
+    body = stats(client, "user_id=stats-compact&days=3&format=compact").get_json()
+    
+    compact = body["stats"]
+    assert compact["total"] == 3
+    assert dict(zip(compact["by_type"]["keys"], compact["by_type"]["counts"])) == {"pagamento": 2, "sistema": 1}
+    assert compact["daily_count"] == {"start": (date.today() - timedelta(days=2)).isoformat(), "counts": [0, 0, 3]}
+
+def test_compact_format_with_fields(client):
+    create(client, "stats-compact-fields")
+    
+    body = stats(client, "user_id=stats-compact-fields&days=1&format=compact&fields=daily_count").get_json()
+    
+    assert body["stats"] == {"daily_count": {"start": date.today().isoformat(), "counts": [1]}}
+
+@pytest.mark.parametrize("days", ["0", "-3", "366", "100000000", "sete", ""])
+def test_days_outside_range_return_400(client, days):
+    response = stats(client, f"user_id=stats-days&days={days}")
+    
+    assert response.status_code == 400
+    assert "days" in response.get_json()["message"]
+
+@pytest.mark.parametrize("days", ["1", "365"])
+def test_days_range_limits_are_accepted(client, days):
+    response = stats(client, f"user_id=stats-days&days={days}&format=compact")
+    
+    assert response.status_code == 200
+    assert len(response.get_json()["stats"]["daily_count"]["counts"]) == int(days)
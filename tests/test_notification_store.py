@@ -0,0 +1,94 @@
+# 🧪 Testes do NotificationStore: paginação por cursor e contadores
+
+import pytest
+
+from app.models.Notification import NotificationRecord, NotificationStatus
+from app.services.notification_store import NotificationStore
+
+def make_store(count, user_id="ana"):
+    store = NotificationStore()
+    for index in range(count):
+        store.insert(NotificationRecord(
+            id=f"n{index:03d}", user_id=user_id, title=f"Notificação {index}", created_at=1000 + index
+        ))
+    return store
+
+def ids(records):
+    return [record.id for record in records]
+
+def test_page_for_user_returns_newest_first_with_cursor():
+    store = make_store(5)
+    
+    page, next_key = store.page_for_user("ana", limit=2)
+    
+    assert ids(page) == ["n004", "n003"]
+    assert next_key == (1003, "n003")
+
+def test_cursor_walks_every_record_exactly_once():
+    store = make_store(7)
+    
+    seen, after = [], None
+    while True:
+        page, after = store.page_for_user("ana", limit=3, after=after)
+        seen.extend(ids(page))
+        if after is None:
+            break
+    
+    assert seen == [f"n{index:03d}" for index in reversed(range(7))]
+
+def test_last_page_has_no_cursor():
+    store = make_store(4)
+    
+    page, next_key = store.page_for_user("ana", limit=2, after=(1002, "n002"))
+    
+    assert ids(page) == ["n001", "n000"]
+    assert next_key is None
+
+def test_cursor_survives_removal_of_its_own_key():
+    store = make_store(5)
+    _, next_key = store.page_for_user("ana", limit=2)
+    
+    store.remove("n003")
+    page, _ = store.page_for_user("ana", limit=2, after=next_key)
+    
+    assert ids(page) == ["n002", "n001"]
+
+def test_offset_past_the_end_is_empty():
+    store = make_store(3)
+    
+    assert store.page_for_user("ana", limit=2, offset=10) == ([], None)
+
+@pytest.mark.parametrize("limit, offset", [(0, 0), (0, 2), (2, -2)])
+def test_empty_slice_does_not_raise(limit, offset):
+    store = make_store(3)
+    
+    assert store.page_for_user("ana", limit=limit, offset=offset) == ([], None)
+
+def test_unknown_user_and_status_filter():
+    store = make_store(4)
+    store.set_status("n001", NotificationStatus.LIDA)
+    
+    assert store.page_for_user("bruno") == ([], None)
+    page, _ = store.page_for_user("ana", NotificationStatus.LIDA)
+    assert ids(page) == ["n001"]
+    assert store.count("ana", NotificationStatus.PENDENTE) == 3
+
+def test_set_status_for_user_keeps_indexes_sorted():
+    store = make_store(4)
+    store.set_status("n002", NotificationStatus.LIDA)
+    
+    changed = store.set_status_for_user("ana", NotificationStatus.PENDENTE, NotificationStatus.LIDA)
+    
+    assert changed == 3
+    assert store.count("ana", NotificationStatus.PENDENTE) == 0
+    page, _ = store.page_for_user("ana", NotificationStatus.LIDA, limit=10)
+    assert ids(page) == ["n003", "n002", "n001", "n000"]
+
+@pytest.mark.parametrize("query", ["limit=0", "page=0", "limit=-5&page=-1"])
+def test_list_endpoint_clamps_page_and_limit(client, query):
+    response = client.get(f"/api/notifications?user_id=paginacao&{query}")
+    
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["notifications"] == []
+    assert body["page"] >= 1 and body["limit"] >= 1
@@ -0,0 +1,82 @@
+# 🧪 Testes do GET condicional (ETag / If-None-Match)
+
+from datetime import datetime, timedelta
+
+import pytest
+
+def create(client, user_id):
+    response = client.post("/api/notifications", json={
+        "user_id": user_id, "title": "Lembrete",
+        "scheduled_at": (datetime.now() + timedelta(hours=1)).isoformat()
+    })
+    return response.get_json()["notification"]["id"]
+
+def etag_of(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+@pytest.mark.parametrize("url", [
+    "/api/notifications?user_id=etag-get",
+    "/api/notifications/config?user_id=etag-get",
+    "/api/notifications/templates"
+])
+def test_matching_if_none_match_returns_304(client, url):
+    etag = etag_of(client, url)
+    
+    response = revalidate(client, url, etag)
+    
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+    assert revalidate(client, url, '"outra"').status_code == 200
+
+@pytest.mark.parametrize("change", ["insert", "read", "delete"])
+def test_notifications_etag_changes_after_mutations(client, change):
+    user_id = f"etag-{change}"
+    url = f"/api/notifications?user_id={user_id}"
+    notification_id = create(client, user_id)
+    etag = etag_of(client, url)
+    
+    if change == "insert":
+        create(client, user_id)
+    elif change == "read":
+        client.post(f"/api/notifications/{notification_id}/read", json={})
+    else:
+        client.post("/api/notifications/bulk", json={
+            "user_id": user_id, "action": "delete", "ids": [notification_id]
+        })
+    
+    response = revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_other_users_changes_keep_the_etag(client):
+    url = "/api/notifications?user_id=etag-isolado"
+    etag = etag_of(client, url)
+    
+    create(client, "etag-vizinho")
+    
+    assert revalidate(client, url, etag).status_code == 304
+
+def test_config_etag_changes_after_update(client):
+    url = "/api/notifications/config?user_id=etag-config"
+    etag = etag_of(client, url)
+    
+    client.post("/api/notifications/config", json={"user_id": "etag-config", "push_enabled": False})
+    
+    response = revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.get_json()["config"]["push_enabled"] is False
+
+def test_query_variants_have_distinct_etags(client):
+    base = "/api/notifications?user_id=etag-variante"
+    
+    etags = {etag_of(client, base + suffix) for suffix in ["", "&limit=5", "&status=lida", "&fields=id,title"]}
+    
+    assert len(etags) == 4
+    assert etag_of(client, base + "&limit=5&page=2") == etag_of(client, base + "&page=2&limit=5")
+    assert revalidate(client, base + "&limit=5", etag_of(client, base)).status_code == 200
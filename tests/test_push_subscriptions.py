@@ -0,0 +1,76 @@
+# 🧪 Testes do envio push em lote contra um serviço de push local
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.push_subscriptions import PushFanoutSender, SubscriptionRegistry
+
+class PushServiceStandIn(BaseHTTPRequestHandler):
+    """Responde pelo prefixo do caminho: /ok 201, /gone 410, /fail 500"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append((self.path, body, self.client_address[1]))
+        status = {"ok": 201, "gone": 410, "fail": 500}[self.path.split("/")[1]]
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def push_service():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PushServiceStandIn)
+    server.received = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def subscription(base, path, index):
+    return {"id": f"sub_{index}", "user_id": "ana", "endpoint": f"{base}/{path}/{index}",
+            "keys": {}, "active": True}
+
+def test_fanout_reuses_one_connection_and_reports_results(push_service):
+    base = f"http://127.0.0.1:{push_service.server_address[1]}"
+    gone = []
+    sender = PushFanoutSender(on_gone=gone.append)
+    subscriptions = [subscription(base, "ok", index) for index in range(5)]
+    subscriptions += [subscription(base, "gone", 5), subscription(base, "fail", 6)]
+    
+    results = sender.send(subscriptions, b'{"title":"Oi"}')
+    
+    assert (results["success"], results["gone"], results["failed"]) == (5, 1, 1)
+    assert results["errors"] == [f"{base}/fail/6"]
+    assert gone == [f"{base}/gone/5"]
+    assert {body for _, body, _ in push_service.received} == {b'{"title":"Oi"}'}
+    # Todas as requisições passaram pela mesma conexão keep-alive
+    assert len({port for _, _, port in push_service.received}) == 1
+    
+    sender.send([subscription(base, "ok", 7)], b"{}")
+    assert len({port for _, _, port in push_service.received}) == 1
+    sender.close()
+
+def test_unreachable_host_counts_as_failure():
+    sender = PushFanoutSender(timeout=1)
+    
+    results = sender.send([subscription("http://127.0.0.1:9", "ok", 1)], b"{}")
+    
+    assert results["failed"] == 1 and results["success"] == 0
+
+def test_registry_deduplicates_endpoints_and_deactivates():
+    registry = SubscriptionRegistry()
+    first, created = registry.register(subscription("https://push.example", "ok", 1))
+    again, created_again = registry.register({**subscription("https://push.example", "ok", 1), "id": "sub_x"})
+    
+    assert created and not created_again
+    assert again is first and len(registry) == 1
+    assert registry.active_for_user("ana") == [first]
+    
+    registry.deactivate(first["endpoint"])
+    assert registry.active_for_user("ana") == []
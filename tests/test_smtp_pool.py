@@ -0,0 +1,94 @@
+# 🧪 Testes do SMTPConnectionPool contra um servidor SMTP local
+
+import socket
+from email.mime.text import MIMEText
+
+import pytest
+
+from standins import SMTPStandIn
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn()
+    yield server
+    server.stop()
+
+def make_pool(email_service, server, **kwargs):
+    return email_service.SMTPConnectionPool("127.0.0.1", server.port, use_tls=False, **kwargs)
+
+def message(to_email):
+    msg = MIMEText("Olá!", "plain", "utf-8")
+    msg["From"] = "jessica@jessicasantos.com"
+    msg["To"] = to_email
+    msg["Subject"] = "Teste"
+    return msg
+
+def test_messages_share_one_session(email_service, smtp_server):
+    pool = make_pool(email_service, smtp_server)
+    
+    assert all(pool.send(message(f"u{index}@x.com")) for index in range(5))
+    pool.close()
+    
+    assert smtp_server.sessions == 1
+    assert pool.connections_opened == 1
+    assert len(smtp_server.messages) == 5
+
+def test_refused_recipient_resets_and_keeps_the_session(email_service, smtp_server):
+    pool = make_pool(email_service, smtp_server)
+    
+    assert not pool.send(message("bad@x.com"))
+    assert pool.send(message("ok@x.com"))
+    pool.close()
+    
+    assert "RSET" in smtp_server.commands
+    assert smtp_server.sessions == 1
+    assert [m["rcpt"] for m in smtp_server.messages] == [["ok@x.com"]]
+
+def test_421_opens_a_new_session_and_resends(email_service):
+    server = SMTPStandIn(max_per_session=2)
+    try:
+        pool = make_pool(email_service, server)
+        
+        assert all(pool.send(message(f"u{index}@x.com")) for index in range(5))
+        pool.close()
+        
+        assert len(server.messages) == 5
+        assert server.sessions == 3
+    finally:
+        server.stop()
+
+def test_dropped_idle_session_is_replaced(email_service, smtp_server):
+    pool = make_pool(email_service, smtp_server)
+    assert pool.send(message("a@x.com"))
+    
+    # O servidor (ou um firewall) derrubou a conexão ociosa
+    pool._idle[0].smtp.sock.shutdown(socket.SHUT_RDWR)
+    
+    assert pool.send(message("b@x.com"))
+    pool.close()
+    assert pool.connections_opened == 2
+    assert len(smtp_server.messages) == 2
+
+def test_session_is_rotated_after_message_limit(email_service, smtp_server):
+    pool = make_pool(email_service, smtp_server, max_messages_per_connection=2)
+    
+    assert all(pool.send(message(f"u{index}@x.com")) for index in range(4))
+    pool.close()
+    
+    assert smtp_server.sessions == 2
+    assert smtp_server.commands.count("QUIT") == 2
+
+def test_expired_idle_session_is_not_reused(email_service, smtp_server):
+    pool = make_pool(email_service, smtp_server, idle_timeout=0)
+    
+    assert pool.send(message("a@x.com"))
+    assert pool.send(message("b@x.com"))
+    pool.close()
+    
+    assert smtp_server.sessions == 2
+
+def test_unreachable_server_raises(email_service):
+    pool = email_service.SMTPConnectionPool("127.0.0.1", 9, use_tls=False, timeout=1)
+    
+    with pytest.raises(OSError):
+        pool.send(message("a@x.com"))